@@ -0,0 +1,9 @@
+"""
+dblkdiff:  find changed/new regions of a dblk stream
+@author:   Eric B. Decker
+"""
+
+# 0.0.1         Initial version, sector and sync chunk manifests, probe
+#               stop at dblk_nxt (dblk dir)
+
+__version__ = '0.0.1.dev1'
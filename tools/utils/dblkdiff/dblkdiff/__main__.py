@@ -0,0 +1,13 @@
+"""
+dblkdiff:  find changed/new regions of a dblk stream
+@author:   Eric B. Decker
+"""
+
+from dblkdiff     import diff
+from dblkdiffargs import parseargs
+
+def main():
+    diff(parseargs())
+
+if __name__ == '__main__':
+    main()
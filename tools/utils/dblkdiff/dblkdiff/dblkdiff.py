@@ -0,0 +1,119 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''dblkdiff: which parts of a dblk stream need to be pulled
+
+Hash the stream in chunks (sector or SYNC bounded) and compare against
+the manifest from the last pull.  Lists the byte ranges that are new or
+have changed.  See tagcore/chunk_hash.py.
+
+Verbosity:
+
+  0   ranges and summary (default)
+  1   manifest details
+'''
+
+from   __future__               import print_function
+
+import os
+import sys
+
+from   tagcore                  import *
+from   tagcore.tagfile          import TagFile
+from   tagcore.chunk_hash       import *
+from   tagcore.dblk_dir         import DblkDir
+
+from   __init__                 import __version__   as VERSION
+
+ver_str = '\ndblkdiff: ' + VERSION
+
+
+def print_ranges(ranges, total):
+    need = 0
+    for lo, hi in ranges:
+        need += hi - lo
+        print('  fetch  @{0:<10d} (0x{0:08x}) - {1:<10d} (0x{1:08x})  {2} bytes'.format(
+            lo, hi, hi - lo))
+    print('*** {} ranges, {} of {} bytes need fetching'.format(
+        len(ranges), need, total))
+
+
+def diff(args):
+    verbose = args.verbose if args.verbose else 0
+    print(ver_str)
+
+    old = None
+    if args.manifest and os.path.exists(args.manifest):
+        try:
+            old = load_manifest(args.manifest)
+        except (IOError, ValueError) as e:
+            print('*** unable to load manifest {}: {}'.format(args.manifest, e))
+            sys.exit(1)
+    if args.sync:
+        mode = 'sync'
+    else:
+        mode = old['mode'] if old else 'sector'
+
+    name  = args.input.name
+    infile = TagFile(args.input, net_io = args.net, verbose = verbose)
+
+    # size of the stream, not the file (an archive is smaller)
+    end   = infile.coverage()[1]
+    if args.endpos and args.endpos < end:
+        end = args.endpos
+    start = args.jump if args.jump else 0
+
+    # nothing past the end of what's been written (dblk_nxt) is interesting
+    ddir = DblkDir()
+    if ddir.read(infile):
+        nxt = ddir.data_limit() if infile.sparse else ddir.find_nxt(infile, end)
+        if nxt < end:
+            end = nxt
+        if verbose >= 1:
+            print('*** dblk dir: {}, data ends @{}'.format(ddir, end))
+
+    if verbose >= 1 and old:
+        print('*** manifest {}: {} chunks ({}), {} - {}'.format(args.manifest,
+            len(old['chunks']), old['mode'], old['start'], old['end']))
+
+    if args.probe is not None:
+        if not old:
+            print('*** --probe needs an existing manifest (-m)')
+            sys.exit(1)
+        ranges, nread = probe(infile, old, end, args.probe)
+        print_ranges(ranges, end - start)
+        print('*** probe: read {} bytes'.format(nread))
+        return
+
+    new = build_manifest(infile, start, end, mode)
+    if verbose >= 1:
+        print('*** {}: {} chunks ({}), {} - {}'.format(name,
+            len(new['chunks']), mode, new['start'], new['end']))
+    if old and old['mode'] != mode:
+        print('*** manifest mode {} != {}, everything is new'.format(
+            old['mode'], mode))
+        old = None
+    print_ranges(changed_ranges(old, new), new['end'] - start)
+
+    if args.update:
+        if not args.manifest:
+            print('*** --update needs a manifest (-m)')
+            sys.exit(1)
+        save_manifest(args.manifest, new)
+        print('*** manifest {} updated'.format(args.manifest))
@@ -0,0 +1,79 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#
+
+from   __future__ import print_function
+from   __init__   import __version__ as VERSION
+import argparse
+
+def auto_int(x):
+    return int(x, 0)
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='List the regions of a dblk stream that need pulling.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='input file')
+
+    parser.add_argument('-V', '--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION)
+
+    parser.add_argument('-m', '--manifest',
+                        metavar='FILE',
+                        help='manifest from the last pull')
+
+    parser.add_argument('-u', '--update',
+                        action='store_true',
+                        help='write the new manifest back out')
+
+    parser.add_argument('-s', '--sync',
+                        action='store_true',
+                        help='cut chunks at SYNC/REBOOT records (default sector)')
+
+    parser.add_argument('-p', '--probe',
+                        type=int,
+                        nargs='?',
+                        const=0,
+                        metavar='N',
+                        help='only read back the last (plus N more) chunks of the manifest')
+
+    parser.add_argument('-j', '--jump',
+                        type=auto_int,
+                        help='set input file position')
+
+    parser.add_argument('-x', '--endpos',
+                        type=auto_int,
+                        help='set ending file position to process')
+
+    parser.add_argument('--net',
+                        action='store_true',
+                        help='use network i/o (O_DIRECT), tagfuse')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    print(parseargs())
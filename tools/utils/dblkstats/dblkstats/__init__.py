@@ -0,0 +1,10 @@
+"""
+dblkstats: gps stats for dblk files, off their record index
+@author:   Eric B. Decker
+"""
+
+# 0.0.1         Initial version, --gps_mon (was tagcore/gps_timeline.py)
+#               --ttff (was tagcore/gps_ttff.py)
+#               --drift (was tagcore/rt_drift.py)
+
+__version__ = '0.0.1.dev3'
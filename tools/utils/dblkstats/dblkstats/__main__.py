@@ -0,0 +1,13 @@
+"""
+dblkstats: gps stats for dblk files, off their record index
+@author:   Eric B. Decker
+"""
+
+from dblkstats     import stats
+from dblkstatsargs import parseargs
+
+def main():
+    stats(parseargs())
+
+if __name__ == '__main__':
+    main()
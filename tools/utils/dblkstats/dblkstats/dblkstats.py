@@ -0,0 +1,163 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''dblkstats: gps stats for dblk files, off their record index
+
+Nothing is decoded, each file's record index (built by tagdump --cache,
+see tagcore/rec_cache.py) says where the records we want are.
+
+  --drift       rtc drift model per reboot, fit off the GPS_RAW geoData
+                fixes and kept with the index (tagcore/rt_drift.py).
+                --refit ignores the cached model.
+
+  --gps_mon     time in each gps monitor minor state, per file and for
+                all of them (tagcore/gps_timeline.py)
+
+  --ttff        time to first fix per gps cycle, stats per file (tag)
+                and for the fleet (tagcore/gps_ttff.py).  --sats also
+                reads the GPS_RAW records, that's the only part that
+                costs much.
+
+-o BASE writes the tables, --utc corrects times with the file's rtc
+drift model (--drift).
+'''
+
+from   __future__               import print_function
+
+import os
+import numpy as np
+
+from   tagcore.misc_utils       import write_columns
+from   tagcore.rec_cache        import RecCache
+from   tagcore.gps_mon          import gps_mon_minor_name
+from   tagcore.gps_timeline     import timeline_from_index, MINOR, minor_states
+from   tagcore.gps_ttff         import ttff_from_index, ttff_hist, stats_str
+from   tagcore.gps_ttff         import FIX_EVENTS, HIST_WIDTH, event_ids
+from   tagcore.rt_drift         import load_model
+
+from   __init__                 import __version__   as VERSION
+
+ver_str = '\ndblkstats: ' + VERSION
+
+
+def out_name(output, what):
+    '''BASE_<what>.ext, csv if BASE has no extension'''
+    base, dot, ext = output.rpartition('.')
+    if not dot:
+        base, ext = output, 'csv'
+    return '{}_{}.{}'.format(base, what, ext)
+
+
+def gps_mon_totals(label, table):
+    t = table[table['kind'] == MINOR]
+    parts = []
+    for s in minor_states:
+        secs = t['duration'][t['state'] == s].sum()
+        if secs:
+            parts.append('{}: {:.0f}s'.format(gps_mon_minor_name(s), secs))
+    print('{}: {}'.format(label,
+                          '  '.join(parts) if parts else 'no gps/mon events'))
+
+
+def drift(args, caches):
+    print('\n*** rtc drift')
+    for name, cache in caches:
+        model = load_model(name, cache, args.refit)
+        print('{}: {}'.format(name, model))
+        for start, d in zip(model.starts, model.drifts):
+            print('    @{:<8d} {}'.format(start, d if d else 'no fixes'))
+
+
+def gps_mon(args, caches):
+    print('\n*** gps monitor, time in state')
+    tables = []
+    for n, (name, cache) in enumerate(caches):
+        tl = timeline_from_index(name, cache)
+        if args.utc:
+            tl.clock = load_model(name, cache)
+        table = tl.build()
+        gps_mon_totals(name, table)
+        if args.output and len(table):
+            write_columns(out_name(args.output, 'gps_mon_{}'.format(n)), table)
+        tables.append(table)
+    if len(tables) > 1:
+        gps_mon_totals('all', np.concatenate(tables))
+
+
+def ttff(args, caches):
+    fix_events = FIX_EVENTS
+    if args.fix:
+        try:
+            fix_events = tuple([ event_ids[e.upper()] for e in args.fix ])
+        except KeyError as e:
+            print('*** unknown event: {}'.format(e.args[0]))
+            return
+
+    print('\n*** time to first fix')
+    tables = []
+    for name, cache in caches:
+        tt = ttff_from_index(name, args.sats, fix_events, cache)
+        if args.utc:
+            tt.clock = load_model(name, cache)
+        table = tt.build()
+        label = os.path.basename(name)
+        if label in [ l for l, t in tables ]:
+            label = '{}_{}'.format(label, len(tables))
+        print('{}: {}'.format(label, stats_str(table)))
+        tables.append((label, table))
+    if len(tables) > 1:
+        print('all: {}'.format(
+            stats_str(np.concatenate([ t for l, t in tables ]))))
+
+    if args.output:
+        cycles = np.concatenate([ t for l, t in tables ])
+        tag    = np.concatenate([ np.full(len(t), i, dtype = np.uint16)
+                                  for i, (l, t) in enumerate(tables) ])
+        out = np.zeros(len(cycles), dtype = [ ('tag', np.uint16) ] +
+                       cycles.dtype.descr)
+        out['tag'] = tag
+        for n in cycles.dtype.names:
+            out[n] = cycles[n]
+        write_columns(out_name(args.output, 'ttff'), out)
+        write_columns(out_name(args.output, 'ttff_hist'),
+                      ttff_hist(tables, args.width or HIST_WIDTH))
+        for i, (l, t) in enumerate(tables):
+            print('tag {}: {}'.format(i, l))
+
+
+def stats(args):
+    print(ver_str)
+    caches = []
+    for name in args.input:
+        cache = RecCache(name)
+        if not len(cache):
+            print('*** {}: no record index, run tagdump --cache over it '
+                  'first'.format(name))
+            continue
+        caches.append((name, cache))
+    if not caches:
+        return
+
+    if args.drift:
+        drift(args, caches)
+    if args.gps_mon:
+        gps_mon(args, caches)
+
+    if args.ttff:
+        ttff(args, caches)
@@ -0,0 +1,82 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#
+
+from   __future__ import print_function
+from   __init__   import __version__ as VERSION
+import argparse
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='gps stats for dblk files, off their record index (tagdump --cache).')
+
+    parser.add_argument('input',
+                        nargs='+',
+                        help='dblk files')
+
+    parser.add_argument('-V', '--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION)
+
+    parser.add_argument('--drift',
+                        action='store_true',
+                        help='rtc drift per reboot (the --utc model)')
+
+    parser.add_argument('--refit',
+                        action='store_true',
+                        help='--drift: ignore (and replace) the cached model')
+
+    parser.add_argument('--gps_mon',
+                        action='store_true',
+                        help='time in each gps monitor state')
+
+    parser.add_argument('--ttff',
+                        action='store_true',
+                        help='time to first fix per gps cycle')
+
+    parser.add_argument('-o', '--output',
+                        metavar='BASE',
+                        help='write tables, BASE_gps_mon_<n>, BASE_ttff (every cycle,'
+                        ' tag column), BASE_ttff_hist (.npz or csv)')
+
+    parser.add_argument('--sats',
+                        action='store_true',
+                        help='--ttff: navTrack satellite counts (reads the GPS_RAW records)')
+
+    parser.add_argument('--fix',
+                        action='append',
+                        metavar='EVENT',
+                        help='--ttff: event(s) that count as the fix (default GPS_FIRST_LOCK)')
+
+    parser.add_argument('--width',
+                        type=int,
+                        metavar='SECS',
+                        help='--ttff: histogram bin width')
+
+    parser.add_argument('--utc',
+                        action='store_true',
+                        help='correct times for rtc drift (rt_drift model)')
+
+    args = parser.parse_args()
+    if not (args.drift or args.gps_mon or args.ttff):
+        parser.error('nothing to do, need --drift, --gps_mon and/or --ttff')
+    return args
+
+if __name__ == '__main__':
+    print(parseargs())
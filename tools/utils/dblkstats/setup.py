@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+DESCRIPTION = 'gps stats for dblk files, off their record index'
+
+import os, re
+def get_version():
+    VERSIONFILE = os.path.join('dblkstats', '__init__.py')
+    initfile_lines = open(VERSIONFILE, 'rt').readlines()
+    VSRE = r"^__version__ = ['\"]([^'\"]*)['\"]"
+    for line in initfile_lines:
+        mo = re.search(VSRE, line, re.M)
+        if mo:
+            return mo.group(1)
+    raise RuntimeError('Unable to find version string in %s.' % (VERSIONFILE,))
+
+try:
+    from setuptools import setup
+except ImportError:
+    from distutils.core import setup
+
+setup(
+    name             = 'dblkstats',
+    version          = get_version(),
+    url              = 'https://github.com/MamMark/mm/tools/utils/dblkstats',
+    author           = 'Eric B. Decker',
+    author_email     = 'cire831@gmail.com',
+#    license_file     = 'LICENCE.txt',
+    license          = 'GPL3',
+    packages         = ['dblkstats'],
+    install_requires = [ 'tagcore', 'numpy' ],
+    entry_points     = {
+        'console_scripts': ['dblkstats=dblkstats.__main__:main'],
+    }
+)
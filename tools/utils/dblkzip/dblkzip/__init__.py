@@ -0,0 +1,8 @@
+"""
+dblkzip:   compressed, seekable dblk archives
+@author:   Eric B. Decker
+"""
+
+# 0.0.1         Initial version (was tagcore/dblk_archive.py __main__)
+
+__version__ = '0.0.1.dev1'
@@ -0,0 +1,13 @@
+"""
+dblkzip:   compressed, seekable dblk archives
+@author:   Eric B. Decker
+"""
+
+from dblkzip     import dblkzip
+from dblkzipargs import parseargs
+
+def main():
+    dblkzip(parseargs())
+
+if __name__ == '__main__':
+    main()
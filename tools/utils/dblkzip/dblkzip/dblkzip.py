@@ -0,0 +1,77 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''dblkzip: compressed, seekable dblk archives
+
+    dblkzip [-c zlib|bz2|lzma] [-l LEVEL] dblk archive
+    dblkzip -x archive dblk
+    dblkzip -t archive
+
+The archive is chunked at SYNC records with a seek table (see
+tagcore/dblk_archive.py), tagdump and the other tools read it as the
+original stream.  Holes in a sparse stream stay holes, both ways.
+'''
+
+from   __future__               import print_function
+
+from   tagcore.dblk_archive     import DblkArchive, write_archive
+from   tagcore.dblk_archive     import ARC_CODECS, ARC_CHUNK
+
+from   __init__                 import __version__   as VERSION
+
+ver_str = '\ndblkzip: ' + VERSION
+
+
+def table(args):
+    arc = DblkArchive(args.input)
+    print('*** {}: {} bytes, {} chunks, codec {}'.format(
+        arc.name, arc.size, len(arc), arc.codec))
+    for start, length, off, zlen, crc in arc.table:
+        print('  @{:<10d} {:8d} {}'.format(start, length,
+            '-> {:8d} @{}'.format(zlen, off) if zlen else 'hole'))
+
+
+def extract(args):
+    with DblkArchive(args.input) as arc, open(args.output, 'wb') as out:
+        for s, e in arc.data_ranges():
+            arc.seek(s)
+            out.seek(s)
+            while arc.tell() < e:
+                out.write(arc.read(min(ARC_CHUNK, e - arc.tell())))
+        out.truncate(arc.size)
+
+
+def compress(args):
+    size, arc_size, n = write_archive(args.input, args.output,
+                                      ARC_CODECS[args.codec], args.level,
+                                      args.chunk, args.verbose)
+    print('*** {}: {} -> {} bytes ({:.1f}%), {} chunks'.format(
+        args.output, size, arc_size, 100.0 * arc_size / size if size else 0,
+        n))
+
+
+def dblkzip(args):
+    if args.verbose:
+        print(ver_str)
+    if args.table:
+        table(args)
+    elif args.extract:
+        extract(args)
+    else:
+        compress(args)
@@ -0,0 +1,76 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#
+
+from   __future__ import print_function
+from   __init__   import __version__ as VERSION
+import argparse
+
+from   tagcore.dblk_archive import ARC_CODECS, ARC_CHUNK
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='Compressed, seekable dblk archives (tagdump reads them as is).')
+
+    parser.add_argument('input',
+                        help='dblk stream (archive with -x/-t)')
+
+    parser.add_argument('output',
+                        nargs='?',
+                        help='archive (dblk stream with -x)')
+
+    parser.add_argument('-V', '--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION)
+
+    parser.add_argument('-c', '--codec',
+                        default='zlib',
+                        choices=sorted(ARC_CODECS),
+                        help='compression (default zlib)')
+
+    parser.add_argument('-l', '--level',
+                        type=int,
+                        default=6,
+                        help='compression level (default 6)')
+
+    parser.add_argument('--chunk',
+                        type=int,
+                        default=ARC_CHUNK,
+                        help='stream bytes per chunk (about)')
+
+    parser.add_argument('-x', '--extract',
+                        action='store_true',
+                        help='archive -> dblk stream')
+
+    parser.add_argument('-t', '--table',
+                        action='store_true',
+                        help='list the seek table')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    args = parser.parse_args()
+    if not args.table and not args.output:
+        parser.error('need an output file')
+    return args
+
+if __name__ == '__main__':
+    print(parseargs())
@@ -25,49 +25,141 @@
 #  the image where image_info lives in the image.  It directly follows the
 #  exception vectors which are 0x140 bytes long.
 #
-
-IMAGE_INFO_SIG = 0x33275401
-IMAGE_META_OFFSET = 0x140
-IMAGE_INFO_DEFAULT = [IMAGE_INFO_SIG, 0x20000, (0x140*2)+0x1c,
-                      0, 0, 257, 2, 3, ' '  * 40, ' '  * 40,
-                      ' '  * 30, 0xde, 2]
+#  usage: img_info [-n] [--image] [-v] input ...
+#
+#  each input can be:
+#
+#    o a binary image (main.bin)
+#    o a directory, every *.bin under it
+#    o the IMAGE area (tagfuse img/, or pulled off the SD), the ImageManager
+#      directory and every slot in it
+#    o with --image, a raw SD image, its IMAGE area via the fs locator
 #
-# Struct created for accessing image info (little indian)
-# sig, image_start, imagelength, vector_chk, image_chk, im_build, im_minor,
-# im_major, main_tree, aux_tree, build_time, im_rev, im_model = image_info
+#  every image gets ii_sig, im_len, im_start and im_chk (the byte sum,
+#  computed the way OverWatch does) checked.  -n skips the sum.  Inputs
+#  are mmap'd, nothing gets read in whole.
 #
-IM_FIELDS = '<LLLLLHBB44s44s30sBB'
-image_info_struct = pystruct.Struct(IM_FIELDS)
-IMAGE_MIN_SIZE  =  (IMAGE_META_OFFSET + image_info_struct.size)
+
+from   __future__         import print_function
+
+import os
+import sys
+import mmap
+import argparse
+
+from   tagcore.image_area import *
+from   tagcore.sd_image   import SdImage, AreaView, FS_LOC_IMAGE
+from   tagcore.core_headers import IMAGE_INFO_SIG
 
 FILENAME    = 'main.bin'
 
-def _file_size(fd):
-    fd.seek(0, 2) # seek to the end
-    _size = fd.tell()
-    if _size < IMAGE_MIN_SIZE: raise RadioLoadException("input file too short")
-    fd.seek(0, 0)    # seek to the beginnnig
-    return _size
+
+def open_view(filename):
+    '''mmap filename, AreaView of the whole thing'''
+    fd   = open(filename, 'rb')
+    size = os.fstat(fd.fileno()).st_size
+    if size == 0:
+        return AreaView('', 0, 0, filename)
+    mm = mmap.mmap(fd.fileno(), 0, access = mmap.ACCESS_READ)
+    return AreaView(mm, 0, size, filename)
+
 
 def get_image_info(filename):
-    print(filename)
-    infile = open(filename, 'rb')
-    file_size = _file_size(infile)
-
-    # get image info from input file and sanity check
-    infile.seek(IMAGE_META_OFFSET) # seek to location of image info
-    image_info = image_info_struct.unpack(infile.read(image_info_struct.size))
-    print("file information")
-    sig, image_start, imagelength, vector_chk, image_chk, im_build, im_minor, im_major,\
-            main_tree, aux_tree, build_time, im_rev, im_model = image_info
-    pstr = "  signature: 0x{:x}, start: 0x{:x}, length: 0x{:x}, vect_chk: 0x{:x}, image_chk: 0x{:x}"
-    print(pstr.format(sig, image_start, imagelength, vector_chk, image_chk))
-    pstr = "  version: ({}.{}.{}(0x{:x})), rev: {}, model: {}"
-    print(pstr.format(im_major, im_minor, im_build, im_build, im_rev, im_model))
-    if sig != IMAGE_INFO_SIG:
-        raise RadioLoadException("image info is corrupted")
-    if imagelength != file_size:
-        raise RadioLoadException("file size doesn't match image info, file: {}, info: {}".format(
-            file_size, imageLength))
-    infile.seek(0)    # seek back to the beginnnig
-    return (infile, (im_major, im_minor, im_build), imagelength)
+    '''check filename, returns (ImageInfo, (major, minor, build), im_len)'''
+    view = open_view(filename)
+    ii   = ImageInfo()
+    if not ii.check(view, limit = view.size):
+        raise ValueError('{}: {}'.format(filename, ', '.join(ii.errors)))
+    if ii.obj['im_len'].val != view.size:
+        raise ValueError("{}: file size doesn't match image info, file: {}, info: {}".format(
+            filename, view.size, ii.obj['im_len'].val))
+    return ii, ii.version(), ii.obj['im_len'].val
+
+
+def print_info(label, ii, verbose):
+    print('{:24s} {}'.format(label, ii))
+    if verbose and ii.obj['ii_sig'].val == IMAGE_INFO_SIG:
+        for field in ('image_desc', 'repo0', 'repo1', 'stamp_date'):
+            print('    {:10s}  {}'.format(field, ii.desc(field)))
+
+
+def check_area(name, view, args):
+    '''IMAGE area, directory plus slots.  returns (images, bad)'''
+    idir = ImageDir()
+    idir.read(view)
+    print('{}: dir {}'.format(name, idir))
+    nimg = nbad = 0
+    for i, (ver, start_sec, state) in enumerate(idir.slots):
+        label = '  slot {} {:>8s}'.format(i, slot_state_name(state))
+        if not state:
+            print(label)
+            continue
+        ii = ImageInfo(idir.slot_offset(i))
+        ii.check(view, limit = IMAGE_SIZE, verify = not args.nochk)
+        if ii.valid and ii.version() != ver:
+            ii.errors.append('dir says {}.{}.{}'.format(*ver))
+            ii.valid = False
+        print_info(label, ii, args.verbose)
+        nimg += 1
+        nbad += 0 if ii.valid else 1
+    return nimg, nbad
+
+
+def check_file(name, view, args):
+    ii = ImageInfo()
+    ii.check(view, limit = view.size, verify = not args.nochk)
+    print_info(name, ii, args.verbose)
+    return 1, 0 if ii.valid else 1
+
+
+def inputs(args):
+    '''generate (name, view, is_area) for everything we were handed'''
+    for name in args.input:
+        if args.image:
+            sd = SdImage(name)
+            if not sd.valid:
+                print('*** {}: fs locator: {}'.format(name, ', '.join(sd.errors)))
+                continue
+            yield name, sd.area(FS_LOC_IMAGE), True
+        elif os.path.isdir(name):
+            for path, dirs, files in os.walk(name):
+                dirs.sort()
+                for f in sorted(files):
+                    if f.endswith('.bin'):
+                        fname = os.path.join(path, f)
+                        yield fname, open_view(fname), False
+        else:
+            view = open_view(name)
+            yield name, view, ImageDir().read(view)
+
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='Check image_info (and im_chk) of tag images.')
+    parser.add_argument('input', nargs='*', default=[FILENAME],
+                        help='image, directory of images, or IMAGE area (default main.bin)')
+    parser.add_argument('--image', action='store_true',
+                        help='inputs are raw SD images')
+    parser.add_argument('-n', '--nochk', action='store_true',
+                        help="don't compute image checksums")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='show descriptors')
+    return parser.parse_args()
+
+
+def main():
+    args = parseargs()
+    nimg = nbad = 0
+    for name, view, is_area in inputs(args):
+        if is_area:
+            n, b = check_area(name, view, args)
+        else:
+            n, b = check_file(name, view, args)
+        nimg += n
+        nbad += b
+    print('*** {} images, {} bad'.format(nimg, nbad))
+    sys.exit(1 if nbad else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,52 +1,45 @@
+# panic2debug: turn the panic blocks in a PANIC file into CrashDebug dumps
+#
+# usage: panic2debug [PANIC file [output dir]]
+#
+# Walks the panic directory and writes Panic_Block_N.dbg for every panic
+# block that has been written.  Each block's RAM and IO regions are
+# streamed straight from the panic file (see tagcore/panic_area.py), the
+# panic file is never read in whole.
+
+from   __future__         import print_function
+
 import os
-import codecs
 import sys
-import binascii
 
-PanicFile = "PANIC001"
+from   tagcore.panic_area import *
+
+PanicFile     = "PANIC001"
 DebugFileBase = ""
-DebugFile = DebugFileBase + 'Panic_Block_0.dbg'
-dirPart_start = 0
-dirPart_end = 511
-regPart_start = 804
-ramPart_start = 1024
-regPart_end = ramPart_start - regPart_start
-ramPart_end = ramPart_start + (64 * 1024)
-IoPart_start = 66560
-IoPart_end = IoPart_start + 1024
-dump_end = 67200
+DebugFile     = 'Panic_Block_{}.dbg'
+
+if len(sys.argv) > 1:
+    PanicFile = sys.argv[1]
+if len(sys.argv) > 2:
+    DebugFileBase = sys.argv[2]
 
 if not os.path.exists(PanicFile):
     print("Panic File Does Not Exist")
     sys.exit(0)
 
-# if not os.path.exists(DebugFileBase):
-#     os.makedirs(DebugFileBase)
-#
-#     if not os.path.exists(DebugFileBase):
-#         print("Cannot Create Debug File Base Directory")
-#         sys.exit(0)
-
-with open(PanicFile,'rb') as PanicFile:
-    raw = PanicFile.read()
-
-cc_sigPart = raw[:804]
-dir_sigPart = raw[:4]
-cc_sigPartHex = binascii.hexlify(cc_sigPart)
-dir_sigPartHex = binascii.hexlify(dir_sigPart)
-ramStartHex = binascii.hexlify(raw[ramPart_start:ramPart_start + 8])
-ramEndHex = binascii.hexlify
-#print(dir_sigPartHex)
-#print(cc_sigPartHex)
-#print(ramStartHex)
-
-regPart = raw[regPart_start:dump_end]
-ramPart = raw[ramPart_start:ramPart_end]
-IoPart = raw[IoPart_start:IoPart_end]
-outFile = open(DebugFile,'wb')
-regPartHex = binascii.hexlify(regPart)
-IoPartHex = binascii.hexlify(IoPart)
-#print(regPartHex)
-outFile.write(regPart)
-outFile.close
+if DebugFileBase and not os.path.exists(DebugFileBase):
+    os.makedirs(DebugFileBase)
+
+with open(PanicFile, 'rb') as fd:
+    pdir = PanicDir()
+    if not pdir.read(fd):
+        print("Bad Panic Dir: {}".format(pdir))
+        sys.exit(1)
+    for blk, home in panic_blocks(fd, pdir):
+        if not blk.valid:
+            print("Panic Block {}: {}".format(blk.idx, ', '.join(blk.errors)))
+        fname = os.path.join(DebugFileBase, DebugFile.format(blk.idx))
+        nbytes = write_crash_dump(fd, blk, home, fname)
+        print("{}: {} bytes".format(fname, nbytes))
+
 print("Success")
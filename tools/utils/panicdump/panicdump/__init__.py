@@ -0,0 +1,9 @@
+"""
+panicdump:  decode panic blocks, extract CrashCatcher dumps
+@author:   Eric B. Decker
+"""
+
+# 0.0.1         Initial version, panic dir walk, sig checks, parallel extraction
+#               crash table, join with panic REBOOTs (--dblk)
+
+__version__ = '0.0.1.dev1'
@@ -0,0 +1,13 @@
+"""
+panicdump:  decode panic blocks, extract CrashCatcher dumps
+@author:   Eric B. Decker
+"""
+
+from panicdump     import dump
+from panicdumpargs import parseargs
+
+def main():
+    dump(parseargs())
+
+if __name__ == '__main__':
+    main()
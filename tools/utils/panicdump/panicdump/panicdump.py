@@ -0,0 +1,214 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''panicdump: decode panic blocks, extract CrashCatcher dumps
+
+Walks the panic directory and decodes every panic block that has been
+written, checking the panic_info, image_info, add_info, crash_info, and
+CrashCatcher signatures.  One line per block.
+
+With --dblk DBLK, the REBOOT records in the dblk stream are matched up
+with the panic blocks (owcb pi_panic_idx) and a crash table is printed,
+flagging any that don't agree and panics that are missing one side.
+
+With --extract DIR, each block is written out as DIR/panic_NNN.dbg, the
+form CrashDebug wants (what panic2debug did for block 0).  --jobs N
+spreads the extraction over N processes.  Each worker opens the input
+on its own.
+
+Verbosity:
+
+  0   panic dir and one line per block (default)
+  1   crash registers and IO regions
+'''
+
+from   __future__               import print_function
+
+import os
+import sys
+from   multiprocessing          import Pool
+
+from   tagcore                  import *
+from   tagcore.panic_area       import *
+from   tagcore.panic_join       import *
+from   tagcore.sd_image         import SdImage, FS_LOC_PANIC, FS_LOC_DBLK
+from   tagcore.dblk_dir         import DblkDir
+
+from   __init__                 import __version__   as VERSION
+
+ver_str = '\npanicdump: ' + VERSION
+
+DUMP_NAME = 'panic_{:03d}.dbg'
+
+
+def open_area(name, image, area = FS_LOC_PANIC):
+    '''file like object for the panic (or other) area of name'''
+    if image:
+        sd = SdImage(name)
+        if not sd.valid:
+            print('*** {}: fs locator: {}'.format(name, ', '.join(sd.errors)))
+        return sd.area(area)
+    return open(name, 'rb')
+
+
+def extract(job):
+    '''worker, job is (input name, image, block idx, output file)
+
+    returns (idx, bytes written or None, error string)
+    '''
+    name, image, idx, fname = job
+    try:
+        fd   = open_area(name, image)
+        pdir = PanicDir()
+        pdir.read(fd)
+        blk  = PanicBlock(idx, pdir.block_offset(idx),
+                          pdir.block_size * SECTOR_SIZE)
+        fd.seek(blk.offset)
+        home = fd.read(SECTOR_SIZE)
+        blk.set(home)
+        return idx, write_crash_dump(fd, blk, home, fname), ''
+    except (IOError, OSError) as e:
+        return idx, None, str(e)
+
+
+def print_regs(blk):
+    ci = blk.ci
+    regs = [ 'r{}: {:08x}'.format(i, ci['bxReg_{}'.format(i)].val)
+             for i in range(13) ]
+    for i in range(0, 13, 4):
+        print('      {}'.format('  '.join(regs[i:i + 4])))
+    print('      sp: {:08x}  lr: {:08x}  pc: {:08x}  psr: {:08x}'.format(
+        ci['bxSP'].val, ci['bxLR'].val, ci['bxPC'].val, ci['bxPSR'].val))
+    print('      msp: {:08x}  psp: {:08x}  primask: {}  basepri: {}  '
+          'faultmask: {}  control: {}'.format(
+              ci['MSP'].val, ci['PSP'].val, ci['primask'].val,
+              ci['basepri'].val, ci['faultmask'].val, ci['control'].val))
+
+
+def rt_str(rt):
+    return '{:04d}/{:02d}/{:02d}-{:02d}:{:02d}:{:02d}'.format(
+        rt['year'].val, rt['mon'].val, rt['day'].val,
+        rt['hr'].val, rt['min'].val, rt['sec'].val)
+
+
+crash_title = 'blk   b/p    panic time                        ' \
+              'pcode/where  reboot     recnum    r/p    reboot time'
+
+def print_crash_table(rows):
+    print()
+    print(crash_title)
+    nbad = 0
+    for row in rows:
+        if row.blk:
+            pi = row.blk.pi
+            p = '{:3d} {:3d}/{:<3d}  {}  {:>20s}/{:<3d}'.format(
+                row.blk.idx, pi['boot_count'].val, pi['panic_count'].val,
+                rt_str(pi['rt']), pcode_name(pi['pcode'].val), pi['where'].val)
+        else:
+            rb = row.reboot
+            p = '{:3d}     -/-    {:19s}  {:>20s}/{:<3d}'.format(
+                rb.pi_idx, 'no panic block', pcode_name(rb.pi_pcode), rb.pi_where)
+        if row.reboot:
+            rb = row.reboot
+            r = '  @{:<8d} {:7d}  {:3d}/{:<3d}  {}'.format(
+                rb.offset, rb.recnum, rb.reboot_count, rb.panic_count,
+                rt_str(rb.rt))
+        else:
+            r = '  no reboot'
+        note = ''
+        if row.problems:
+            note = '  <{}>'.format(', '.join(row.problems))
+        if row.problems or not row.blk or not row.reboot:
+            nbad += 1
+        print(p + r + note)
+    print('*** {} crashes, {} need a look'.format(len(rows), nbad))
+
+
+def crash_table(args, pdir, fd):
+    '''join the panic blocks with the panic REBOOTs in the dblk stream'''
+    if args.dblk:
+        dname, dimage = args.dblk, False
+    elif args.image:
+        dname, dimage = args.input.name, True
+    else:
+        print('*** --dblk needs a DBLK file (or --image)')
+        sys.exit(1)
+    dfd  = open_area(dname, dimage, FS_LOC_DBLK)
+    end  = None
+    ddir = DblkDir()
+    if ddir.read(dfd):
+        end = ddir.find_nxt(dfd)
+    reboots = reboot_index(dfd, 0, end)
+    print_crash_table(join(reboots, panic_index(fd, pdir)))
+
+
+def dump(args):
+    verbose = args.verbose if args.verbose else 0
+    print(ver_str)
+
+    name = args.input.name
+    fd   = open_area(name, args.image)
+    pdir = PanicDir()
+    pdir.read(fd)
+    print('*** panic dir: {}'.format(pdir))
+    if not pdir.valid:
+        if pdir.empty:
+            print('*** no panic dir, nothing to do')
+        sys.exit(1)
+
+    want = set(args.blocks) if args.blocks else None
+    jobs = []
+    nbad = 0
+    for blk, home in panic_blocks(fd, pdir):
+        if want is not None and blk.idx not in want:
+            continue
+        print(blk.summary())
+        if not blk.valid:
+            nbad += 1
+        if verbose >= 1:
+            print_regs(blk)
+            for off, start, end in blk.io_regions(fd):
+                print('      io: 0x{:08x} - 0x{:08x}  @0x{:x}'.format(
+                    start, end, off))
+        if args.extract:
+            jobs.append((name, args.image, blk.idx,
+                         os.path.join(args.extract, DUMP_NAME.format(blk.idx))))
+    print('*** {} blocks, {} bad'.format(pdir.written(), nbad))
+
+    if args.dblk is not None:
+        crash_table(args, pdir, fd)
+
+    if not jobs:
+        return
+    if not os.path.isdir(args.extract):
+        os.makedirs(args.extract)
+    if args.jobs > 1 and len(jobs) > 1:
+        pool = Pool(min(args.jobs, len(jobs)))
+        results = pool.map(extract, jobs)
+        pool.close()
+        pool.join()
+    else:
+        results = map(extract, jobs)
+    for idx, nbytes, err in results:
+        if nbytes is None:
+            print('*** block {}: extract failed: {}'.format(idx, err))
+        elif verbose >= 1:
+            print('*** block {}: {} bytes'.format(idx, nbytes))
+    print('*** extracted {} dumps to {}'.format(
+        len([ r for r in results if r[1] is not None ]), args.extract))
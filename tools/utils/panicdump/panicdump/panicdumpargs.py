@@ -0,0 +1,71 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#
+
+from   __future__ import print_function
+from   __init__   import __version__ as VERSION
+import argparse
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='Decode panic blocks and extract CrashCatcher dumps.')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='panic area (PANIC001) or, with --image, a raw SD image')
+
+    parser.add_argument('-V', '--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION)
+
+    parser.add_argument('--image',
+                        action='store_true',
+                        help='input is a raw SD image, find the panic area via the fs locator')
+
+    parser.add_argument('-b', '--blocks',
+                        type=int,
+                        nargs='+',
+                        metavar='N',
+                        help='only look at these panic blocks')
+
+    parser.add_argument('-d', '--dblk',
+                        nargs='?',
+                        const='',
+                        metavar='DBLK',
+                        help='join with the panic REBOOTs in DBLK (with --image, default the image\'s DBLK area)')
+
+    parser.add_argument('-x', '--extract',
+                        metavar='DIR',
+                        help='write a CrashCatcher dump per block into DIR')
+
+    parser.add_argument('-J', '--jobs',
+                        type=int,
+                        default=1,
+                        metavar='N',
+                        help='extract with N worker processes')
+
+    parser.add_argument('-v', '--verbose',
+                        action='count',
+                        default=0,
+                        help='increase output verbosity')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    print(parseargs())
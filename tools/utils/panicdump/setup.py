@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+DESCRIPTION = 'Utility to decode and extract panic blocks'
+
+import os, re
+def get_version():
+    VERSIONFILE = os.path.join('panicdump', '__init__.py')
+    initfile_lines = open(VERSIONFILE, 'rt').readlines()
+    VSRE = r"^__version__ = ['\"]([^'\"]*)['\"]"
+    for line in initfile_lines:
+        mo = re.search(VSRE, line, re.M)
+        if mo:
+            return mo.group(1)
+    raise RuntimeError('Unable to find version string in %s.' % (VERSIONFILE,))
+
+try:
+    from setuptools import setup
+except ImportError:
+    from distutils.core import setup
+
+setup(
+    name             = 'panicdump',
+    version          = get_version(),
+    url              = 'https://github.com/MamMark/mm/tools/utils/panicdump',
+    author           = 'Eric B. Decker',
+    author_email     = 'cire831@gmail.com',
+#    license_file     = 'LICENCE.txt',
+    license          = 'GPL3',
+    packages         = ['panicdump'],
+    install_requires = [ 'tagcore' ],
+    entry_points     = {
+        'console_scripts': ['panicdump=panicdump.__main__:main'],
+    }
+)
@@ -5,5 +5,8 @@ sirfdump:  decode and display sirfbin messages
 
 # 0.0.1         Initial version
 # 0.0.2         switch over to tagcore
+# 0.0.2.dev1    --index, --mids/--sids via the packet index sidecar
+# 0.0.2.dev2    --jobs: mmap'd capture, pieces decoded by a process pool
+# 0.0.2.dev3    --live, --baud, --capture: decode a serial port/pty as it talks
 
-__version__ = '0.0.2.dev0'
+__version__ = '0.0.2.dev3'
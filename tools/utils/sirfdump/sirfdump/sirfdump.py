@@ -27,18 +27,33 @@ Vebosity;
   3   dump packet buffer
   4   details of rehunt (look for new SOP)
   5   other errors and decoder/header versions
+
+With --jobs N the capture is mmap'd, cut into pieces at good packets
+(SOP, len, EOP and checksum all check out) and the pieces are decoded by
+N worker processes.  Each worker collects its piece's output and counts,
+the pieces are printed and their counts added up in file order, so the
+output is what a single pass would have given.
+
+With --live the input is a serial port (or pty, fifo) and packets are
+decoded as they come in.  --capture FILE keeps a raw copy.
 '''
 
 from   __future__               import print_function
 
+import os
 import sys
+import mmap
 import struct
+from   StringIO                 import StringIO
+from   multiprocessing          import Pool, cpu_count
 
 from   tagcore                  import *
 from   tagcore.sirf_defs        import *
 import tagcore.sirf_defs        as     sirf
 from   tagcore.sirf_headers     import mids_w_sids
 import tagcore.tagfile          as     tf
+from   tagcore.sirf_index       import load_index, split_points
+from   tagcore.sirf_live        import SirfFramer, open_live, read_live
 
 from   sirfdumpargs             import parseargs
 
@@ -86,6 +101,33 @@ ver_str = '\nsirfdump: ' + VERSION
 #   -w              wide summary
 #                   (args.wide)
 #
+#   --index         index the capture (one pass, SOP/len/EOP/checksum
+#                   checked) into <input>.sidx, or use the index already
+#                   there, and pull packets through it.
+#                   (args.index, boolean)
+#
+#   --mids LIST     only packets with a mid in LIST (41,225)
+#   --sids LIST     only packets with a sid in LIST (mids that have sids)
+#                   either implies --index, matching packets are read
+#                   directly, nothing else is looked at.
+#                   (args.mids, args.sids, sets of ints)
+#
+#   -J N, --jobs N  decode with N worker processes (0, one per cpu).
+#                   the capture is mmap'd and split on packet
+#                   boundaries.  Not with -n or the index options.
+#                   (args.jobs, integer)
+#
+#   --live          input is a serial port, pty, or fifo.  read it
+#                   non-blocking and decode packets as they arrive.
+#                   offsets count bytes since the start.
+#                   (args.live, boolean)
+#
+#   --baud BAUD     line speed when input is a tty (9600)
+#                   (args.baud, integer)
+#
+#   --capture FILE  --live, also append the raw bytes to FILE
+#                   (args.capture)
+#
 # positional parameters:
 #
 #   input:          file to process.  (args.input)
@@ -98,6 +140,8 @@ verbose                 = 0             # how chatty to be
 debug                   = 0             # extra debug chatty
 
 MAX_ZERO_HDRS           = 4096          # 4K bytes of zero
+PAR_CHUNK               = 8*1024*1024   # --jobs, max bytes per piece
+SOP_BYTES               = struct.pack('>H', SIRF_SOP_SEQ)
 
 # global stat counters
 num_hunt                = 0             # how often hunting for packet start
@@ -282,6 +326,147 @@ def get_record(fd):
     return -1, 0, 0, ''
 
 
+def indexed_records(fd, args):
+    '''generate (offset, len, mid, rec_buf) from the packet index
+
+    the index only has packets that checked out, so no hunting or
+    checksumming here, seek and read.
+    '''
+    global num_hunt, chksum_errors
+
+    idx = load_index(fd, fd.name, verbose = verbose or debug)
+    num_hunt      = idx.hunts           # whole capture, from the index scan
+    chksum_errors = idx.chksum_errors
+    if debug:
+        print('*** index: {} packets, mids: {}'.format(len(idx), idx.mid_counts()))
+    for offset, plen, mid, sid in idx.select(args.mids, args.sids,
+                                             start = args.jump or 0,
+                                             end   = args.endpos):
+        fd.seek(offset)
+        yield offset, plen, mid, bytearray(fd.read(plen))
+
+
+def stream_records(fd):
+    while True:
+        rec = get_record(fd)
+        if rec[0] < 0:
+            return
+        yield rec
+
+
+def live_records(args, framer):
+    '''generate (offset, len, mid, rec_buf) off a live device'''
+    global num_hunt, chksum_errors
+
+    fd  = open_live(args.input.name, args.baud)
+    cap = open(args.capture, 'ab') if args.capture else None
+    try:
+        for rec in read_live(fd, framer, cap):
+            num_hunt      = framer.hunts
+            chksum_errors = framer.chksum_errors
+            yield rec
+            sys.stdout.flush()
+    finally:
+        num_hunt      = framer.hunts
+        chksum_errors = framer.chksum_errors
+        os.close(fd)
+        if cap:
+            cap.close()
+
+
+def map_hunt(mm, offset, end):
+    '''hunt over a mapped capture, next SOP at or past offset, < end'''
+    global num_hunt
+
+    print('*** hunt started @{0} (0x{0:x})'.format(offset))
+    num_hunt += 1
+    offset = mm.find(SOP_BYTES, offset, end + 1)
+    if offset < 0 or offset >= end:
+        return -1
+    if (verbose >= 4):
+        print('*** hunt: found SOP @{0} (0x{0:x})'.format(offset))
+    return offset
+
+
+def map_records(mm, start, end):
+    '''generate (offset, len, mid, rec_buf) for records in [start, end)
+
+    get_record for a mapped capture.  Same checks and messages, but the
+    hunt is a find rather than a byte at a time (and doesn't give up on
+    zeros).  A record starting before end is returned whole even if it
+    runs past end.  Leaves the offset it stopped at in map_records.stop.
+    '''
+    global chksum_errors
+
+    size        = len(mm)
+    offset      = start
+    last_offset = -1
+    while offset < end:
+        if offset == last_offset:
+            offset += 2
+            print('*** rehunt: moving to: @{0} (0x{0:x})'.format(offset))
+            offset = map_hunt(mm, offset, end)
+            if (offset < 0):
+                offset = end
+                break
+            continue
+        last_offset = offset
+        if offset + SIRF_HDR_SIZE > size:
+            print('*** header read problem: wanted {}, got {}, @{}'.format(
+                SIRF_HDR_SIZE, size - offset, offset))
+            break
+        hdr, rlen = sirf.sirf_hdr_struct.unpack_from(mm, offset)
+        if hdr != SIRF_SOP_SEQ:
+            print('*** bad SOP: {:4x}, @{}'.format(hdr, offset))
+        elif rlen > SIRF_MAX_PAYLOAD:
+            print('*** bad len: {}, @{}'.format(rlen, offset))
+        else:
+            req_len = rlen + SIRF_HDR_SIZE + SIRF_END_SIZE
+            if offset + req_len > size:
+                print('*** incorrect number of bytes read: wanted {}, got {}, @{}'.format(
+                    req_len, size - offset, offset))
+                break
+            req_sum, term = sirf.sirf_end_struct.unpack_from(
+                mm, offset + SIRF_HDR_SIZE + rlen)
+            rec_buf = bytearray(mm[offset:offset + req_len])
+            if term != SIRF_EOP_SEQ:
+                print('*** bad EOP: {:4x}, @{}'.format(term, offset))
+            else:
+                chksum = sum(rec_buf[SIRF_HDR_SIZE:SIRF_HDR_SIZE + rlen]) & 0x7fff
+                if (chksum == req_sum):
+                    yield offset, req_len, rec_buf[SIRF_MID_OFFSET], rec_buf
+                    offset += req_len
+                    continue
+                chksum_errors += 1
+                chksum1 = '*** checksum failure @{0} (0x{0:x}) ' + \
+                          '[wanted: 0x{1:x}, got: 0x{2:x}]'
+                print(chksum1.format(offset, req_sum, chksum))
+                dump_buf(rec_buf)
+        offset = map_hunt(mm, offset, end)
+        if (offset < 0):
+            offset = end
+            break
+    map_records.stop = offset
+
+
+def count_mid(mid):
+    """
+    increment counter in dict of mids, create new entry if needed.
+    If not known count it as unknown.
+    """
+    global unk_mids
+
+    try:
+        sirf.mid_table[mid]
+    except KeyError:
+        unk_mids += 1
+
+    try:
+        sirf.mid_count[mid] += 1
+    except KeyError:
+        sirf.mid_count[mid] = 1
+
+
 # format for summary
 # --- offset len  mid     name
 # --- 999999 999  128/99  ssssss
@@ -289,6 +474,162 @@ def get_record(fd):
 title0  = '--- offset  len{}                        mid      name'
 summary0 = '--- @{:<6d} {:3}{}                  ({:02x})  {:3}{:4}  {:s}'
 
+def show_record(rec_offset, rlen, mid, rec_buf, wide):
+    '''count, summarize and decode (emitters) one record'''
+    global total_records, total_bytes
+
+    count_mid(mid)
+
+    # first print the summary
+
+    v = sirf.mid_table.get(mid, (None, None, None, 'unk'))
+    decoder  = v[MID_DECODER]           # mid_table function
+    emitters = v[MID_EMITTERS]          # mid_table emitter list
+    obj      = v[MID_OBJECT]
+    mid_name = v[MID_NAME]              # and the name of the mid
+
+    sid    = rec_buf[SIRF_SID_OFFSET]   # if there is a sid, next byte
+    sid_str = '' if mid not in mids_w_sids else '/{}'.format(sid)
+
+    # first display the summary, then any additional decodes
+    print(summary0.format(rec_offset, rlen, wide, mid, mid,
+                          sid_str, mid_name), end = '')
+
+    # get_record has verified that we have a proper header, tail,
+    # and validated checksum.  All sirf decoders assume we are pointing
+    # past the mid.  The mid has already been consumed.
+    #
+    # so we must start the decoding there as well.
+
+    buf = rec_buf[SIRF_HDR_SIZE+1:]
+    if (decoder):
+        try:
+            decoder(verbose, rec_offset, buf, obj)
+            if not emitters or len(emitters) == 0:
+                print()
+                if (verbose >= 5):
+                    print('*** no emitters defined for mid {}'.format(mid))
+            else:
+                for e in emitters:
+                    e(verbose, rec_offset, buf, obj)
+        except struct.error:
+            print()
+            print('*** decode error: (len: {}, mid: {} {}, '
+                  'expected: {}), @{}'.format(rlen, mid, mid_name,
+                  len(obj) if obj else 0, rec_offset))
+    else:
+        print()
+        if (verbose >= 5):
+            print()
+            print('*** no decoder installed for mid {} '
+                  '({:02x}), @{}'.format(mid, mid, rec_offset),
+                  end = '')
+    if (verbose >= 3):
+        print()
+        dump_buf(rec_buf, '    ')
+    if (verbose >= 1):
+        print()
+    total_records += 1
+    total_bytes   += rlen
+
+
+def decode_piece(job):
+    '''worker, job is (input name, start, end, verbose, wide)
+
+    decodes the records starting in [start, end) of the capture and
+    returns (output text, stop offset, counts), counts being
+    (records, bytes, hunts, chksum errs, unk mids, [(mid, n)]), mids
+    in the order first seen.
+    '''
+    global verbose, num_hunt, chksum_errors, unk_mids
+    global total_records, total_bytes
+
+    name, start, end, verbose, wide = job
+    num_hunt      = 0
+    chksum_errors = 0
+    unk_mids      = 0
+    total_records = 0
+    total_bytes   = 0
+    sirf.mid_count.clear()
+    seen = []
+    out  = StringIO()
+    sys.stdout = out
+    try:
+        with open(name, 'rb') as fd:
+            mm = mmap.mmap(fd.fileno(), 0, access = mmap.ACCESS_READ)
+            try:
+                for offset, rlen, mid, rec_buf in map_records(mm, start, end):
+                    if mid not in sirf.mid_count:
+                        seen.append(mid)
+                    show_record(offset, rlen, mid, rec_buf, wide)
+            finally:
+                mm.close()
+    finally:
+        sys.stdout = sys.__stdout__
+    return out.getvalue(), map_records.stop, (total_records, total_bytes,
+            num_hunt, chksum_errors, unk_mids,
+            [ (mid, sirf.mid_count[mid]) for mid in seen ])
+
+
+def par_dump(args, fd, wide):
+    '''--jobs: decode pieces of the capture in worker processes
+
+    pieces are cut at good packets and handed out in file order; their
+    output is printed and their counts added in that same order.
+    Returns the offset processing stopped at.
+    '''
+    global num_hunt, chksum_errors, unk_mids
+    global total_records, total_bytes
+
+    jobs  = args.jobs if args.jobs > 0 else cpu_count()
+    mm    = mmap.mmap(fd.fileno(), 0, access = mmap.ACCESS_READ)
+    start = args.jump or 0
+    end   = len(mm)
+    if args.endpos is not None:
+        end = max(start, min(end, args.endpos + 1))
+    npieces = max(jobs, (end - start + PAR_CHUNK - 1) / PAR_CHUNK)
+    points  = split_points(mm, start, end, npieces)
+    mm.close()
+    pieces  = [ (fd.name, points[i], points[i + 1], verbose, wide)
+                for i in xrange(len(points) - 1) ]
+    if debug:
+        print('*** jobs: {}, pieces: {}'.format(jobs, len(pieces)))
+
+    # decode_piece works in the globals, add up on the side
+    stop   = start
+    totals = [ 0, 0, 0, 0, 0 ]
+    mids   = []
+    pool   = Pool(min(jobs, len(pieces))) if len(pieces) > 1 else None
+    try:
+        results = pool.imap(decode_piece, pieces) if pool \
+                  else map(decode_piece, pieces)
+        for piece, (text, p_stop, counts) in zip(pieces, results):
+            if stop > piece[1]:
+                print('*** piece @{} overlaps the previous one, ended @{}'.format(
+                    piece[1], stop))
+            sys.stdout.write(text)
+            totals = [ a + b for a, b in zip(totals, counts[:5]) ]
+            mids.extend(counts[5])
+            stop = p_stop
+        if pool:
+            pool.close()
+    except KeyboardInterrupt:
+        print()
+        print()
+        print('*** user stop')
+        if pool:
+            pool.terminate()
+    total_records, total_bytes, num_hunt, chksum_errors, unk_mids = totals
+
+    # first seen order, so mid_count comes out as a single pass has it
+    sirf.mid_count.clear()
+    for mid, n in mids:
+        sirf.mid_count[mid] = sirf.mid_count.get(mid, 0) + n
+    if pool:
+        pool.join()
+    return stop
+
+
 def dump(args):
     """
     Reads records and prints out details
@@ -316,23 +657,6 @@ def dump(args):
         print('  sirf:     e: {}  h: {}'.format(se_ver, sh_ver))
         print()
 
-    def count_mid(mid):
-        """
-        increment counter in dict of mids, create new entry if needed.
-        If not known count it as unknown.
-        """
-        global unk_mids
-
-        try:
-            sirf.mid_table[mid]
-        except KeyError:
-            unk_mids += 1
-
-        try:
-            sirf.mid_count[mid] += 1
-        except KeyError:
-            sirf.mid_count[mid] = 1
-
     if debug:
         if args.num:
             print('*** {} records'.format(args.num))
@@ -344,94 +668,69 @@ def dump(args):
 
 
     # create file object that handles both buffered and direct io
-    infile  = tf.TagFile(args.input)
+    # (not for --live, a tty/fifo can't seek)
+    infile  = None if args.live else tf.TagFile(args.input)
 
     verbose = args.verbose if (args.verbose) else 0
     debug   = args.debug   if (args.debug)   else 0
 
-    if (args.jump):
+    if (args.jump and not args.live):
         infile.seek(args.jump)
 
     wide = ''
     if (args.wide):
         wide = '                                            '
 
+    parallel = args.jobs != 1 and not args.live
+    if parallel and (args.num or args.index or args.mids or args.sids or
+                     (args.jump or 0) < 0):
+        print('*** --jobs: not with -n, --index/--mids/--sids or a negative -j, '
+              'single pass')
+        parallel = False
+
     print(title0.format(wide))
 
+    if parallel:
+        stop = par_dump(args, args.input, wide)
+        print()
+        print('*** end of processing @{} (0x{:x}),  processed: {} records, {} bytes'.format(
+            stop, stop, total_records, total_bytes))
+        print('*** hunts: {}, chksum_errs: {}, unk_mids: {}'.format(
+            num_hunt, chksum_errors, unk_mids))
+        print()
+        print('mid/s: {}'.format(sirf.mid_count))
+        return
+
+    framer = None
+    if args.live:
+        framer  = SirfFramer()
+        records = live_records(args, framer)
+    elif args.index or args.mids or args.sids:
+        records = indexed_records(infile, args)
+    else:
+        records = stream_records(infile)
+
     # extract record from input file and output decoded results
     try:
-        while(True):
-            rec_offset, rlen, mid, rec_buf = get_record(infile)
-            if rec_offset < 0:
-                break
-
+        for rec_offset, rlen, mid, rec_buf in records:
             # look to see if past file position bound
             if (args.endpos and rec_offset > args.endpos):
                 break                       # all done
 
-            count_mid(mid)
-
-            # first print the summary
-
-            v = sirf.mid_table.get(mid, (None, None, None, 'unk'))
-            decoder  = v[MID_DECODER]           # mid_table function
-            emitters = v[MID_EMITTERS]          # mid_table emitter list
-            obj      = v[MID_OBJECT]
-            mid_name = v[MID_NAME]              # and the name of the mid
-
-            sid    = rec_buf[SIRF_SID_OFFSET]   # if there is a sid, next byte
-            sid_str = '' if mid not in mids_w_sids else '/{}'.format(sid)
-
-            # first display the summary, then any additional decodes
-            print(summary0.format(rec_offset, rlen, wide, mid, mid,
-                                  sid_str, mid_name), end = '')
-
-            # get_record has verified that we have a proper header, tail,
-            # and validated checksum.  All sirf decoders assume we are pointing
-            # past the mid.  The mid has already been consumed.
-            #
-            # so we must start the decoding there as well.
-
-            buf = rec_buf[SIRF_HDR_SIZE+1:]
-            if (decoder):
-                try:
-                    decoder(verbose, rec_offset, buf, obj)
-                    if not emitters or len(emitters) == 0:
-                        print()
-                        if (verbose >= 5):
-                            print('*** no emitters defined for mid {}'.format(mid))
-                    else:
-                        for e in emitters:
-                            e(verbose, rec_offset, buf, obj)
-                except struct.error:
-                    print()
-                    print('*** decode error: (len: {}, mid: {} {}, '
-                          'expected: {}), @{}'.format(rlen, mid, mid_name,
-                          len(obj) if obj else 0, rec_offset))
-            else:
-                print()
-                if (verbose >= 5):
-                    print()
-                    print('*** no decoder installed for mid {} '
-                          '({:02x}), @{}'.format(mid, mid, rec_offset),
-                          end = '')
-            if (verbose >= 3):
-                print()
-                dump_buf(rec_buf, '    ')
-            if (verbose >= 1):
-                print()
-            total_records += 1
-            total_bytes   += rlen
+            show_record(rec_offset, rlen, mid, rec_buf, wide)
             if (args.num and total_records >= args.num):
                 break
     except KeyboardInterrupt:
         print()
         print()
         print('*** user stop')
+    if framer:
+        records.close()
 
+    end = framer.end if framer else infile.tell()
     print()
     print('*** end of processing @{} (0x{:x}),  processed: {} records, {} bytes'.format(
-        infile.tell(), infile.tell(), total_records, total_bytes))
+        end, end, total_records, total_bytes))
     print('*** hunts: {}, chksum_errs: {}, unk_mids: {}'.format(
         num_hunt, chksum_errors, unk_mids))
     print()
@@ -28,6 +28,10 @@ def auto_int(x):
 def auto_upper(x):
     return x.upper()
 
+def int_list(x):
+    '''comma separated list of ints, 41,225 or 0x29'''
+    return set([ int(v, 0) for v in x.split(',') if v ])
+
 def parseargs():
     parser = argparse.ArgumentParser(
         description='Display SirfBin records.')
@@ -62,6 +66,37 @@ def parseargs():
                         default=0,
                         help='increase output verbosity')
 
+    parser.add_argument('--index',
+                        action='store_true',
+                        help='use (build if needed) the packet index, <input>.sidx')
+
+    parser.add_argument('--mids',
+                        type=int_list,
+                        help='only packets with these mids, 41,225 (implies --index)')
+
+    parser.add_argument('--sids',
+                        type=int_list,
+                        help='only packets with these sids (implies --index)')
+
+    parser.add_argument('-J', '--jobs',
+                        type=int,
+                        default=1,
+                        metavar='N',
+                        help='decode with N worker processes, 0 one per cpu')
+
+    parser.add_argument('--live',
+                        action='store_true',
+                        help='input is a serial port/pty/fifo, decode as packets arrive')
+
+    parser.add_argument('--baud',
+                        type=int,
+                        default=9600,
+                        help='--live, baud rate if input is a tty (9600)')
+
+    parser.add_argument('--capture',
+                        metavar='FILE',
+                        help='--live, append raw input to FILE')
+
     parser.add_argument('-w', '--wide',
                         action='store_true',
                         help='extra wide summary (better viewing)')
@@ -0,0 +1,8 @@
+"""
+sirfplay:  replay a sirfbin capture through a pty, like a gps
+@author:   Eric B. Decker
+"""
+
+# 0.0.1         Initial version (was tagcore/sirf_live.py __main__)
+
+__version__ = '0.0.1.dev1'
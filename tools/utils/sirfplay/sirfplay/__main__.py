@@ -0,0 +1,13 @@
+"""
+sirfplay:  replay a sirfbin capture through a pty, like a gps
+@author:   Eric B. Decker
+"""
+
+from sirfplay     import play
+from sirfplayargs import parseargs
+
+def main():
+    play(parseargs())
+
+if __name__ == '__main__':
+    main()
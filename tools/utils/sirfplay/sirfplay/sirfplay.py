@@ -0,0 +1,52 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''sirfplay: replay a sirfbin capture through a pty, like a gps
+
+Opens a pty, prints the name of its slave side and writes the capture
+to it at about the baud rate (tagcore/sirf_live.py pty_standin).  Point
+sirfdump --live at the pty.  ^C stops it early.
+'''
+
+from   __future__               import print_function
+
+import os
+import sys
+import time
+
+from   tagcore.sirf_live        import pty_standin, LIVE_IDLE
+
+from   __init__                 import __version__   as VERSION
+
+ver_str = '\nsirfplay: ' + VERSION
+
+
+def play(args):
+    print(ver_str)
+    data = args.input.read()
+    args.input.close()
+    master, name, writer = pty_standin(data, args.baud)
+    print('*** {}: {} bytes at {} baud'.format(name, len(data), args.baud))
+    sys.stdout.flush()
+    try:
+        writer()
+        time.sleep(2 * LIVE_IDLE)       # let the reader drain
+    except KeyboardInterrupt:
+        pass
+    os.close(master)
@@ -0,0 +1,47 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+#
+
+from   __future__ import print_function
+from   __init__   import __version__ as VERSION
+import argparse
+
+from   tagcore.sirf_live import LIVE_BAUD
+
+def parseargs():
+    parser = argparse.ArgumentParser(
+        description='Replay a sirfbin capture through a pty (for sirfdump --live).')
+
+    parser.add_argument('input',
+                        type=argparse.FileType('rb'),
+                        help='sirfbin capture')
+
+    parser.add_argument('-V', '--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION)
+
+    parser.add_argument('-b', '--baud',
+                        type=int,
+                        default=LIVE_BAUD,
+                        help='line speed to play at (default {})'.format(LIVE_BAUD))
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    print(parseargs())
@@ -3,7 +3,7 @@ tagcore: utility and common routines for many tag things
 @author:   Eric B. Decker
 """
 
-__version__ = '0.3.3.dev1'
+__version__ = '0.3.3.dev25'
 
 __all__ = [
     'CORE_REV',                         # core_rev.py
@@ -18,6 +18,66 @@ from    .core_rev       import CORE_MINOR
 from    .misc_utils     import buf_str, dump_buf
 from    .core_headers   import obj_dt_hdr
 
+# 0.3.3.dev25   dblk_archive: zlib/bz2 compressed dblk, chunks cut at SYNCs with a
+#               seek table; TagFile and event_index read it like the dblk
+#
+# 0.3.3.dev24   rt_drift: rtc drift model per reboot, fit off the record index and
+#               cached with it (RecCache derived values); rt_time DriftModel
+#
+# 0.3.3.dev23   rt_time: rtctime -> epoch secs for whole arrays (nan if not set),
+#               rtc drift fit against geoData utc (Drift, GpsClock); tables take a clock
+#
+# 0.3.3.dev22   gps_ttff: time to first fix per gps cycle, navTrack sats, ttff histograms
+#
+# 0.3.3.dev21   event_index: records/events straight off the record index
+#               gps_timeline: gps monitor state intervals, time in state per hour/boot
+#
+# 0.3.3.dev20   gps_cno: per SV C/N0 series from navTrack (CnoTable, numpy)
+#
+# 0.3.3.dev19   decode_gps_raw: check embedded packet len/EOP/checksum, obj.sirf_err,
+#               sirf.mid_bad; bad packets not decoded, not emitted, not tracked
+#
+# 0.3.3.dev18   sirf_live: incremental framing (SirfFramer), non-blocking tty/pty input,
+#               pty stand-in.  sirf_index: packet_len unpacks (bytearray ok)
+#
+# 0.3.3.dev17   sirf_index: packet_len, find_packet, split_points (cut on packets)
+#
+# 0.3.3.dev16   sirf_index: packet index for raw sirfbin captures, .sidx sidecar
+#
+# 0.3.3.dev15   sensor_data: numpy sensor tables (SensorTable, rt_epoch, concat)
+#               obj_dt_sen_data/obj_dt_sen_set real headers, fix emit_sensor_data
+#
+# 0.3.3.dev14   dt_registry: decode tables per core_rev, dt_select; rev_tables from schemas
+#               schema: cache as plain data
+#
+# 0.3.3.dev13   schema: compile include/*.h struct layouts, cached per CORE_REV/CORE_MINOR
+#
+# 0.3.3.dev12   lazy decode tables, objects built on first lookup (lazy_obj, lazy_table)
+#               core_rev: module versions via core_versions(), no eager imports
+#
+# 0.3.3.dev11   image_area: image_info checks incl im_chk, ImageManager dir
+#               core_headers: obj_image_dir, obj_image_dir_slot
+#
+# 0.3.3.dev10   panic_join: REBOOT index, panic reboot <-> panic block join
+#
+# 0.3.3.dev9    panic_area: stream RAM/IO out (copy_out), constant memory
+#
+# 0.3.3.dev8    panic_area: panic dir walk, panic block decode, sig checks, CrashCatcher dumps
+#               core_headers: IMAGE_INFO_SIG
+#
+# 0.3.3.dev7    sd_image: raw SD images, fs locator, mmap'd area views
+#
+# 0.3.3.dev6    dblk_dir: dblk_dir_t decode/verify, sector addressing, find dblk_nxt
+#
+# 0.3.3.dev5    tagfile: SEEK_DATA/SEEK_HOLE, data_ranges, next_data/hole, coverage
+#
+# 0.3.3.dev4    chunk_hash: sector/sync chunk manifests, changed ranges, probe
+#
+# 0.3.3.dev3    rec_cache: persistent record cache/index keyed by file identity
+#
+# 0.3.3.dev2    gps_track: navData ECEF -> geodetic (numpy, bulk), track table
+#               misc_utils: write_columns
+#
 # 0.3.2         Core_Rev 19/0
 #               reorder EVENTS, core_rev 19/0
 #               revised gps monitor state machine (v1)
@@ -23,7 +23,7 @@
 import struct
 from   collections import OrderedDict
 
-__version__ = '0.3.2'
+__version__ = '0.3.3.dev12'
 
 class atom(object):
     '''
@@ -100,3 +100,40 @@ class aggie(OrderedDict):
         for key, v_obj in self.iteritems():
             consumed += v_obj.set(buf[consumed:])
         return consumed
+
+
+class lazy_obj(object):
+    '''
+    placeholder for a record object in a decode table (dt_records,
+    mid_table, ...).  Holds the obj_* function, the object itself
+    doesn't get built until the table entry is first looked up.
+    '''
+    def __init__(self, builder):
+        self.builder = builder
+
+    def __repr__(self):
+        return 'lazy ' + self.builder.__name__
+
+
+class lazy_table(dict):
+    '''
+    decode table whose entries (tuples) may carry a lazy_obj in slot
+    obj_idx.  Looking an entry up (tbl[key] or tbl.get) builds the
+    object, once, and replaces the entry.  Everything else is a dict.
+    '''
+    def __init__(self, obj_idx):
+        super(lazy_table, self).__init__()
+        self.obj_idx = obj_idx
+
+    def __getitem__(self, key):
+        v = dict.__getitem__(self, key)
+        if isinstance(v[self.obj_idx], lazy_obj):
+            v = v[:self.obj_idx] + (v[self.obj_idx].builder(),) + \
+                v[self.obj_idx + 1:]
+            dict.__setitem__(self, key, v)
+        return v
+
+    def get(self, key, default = None):
+        if key in self:
+            return self[key]
+        return default
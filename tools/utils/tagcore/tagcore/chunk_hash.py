@@ -0,0 +1,216 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''content hashed chunk manifests for dblk streams
+
+A manifest describes a dblk stream as a list of chunks, each chunk is
+(offset, len, sha1).  Chunks are either:
+
+    sector  fixed CHUNK_SIZE (512) pieces, aligned to the start.
+
+    sync    cut at the start of each SYNC/REBOOT record (where a
+            SYNC_MAJIK shows up, backed up SYNC_MAJIK_OFFSET).  Cut
+            points follow the content, so a region that shows up
+            again, even at a different offset, hashes the same.
+            Chunks are never bigger than max_chunk.
+
+Comparing a new manifest against an old one tells us which byte ranges
+are new or different (changed_ranges).  When the stream is on the far
+side of the radio (tagfuse) hashing it all means reading it all, so
+probe() only reads back a handful of the old chunks (always including
+the last one, which may have been partially written) and reports
+everything past the last good chunk as needing to be fetched.
+
+All i/o is done with read/seek so either a file or a TagFile works.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import os
+import json
+import hashlib
+
+import dt_defs      as     dtd
+
+__all__ = [
+    'build_manifest',
+    'load_manifest',
+    'save_manifest',
+    'changed_ranges',
+    'probe',
+    'CHUNK_SIZE',
+]
+
+CHUNK_SIZE        = 512                 # sector
+MAX_CHUNK         = 64 * CHUNK_SIZE     # bound on sync chunks
+MANIFEST_REV      = 1
+SYNC_MAJIK_OFFSET = 24                  # majik from start of SYNC record
+
+# chunk tuple indices
+CH_OFFSET = 0
+CH_LEN    = 1
+CH_HASH   = 2
+
+majik_bytes = dtd.quad_struct.pack(dtd.dt_sync_majik)
+
+
+def _digest(buf):
+    return hashlib.sha1(buf).hexdigest()
+
+
+def _sync_cuts(buf, base, chunk_start):
+    '''where SYNC records start in buf (buf starts at offset base)'''
+    cuts = []
+    i = buf.find(majik_bytes)
+    while i >= 0:
+        if (base + i) & 3 == 0:
+            cut = base + i - SYNC_MAJIK_OFFSET
+            if cut > chunk_start:
+                cuts.append(cut)
+        i = buf.find(majik_bytes, i + 1)
+    return cuts
+
+
+def build_manifest(fd, start = 0, end = None, mode = 'sector',
+                   chunk_size = CHUNK_SIZE, max_chunk = MAX_CHUNK):
+    '''hash the stream from start to end (None, eof) into a manifest
+
+    reads are done chunk_size at a time.  returns a manifest dict.
+    '''
+    if mode not in ('sector', 'sync'):
+        raise ValueError('unknown chunk mode {}'.format(mode))
+    chunks  = []
+    pending = bytearray()
+    chunk_start = start
+    offset  = start
+
+    fd.seek(start)
+    while end is None or offset < end:
+        cnt = chunk_size if end is None else min(chunk_size, end - offset)
+        buf = fd.read(cnt)
+        if not buf:
+            break
+        if mode == 'sector':
+            chunks.append((offset, len(buf), _digest(buf)))
+            offset += len(buf)
+            continue
+
+        # sync mode.  a majik is quad aligned so never straddles a read,
+        # but the record start can be back in the previous read.
+        cuts = _sync_cuts(buf, offset, chunk_start)
+        pending += buf
+        offset  += len(buf)
+        for cut in cuts + [ None ]:
+            # a long run with no SYNC goes out max_chunk at a time, before
+            # the cut that ends it
+            while len(pending) >= max_chunk and \
+                  (cut is None or cut - chunk_start > max_chunk):
+                chunks.append((chunk_start, max_chunk,
+                               _digest(pending[:max_chunk])))
+                del pending[:max_chunk]
+                chunk_start += max_chunk
+            if cut is not None:
+                n = cut - chunk_start
+                chunks.append((chunk_start, n, _digest(pending[:n])))
+                del pending[:n]
+                chunk_start = cut
+
+    if pending:
+        chunks.append((chunk_start, len(pending), _digest(pending)))
+    return {
+        'rev':    MANIFEST_REV,
+        'mode':   mode,
+        'start':  start,
+        'end':    offset,
+        'chunks': chunks,
+    }
+
+
+def load_manifest(fname):
+    with open(fname, 'r') as fd:
+        m = json.load(fd)
+    if m.get('rev') != MANIFEST_REV:
+        raise ValueError('{}: manifest rev {}, expected {}'.format(
+            fname, m.get('rev'), MANIFEST_REV))
+    m['chunks'] = [ tuple(c) for c in m['chunks'] ]
+    return m
+
+
+def save_manifest(fname, m):
+    tmp = fname + '.tmp'
+    with open(tmp, 'w') as fd:
+        json.dump(m, fd, separators = (',', ':'))
+    os.rename(tmp, fname)
+
+
+def _coalesce(ranges):
+    out = []
+    for lo, hi in sorted(ranges):
+        if out and lo <= out[-1][1]:
+            out[-1][1] = max(out[-1][1], hi)
+        else:
+            out.append([lo, hi])
+    return [ tuple(r) for r in out ]
+
+
+def changed_ranges(old, new):
+    '''byte ranges (lo, hi) of new that aren't already covered by old
+
+    content addressed, a chunk of new is covered if a chunk with the
+    same length and hash is anywhere in old.
+    '''
+    have = set([ (c[CH_LEN], c[CH_HASH]) for c in old['chunks'] ]) \
+           if old else set()
+    return _coalesce([ (c[CH_OFFSET], c[CH_OFFSET] + c[CH_LEN])
+                       for c in new['chunks']
+                       if (c[CH_LEN], c[CH_HASH]) not in have ])
+
+
+def probe(fd, old, end, check = 0):
+    '''spot check the stream against old without reading all of it
+
+    reads back the last chunk of old plus check more evenly spaced
+    chunks.  Everything up to the first chunk that doesn't match (or
+    the end of old) is assumed good.  Only worth it on a stream that
+    gets appended to (dblk).
+
+    returns (ranges, bytes_read)
+    '''
+    chunks = old['chunks']
+    if not chunks:
+        return ([ (old['start'], end) ] if end > old['start'] else []), 0
+    idx = set([ len(chunks) - 1 ])
+    if check > 0:
+        step = max(len(chunks) / (check + 1), 1)
+        idx.update(range(step - 1, len(chunks) - 1, step)[:check])
+    good_end = old['start']
+    nread    = 0
+    for i in sorted(idx):
+        off, cnt, h = chunks[i]
+        if off + cnt > end:
+            break
+        fd.seek(off)
+        buf = fd.read(cnt)
+        nread += len(buf)
+        if len(buf) != cnt or _digest(buf) != h:
+            break
+        good_end = off + cnt
+    return ([ (good_end, end) ] if end > good_end else []), nread
@@ -21,12 +21,16 @@
 
 from   __future__         import print_function
 
-__version__ = '0.3.3.dev4'
+__version__ = '0.3.3.dev19'
+
+import struct
 
 from   core_rev     import *
 from   dt_defs      import *
 
 from   core_headers import event_name
+from   core_headers import sensor_name, sensor_fmt
+from   core_headers import gps_raw_errs
 from   core_headers import PANIC_WARN           # event
 from   core_headers import GPS_MON_MINOR        # event
 from   core_headers import GPS_MON_MAJOR        # event
@@ -447,20 +451,45 @@ def emit_gps_xyz(level, offset, buf, obj):
 # SENSOR/SET decoders
 #
 
+sns0   = '  {:>6s}  {}'
+sns1   = '    sched: {}  sns_id: {}  datums: {}'
+set0   = '  mask: 0x{:04x}  id: {}'
+
 def emit_sensor_data(level, offset, buf, obj):
-    dump_hdr(offset, buf)
+    xlen     = obj['hdr']['len'].val
+    xtype    = obj['hdr']['type'].val
+    recnum   = obj['hdr']['recnum'].val
+    rtctime  = obj['hdr']['rt']
+    brt      = rtctime_str(rtctime)
+    sns_id   = obj['sns_id'].val
+
+    # 16 bit datums follow the header, signed or not depends on the sensor
+    nd       = (xlen - len(obj)) / 2
+    datums   = struct.unpack_from('<{}{}'.format(nd, sensor_fmt(sns_id)),
+                                  str(buf), len(obj)) \
+               if nd > 0 else ()
+
+    print_hourly(rtctime)
+    print(rec0.format(offset, recnum, brt, xlen, xtype,
+                      dt_name(xtype)), end = '')
+    print(sns0.format(sensor_name(sns_id), ' '.join([ str(d) for d in datums ])))
     if (level >= 1):
-        print(obj)
-        print_hdr_obj(obj)
-        print()
+        print(sns1.format(obj['sched_delta'].val, sns_id, nd))
 
 
 def emit_sensor_set(level, offset, buf, obj):
-    dump_hdr(offset, buf)
+    xlen     = obj['hdr']['len'].val
+    xtype    = obj['hdr']['type'].val
+    recnum   = obj['hdr']['recnum'].val
+    rtctime  = obj['hdr']['rt']
+    brt      = rtctime_str(rtctime)
+
+    print_hourly(rtctime)
+    print(rec0.format(offset, recnum, brt, xlen, xtype,
+                      dt_name(xtype)), end = '')
+    print(set0.format(obj['mask'].val, obj['mask_id'].val))
     if (level >= 1):
-        print(obj)
-        print_hdr_obj(obj)
-        print()
+        print('    sched: {}'.format(obj['sched_delta'].val))
 
 
 ################################################################
@@ -560,7 +589,7 @@ def emit_gps_raw(level, offset, buf, obj):
         return
 
     mid      = obj['sirf_hdr']['mid'].val
-    sid      = buf[len(obj)]                # if there is a sid, next byte
+    sid      = buf[len(obj)] if len(buf) > len(obj) else 0  # if there is a sid
 
     v = sirf.mid_table.get(mid, (None, None, None, ''))
     emitters    = v[MID_EMITTERS]           # emitter list
@@ -571,6 +600,13 @@ def emit_gps_raw(level, offset, buf, obj):
     print(' -- MID: {:3}{:4} ({:02x}) <{:2}> {}'.format(
         mid, sid_str, mid, dir_str, mid_name), end = '')        # sans nl
 
+    if obj.sirf_err:
+        # not decoded, decoder_obj would be whatever was there before
+        print('  *** {}'.format(gps_raw_errs[obj.sirf_err]))
+        if (level >= 1):
+            dump_buf(buf[len(obj) - len(obj['sirf_hdr']):], '    ')
+        return
+
     if not emitters or len(emitters) == 0:
         print()
         if (level >= 5):
@@ -22,7 +22,7 @@
 
 from   __future__         import print_function
 
-__version__ = '0.3.3.dev5'
+__version__ = '0.3.3.dev25'
 
 import binascii
 from   collections  import OrderedDict
@@ -59,16 +59,46 @@ import sirf_defs    as     sirf
 # o only consume up to the beginning of the SOP
 #
 # SirfBin packet:
+# o check the embedded packet, len, EOP, and checksum.  A bad one is
+#   counted in sirf.mid_bad and not decoded any further.
 # o Look mid up in mid_table
 # o consume/process the remainder of the packet using the appropriate decoder
+#
+# obj.sirf_err is left with how it went, GPS_RAW_OK (0) or why not.
+# Downstream (track, monitors) skip anything non-zero.
+#
+GPS_RAW_OK      = 0
+GPS_RAW_NOT_BIN = 1                     # no SOP, not a sirfbin packet
+GPS_RAW_SHORT   = 2                     # runs off the end of the record
+GPS_RAW_BAD     = 3                     # bad len or EOP
+GPS_RAW_CHKSUM  = 4                     # checksum doesn't match
+
+gps_raw_errs = {
+    GPS_RAW_NOT_BIN: 'non-binary',
+    GPS_RAW_SHORT:   'short',
+    GPS_RAW_BAD:     'bad len/EOP',
+    GPS_RAW_CHKSUM:  'bad chksum',
+}
 
 def decode_gps_raw(level, offset, buf, obj):
     consumed = obj.set(buf)
 
     if obj['sirf_hdr']['start'].val != SIRF_SOP_SEQ:
+        obj.sirf_err = GPS_RAW_NOT_BIN
         return consumed - len(obj['sirf_hdr'])
 
-    mid = obj['sirf_hdr']['mid'].val
+    mid  = obj['sirf_hdr']['mid'].val
+    plen = packet_len(buf, consumed - SIRF_HDR_SIZE - 1)
+    if plen > 0:
+        obj.sirf_err = GPS_RAW_OK
+    else:
+        obj.sirf_err = GPS_RAW_SHORT  if plen is None else \
+                       GPS_RAW_CHKSUM if plen < 0     else GPS_RAW_BAD
+        try:
+            sirf.mid_bad[mid] += 1
+        except KeyError:
+            sirf.mid_bad[mid] = 1
+        return consumed
 
     try:
         sirf.mid_count[mid] += 1
@@ -191,6 +221,7 @@ def obj_image_version():
     ]))
 
 
+IMAGE_INFO_SIG = 0x33275401
 IMG_DESC_MAX = 44
 STAMP_MAX    = 30
 
@@ -209,6 +240,67 @@ def obj_image_info():
     ]))
 
 
+# image_dir_t, tos/mm/image_mgr.h, 1st sector of the IMAGE area
+# slot_state_t is a (short) enum, 1 byte followed by pad.
+def obj_image_dir_slot():
+    return aggie(OrderedDict([
+        ('ver_id',    obj_image_version()),
+        ('start_sec', atom(('<I', '0x{:08x}'))),
+        ('slot_state',atom(('<B', '{}'))),
+        ('pad',       atom(('3s', '{}'))),
+    ]))
+
+def obj_image_dir():
+    return aggie(OrderedDict([
+        ('imgr_id',   atom(('4s', '{:s}'))),
+        ('dir_sig',   atom(('<I', '0x{:08x}'))),
+        ('slot0',     obj_image_dir_slot()),
+        ('slot1',     obj_image_dir_slot()),
+        ('slot2',     obj_image_dir_slot()),
+        ('slot3',     obj_image_dir_slot()),
+        ('dir_sig_a', atom(('<I', '0x{:08x}'))),
+        ('chksum',    atom(('<I', '0x{:08x}'))),
+    ]))
+
+
+# dblk_dir_t, include/dblk_dir.h, 1st sector of the DBLK area
+def obj_dblk_dir():
+    return aggie(OrderedDict([
+        ('dblk_id',   atom(('4s', '{:s}'))),
+        ('dir_sig',   atom(('<I', '0x{:08x}'))),
+        ('dblk_low',  atom(('<I', '0x{:08x}'))),
+        ('dblk_high', atom(('<I', '0x{:08x}'))),
+        ('incept',    obj_rtctime()),
+        ('file_idx',  atom(('<B', '{}'))),
+        ('pad',       atom(('<B', '{}'))),
+        ('dir_sig_a', atom(('<I', '0x{:08x}'))),
+        ('chksum',    atom(('<I', '0x{:08x}'))),
+    ]))
+
+
+# fs_loc_t, include/fs_loc.h, sector 0 of the SD @ FS_LOC_OFFSET
+def obj_loc():
+    return aggie(OrderedDict([
+        ('start',     atom(('<I', '0x{:08x}'))),
+        ('end',       atom(('<I', '0x{:08x}'))),
+    ]))
+
+def obj_fs_loc():
+    return aggie(OrderedDict([
+        ('loc_sig',   atom(('<I', '0x{:08x}'))),
+        ('panic',     obj_loc()),
+        ('config',    obj_loc()),
+        ('image',     obj_loc()),
+        ('dblk',      obj_loc()),
+        ('loc4',      obj_loc()),
+        ('loc5',      obj_loc()),
+        ('loc6',      obj_loc()),
+        ('loc7',      obj_loc()),
+        ('loc_sig_a', atom(('<I', '0x{:08x}'))),
+        ('loc_chksum',atom(('<H', '0x{:04x}'))),
+    ]))
+
+
 def obj_dt_sync():
     return aggie(OrderedDict([
         ('hdr',       obj_dt_hdr()),
@@ -332,8 +424,49 @@ obj_dt_gps_time = obj_dt_hdr
 obj_dt_gps_geo  = obj_dt_hdr
 obj_dt_gps_xyz  = obj_dt_hdr
 
-obj_dt_sen_data = obj_dt_hdr
-obj_dt_sen_set  = obj_dt_hdr
+# sns_id -> (name, column names, datum type).  Payload datums are 16
+# bits, ADC style counts unsigned, the vector sensors signed.  The
+# columns are one sample, <SENSOR>_PAYLOAD_SIZE / 2 (typed_data.h).
+sensors = {
+    1:  ('cradle', ('batt',),               '<u2'),
+    2:  ('batt',   ('batt',),               '<u2'),
+    3:  ('temp',   ('temp',),               '<u2'),
+    4:  ('sal',    ('sal1', 'sal2'),        '<u2'),
+    5:  ('accel',  ('x', 'y', 'z'),         '<i2'),
+    6:  ('ptemp',  ('ptemp',),              '<u2'),
+    7:  ('press',  ('press',),              '<u2'),
+    8:  ('speed',  ('x', 'y'),              '<i2'),
+    9:  ('mag',    ('x', 'y', 'z'),         '<i2'),
+}
+
+def sensor_name(sns_id):
+    return sensors.get(sns_id, ('sns/' + str(sns_id),))[0]
+
+datum_fmts = { '<u2': 'H', '<i2': 'h' }
+
+def sensor_fmt(sns_id):
+    '''struct format char of sns_id's datums'''
+    return datum_fmts[sensors.get(sns_id, (None, None, '<u2'))[2]]
+
+
+# SENSOR_DATA/SENSOR_SET, header only.  The payload, 16 bit datums,
+# follows (see sensor_data.py).
+def obj_dt_sen_data():
+    return aggie(OrderedDict([
+        ('hdr',         obj_dt_hdr()),
+        ('sched_delta', atom(('<I', '{}'))),
+        ('sns_id',      atom(('<H', '{}'))),
+        ('pad',         atom(('<H', '{}'))),
+    ]))
+
+
+def obj_dt_sen_set():
+    return aggie(OrderedDict([
+        ('hdr',         obj_dt_hdr()),
+        ('sched_delta', atom(('<I', '{}'))),
+        ('mask',        atom(('<H', '0x{:04x}'))),
+        ('mask_id',     atom(('<H', '{}'))),
+    ]))
 
 obj_dt_test     = obj_dt_hdr
 
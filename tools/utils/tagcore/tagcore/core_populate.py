@@ -2,6 +2,7 @@
 
 from   dt_defs       import *
 import dt_defs       as     dtd
+from   base_objs     import lazy_obj
 from   core_headers  import *
 from   core_emitters import *
 
@@ -9,24 +10,24 @@ def decode_default(level, offset, buf, obj):
     return obj.set(buf)
 
 #                                      148 = sizeof(reboot record) + sizeof(owcb)
-dtd.dt_records[DT_REBOOT]           = (148, decode_default, [ emit_reboot ],      obj_dt_reboot(),    'REBOOT',       'obj_dt_reboot'   )
+dtd.dt_records[DT_REBOOT]           = (148, decode_default, [ emit_reboot ],      lazy_obj(obj_dt_reboot),    'REBOOT',       'obj_dt_reboot'   )
 #                                      208 = sizeof(version record) + sizeof(image_info)
-dtd.dt_records[DT_VERSION]          = (208, decode_default, [ emit_version ],     obj_dt_version(),   'VERSION',      'obj_dt_version'  )
-dtd.dt_records[DT_SYNC]             = ( 28, decode_default, [ emit_sync ],        obj_dt_sync(),      'SYNC',         'obj_dt_sync'     )
-dtd.dt_records[DT_EVENT]            = ( 40, decode_default, [ emit_event ],       obj_dt_event(),     'EVENT',        'obj_dt_event'    )
-dtd.dt_records[DT_DEBUG]            = (  0, decode_default, [ emit_debug ],       obj_dt_debug(),     'DEBUG',        'obj_dt_debug'    )
-dtd.dt_records[DT_SYNC_FLUSH]       = ( 28, decode_default, [ emit_sync ],        obj_dt_sync(),      'SYNC/F',       'obj_dt_sync'     )
-dtd.dt_records[DT_GPS_VERSION]      = (  0, decode_default, [ emit_gps_version ], obj_dt_gps_ver(),   'GPS_VERSION',  'obj_dt_gps_ver'  )
-dtd.dt_records[DT_GPS_TIME]         = (  0, decode_default, [ emit_gps_time ],    obj_dt_gps_time(),  'GPS_TIME',     'obj_dt_gps_time' )
-dtd.dt_records[DT_GPS_GEO]          = (  0, decode_default, [ emit_gps_geo ],     obj_dt_gps_geo(),   'GPS_GEO',      'obj_dt_gps_geo'  )
-dtd.dt_records[DT_GPS_XYZ]          = (  0, decode_default, [ emit_gps_xyz ],     obj_dt_gps_xyz(),   'GPS_XYZ',      'obj_dt_gps_xyz'  )
-dtd.dt_records[DT_SENSOR_DATA]      = (  0, decode_default, [ emit_sensor_data ], obj_dt_sen_data(),  'SENSOR_DATA',  'obj_dt_sen_data' )
-dtd.dt_records[DT_SENSOR_SET]       = (  0, decode_default, [ emit_sensor_set ],  obj_dt_sen_set(),   'SENSOR_SET',   'obj_dt_sen_set'  )
-dtd.dt_records[DT_TEST]             = (  0, decode_default, [ emit_test ],        obj_dt_test(),      'TEST',         'obj_dt_test'     )
-dtd.dt_records[DT_NOTE]             = (  0, decode_default, [ emit_note ],        obj_dt_note(),      'NOTE',         'obj_dt_note'     )
-dtd.dt_records[DT_CONFIG]           = (  0, decode_default, [ emit_config ],      obj_dt_config(),    'CONFIG',       'obj_dt_config'   )
+dtd.dt_records[DT_VERSION]          = (208, decode_default, [ emit_version ],     lazy_obj(obj_dt_version),   'VERSION',      'obj_dt_version'  )
+dtd.dt_records[DT_SYNC]             = ( 28, decode_default, [ emit_sync ],        lazy_obj(obj_dt_sync),      'SYNC',         'obj_dt_sync'     )
+dtd.dt_records[DT_EVENT]            = ( 40, decode_default, [ emit_event ],       lazy_obj(obj_dt_event),     'EVENT',        'obj_dt_event'    )
+dtd.dt_records[DT_DEBUG]            = (  0, decode_default, [ emit_debug ],       lazy_obj(obj_dt_debug),     'DEBUG',        'obj_dt_debug'    )
+dtd.dt_records[DT_SYNC_FLUSH]       = ( 28, decode_default, [ emit_sync ],        lazy_obj(obj_dt_sync),      'SYNC/F',       'obj_dt_sync'     )
+dtd.dt_records[DT_GPS_VERSION]      = (  0, decode_default, [ emit_gps_version ], lazy_obj(obj_dt_gps_ver),   'GPS_VERSION',  'obj_dt_gps_ver'  )
+dtd.dt_records[DT_GPS_TIME]         = (  0, decode_default, [ emit_gps_time ],    lazy_obj(obj_dt_gps_time),  'GPS_TIME',     'obj_dt_gps_time' )
+dtd.dt_records[DT_GPS_GEO]          = (  0, decode_default, [ emit_gps_geo ],     lazy_obj(obj_dt_gps_geo),   'GPS_GEO',      'obj_dt_gps_geo'  )
+dtd.dt_records[DT_GPS_XYZ]          = (  0, decode_default, [ emit_gps_xyz ],     lazy_obj(obj_dt_gps_xyz),   'GPS_XYZ',      'obj_dt_gps_xyz'  )
+dtd.dt_records[DT_SENSOR_DATA]      = (  0, decode_default, [ emit_sensor_data ], lazy_obj(obj_dt_sen_data),  'SENSOR_DATA',  'obj_dt_sen_data' )
+dtd.dt_records[DT_SENSOR_SET]       = (  0, decode_default, [ emit_sensor_set ],  lazy_obj(obj_dt_sen_set),   'SENSOR_SET',   'obj_dt_sen_set'  )
+dtd.dt_records[DT_TEST]             = (  0, decode_default, [ emit_test ],        lazy_obj(obj_dt_test),      'TEST',         'obj_dt_test'     )
+dtd.dt_records[DT_NOTE]             = (  0, decode_default, [ emit_note ],        lazy_obj(obj_dt_note),      'NOTE',         'obj_dt_note'     )
+dtd.dt_records[DT_CONFIG]           = (  0, decode_default, [ emit_config ],      lazy_obj(obj_dt_config),    'CONFIG',       'obj_dt_config'   )
 
 # temporary for older dblk dumps that had DT_TAGNET as 25.  deprecated.
-dtd.dt_records[25]                  = (  0, decode_default, [ emit_tagnet ],      obj_dt_tagnet(),    'TAGNET',       'obj_dt_tagnet'   )
-dtd.dt_records[DT_GPS_RAW_SIRFBIN]  = (  0, decode_gps_raw, [ emit_gps_raw ],     obj_dt_gps_raw(),   'GPS_RAW',      'obj_dt_gps_raw'  )
-dtd.dt_records[DT_TAGNET]           = (  0, decode_default, [ emit_tagnet ],      obj_dt_tagnet(),    'TAGNET',       'obj_dt_tagnet'   )
+dtd.dt_records[25]                  = (  0, decode_default, [ emit_tagnet ],      lazy_obj(obj_dt_tagnet),    'TAGNET',       'obj_dt_tagnet'   )
+dtd.dt_records[DT_GPS_RAW_SIRFBIN]  = (  0, decode_gps_raw, [ emit_gps_raw ],     lazy_obj(obj_dt_gps_raw),   'GPS_RAW',      'obj_dt_gps_raw'  )
+dtd.dt_records[DT_TAGNET]           = (  0, decode_default, [ emit_tagnet ],      lazy_obj(obj_dt_tagnet),    'TAGNET',       'obj_dt_tagnet'   )
@@ -30,12 +30,25 @@ the basic ability to decode.   ie.  adding new events.
 CORE_REV   = 19
 CORE_MINOR =  6
 
-from    .__init__       import __version__   as core_ver
-from    .base_objs      import __version__   as base_ver
-from    .dt_defs        import __version__   as dt_ver
-from    .core_emitters  import __version__   as ce_ver
-from    .core_headers   import __version__   as ch_ver
-from    .panic_headers  import __version__   as pi_ver
-from    .sirf_defs      import __version__   as sd_ver
-from    .sirf_emitters  import __version__   as se_ver
-from    .sirf_headers   import __version__   as sh_ver
+
+
+def core_versions():
+    '''__version__ of the core modules, dict keyed by short name
+
+    imported here, rather than at the top, so that pulling in CORE_REV
+    doesn't drag in every header and emitter module.
+    '''
+    from    .__init__       import __version__   as core_ver
+    from    .base_objs      import __version__   as base_ver
+    from    .dt_defs        import __version__   as dt_ver
+    from    .core_emitters  import __version__   as ce_ver
+    from    .core_headers   import __version__   as ch_ver
+    from    .panic_headers  import __version__   as pi_ver
+    from    .sirf_defs      import __version__   as sd_ver
+    from    .sirf_emitters  import __version__   as se_ver
+    from    .sirf_headers   import __version__   as sh_ver
+    return {
+        'core': core_ver, 'base': base_ver, 'dt': dt_ver,
+        'ce':   ce_ver,   'ch':   ch_ver,   'pi': pi_ver,
+        'sd':   sd_ver,   'se':   se_ver,   'sh': sh_ver,
+    }
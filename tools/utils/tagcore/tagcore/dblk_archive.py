@@ -0,0 +1,354 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''compressed dblk archive, chunks cut at SYNC records, with a seek table
+
+A recovered dblk stream is mostly erased (zero) sectors, SYNCs and gps
+data, it squeezes down a lot.  An archive holds the stream in chunks of
+about ARC_CHUNK bytes, each compressed on its own, and each (but the
+first of a data extent) starting on a SYNC/REBOOT record.  Holes in a
+sparse input are kept as holes, they take no space.
+
+    header      ARC_MAGIC, rev, codec, stream size, seek table offset,
+                number of chunks
+    chunks      compressed data
+    seek table  per chunk: stream offset, len, archive offset,
+                compressed len (0, hole), crc32 of the data
+
+DblkArchive reads one as the original stream, only the chunk being
+read gets decompressed (and the last few are kept).  It has the same
+interface as TagFile (data_ranges etc. describe the original), and
+TagFile hands off to it when the input is an archive, so tagdump, the
+record index and anything else reading a dblk file can be pointed at
+the archive instead.
+
+    write_archive   stream (file) -> archive
+    DblkArchive     archive -> file-like original stream
+    is_archive      does a file start with ARC_MAGIC
+    open_dblk       DblkArchive or plain file, for random access readers
+
+dblkzip (tools/utils/dblkzip) makes, extracts and lists them.
+
+lzma is only there if the python has it (python3, or backports.lzma).
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import os
+import stat
+import zlib
+import bz2
+import struct
+from   bisect       import bisect_right
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+from   dt_defs      import dt_sync_majik, quad_struct, DT_SYNC, DT_REBOOT
+
+__all__ = [
+    'DblkArchive',
+    'write_archive',
+    'is_archive',
+    'open_dblk',
+    'ARC_CODECS',
+]
+
+ARC_MAGIC   = b'TAGDBLKZ'
+ARC_REV     = 1
+ARC_CHUNK   = 256 * 1024                # stream bytes per chunk, about
+ARC_SCAN    = 64 * 1024                 # how far past ARC_CHUNK for a SYNC
+ARC_KEEP    = 4                         # decompressed chunks kept
+
+ARC_NONE    = 0
+ARC_ZLIB    = 1
+ARC_BZ2     = 2
+ARC_LZMA    = 3
+
+ARC_CODECS  = { 'none': ARC_NONE, 'zlib': ARC_ZLIB, 'bz2': ARC_BZ2,
+                'lzma': ARC_LZMA }
+
+hdr_struct   = struct.Struct('<8sHHQQI')   # magic, rev, codec, size, table, n
+entry_struct = struct.Struct('<QIQII')     # start, len, arc off, arc len, crc
+
+SYNC_MAJIK_OFFSET = 24                  # majik in a SYNC/REBOOT record
+majik_str    = quad_struct.pack(dt_sync_majik)
+rtype_struct = struct.Struct('<HH')     # len, type
+
+
+def _compress(codec, data, level):
+    if codec == ARC_ZLIB:
+        return zlib.compress(data, level)
+    if codec == ARC_BZ2:
+        return bz2.compress(data, max(level, 1))
+    if codec == ARC_LZMA:
+        return lzma.compress(data, preset = level)
+    return data
+
+
+def _decompress(codec, data):
+    if codec == ARC_ZLIB:
+        return zlib.decompress(data)
+    if codec == ARC_BZ2:
+        return bz2.decompress(data)
+    if codec == ARC_LZMA:
+        return lzma.decompress(data)
+    return data
+
+
+def is_archive(fd):
+    '''does (binary) file fd hold an archive.  Leaves fd alone.
+
+    only a regular file can be one, a tty, fifo or pipe is never
+    touched (can't seek, and a read would eat live data).
+    '''
+    try:
+        if not stat.S_ISREG(os.fstat(fd.fileno()).st_mode):
+            return False
+        pos = fd.tell()
+        fd.seek(0)
+        magic = fd.read(len(ARC_MAGIC))
+        fd.seek(pos)
+    except (IOError, OSError):
+        return False
+    return magic == ARC_MAGIC
+
+
+def sync_cut(buf, start):
+    '''offset of the first SYNC/REBOOT record at or after start, -1 if none
+
+    only a majik on a quad boundary whose record looks like a SYNC or
+    a REBOOT counts.  buf starts on a quad boundary.
+    '''
+    i = buf.find(majik_str, start + SYNC_MAJIK_OFFSET)
+    while i >= 0:
+        rec = i - SYNC_MAJIK_OFFSET
+        if i & 3 == 0 and \
+           rtype_struct.unpack_from(buf, rec)[1] in (DT_SYNC, DT_REBOOT):
+            return rec
+        i = buf.find(majik_str, i + 1)
+    return -1
+
+
+def chunks(fd, start, end, chunk = ARC_CHUNK):
+    '''generate (offset, data) covering [start, end) of fd, cut at SYNCs'''
+    buf = b''
+    pos = start                         # stream offset of buf[0]
+    while pos < end:
+        want = min(chunk + ARC_SCAN, end - pos) - len(buf)
+        if want > 0:
+            fd.seek(pos + len(buf))
+            buf += fd.read(want)
+        if not buf:
+            return                      # file shrank on us
+        if pos + len(buf) >= end and len(buf) <= chunk:
+            cut = len(buf)              # the rest of the extent
+        else:
+            cut = sync_cut(buf, chunk)
+            if cut < 0:                 # no SYNC near, cut on a sector
+                cut = max(chunk & ~511, 512) if len(buf) > chunk \
+                      else len(buf)
+        yield pos, buf[:cut]
+        pos += cut
+        buf  = buf[cut:]
+
+
+def write_archive(src, dst, codec = ARC_ZLIB, level = 6, chunk = ARC_CHUNK,
+                  verbose = 0):
+    '''compress dblk stream src (file name) to archive dst
+
+    returns (stream size, archive size, number of chunks).
+    '''
+    from tagfile import TagFile         # tagfile imports us
+
+    if codec == ARC_LZMA and lzma is None:
+        raise ValueError('lzma not available in this python')
+    with open(src, 'rb') as fd:
+        tf     = TagFile(fd)
+        size   = os.fstat(fd.fileno()).st_size
+        ranges = tf.data_ranges()
+        table  = []
+        tmp    = dst + '.tmp'
+        with open(tmp, 'wb') as out:
+            out.write(hdr_struct.pack(ARC_MAGIC, ARC_REV, codec, size, 0, 0))
+            pos = 0
+            for s, e in ranges + [ (size, size) ]:
+                if s > pos:             # hole
+                    table.append((pos, s - pos, 0, 0, 0))
+                for offset, data in chunks(fd, s, e, chunk):
+                    z = _compress(codec, data, level)
+                    table.append((offset, len(data), out.tell(), len(z),
+                                  zlib.crc32(data) & 0xffffffff))
+                    out.write(z)
+                    if verbose >= 2:
+                        print('*** arc: @{:<10d} {:7d} -> {:7d}'.format(
+                            offset, len(data), len(z)))
+                pos = e
+            table_off = out.tell()
+            for entry in table:
+                out.write(entry_struct.pack(*entry))
+            arc_size = out.tell()
+            out.seek(0)
+            out.write(hdr_struct.pack(ARC_MAGIC, ARC_REV, codec, size,
+                                      table_off, len(table)))
+        os.rename(tmp, dst)
+    return size, arc_size, len([ t for t in table if t[3] ])
+
+
+class DblkArchive(object):
+    '''an archive, read as the dblk stream it holds
+
+    file-like (read, tell, seek, name) plus the TagFile extras
+    (data_ranges, next_data, next_hole, coverage, sparse).  Holes read
+    as zeros, like they do from a sparse file.
+
+    inputs:     input   file name or (binary) file object
+    '''
+
+    def __init__(self, input):
+        super(DblkArchive, self).__init__()
+        if isinstance(input, basestring):
+            input = open(input, 'rb')
+        self.fd     = input
+        self.name   = input.name
+        self.pos    = 0
+        self.tail   = False
+        self.net_io = False
+        self.chunks = {}                # index -> data, ARC_KEEP of them
+        self.order  = []                # oldest first
+        input.seek(0)
+        magic, rev, self.codec, self.size, table_off, n = \
+            hdr_struct.unpack(input.read(hdr_struct.size))
+        if magic != ARC_MAGIC or rev != ARC_REV:
+            raise IOError('{}: not a dblk archive (rev {})'.format(
+                self.name, ARC_REV))
+        if self.codec == ARC_LZMA and lzma is None:
+            raise IOError('{}: lzma archive, no lzma in this python'.format(
+                self.name))
+        input.seek(table_off)
+        raw = input.read(n * entry_struct.size)
+        self.table  = [ entry_struct.unpack_from(raw, i * entry_struct.size)
+                        for i in range(n) ]
+        self.starts = [ t[0] for t in self.table ]
+        self.extents = []
+        for start, length, off, zlen, crc in self.table:
+            if not zlen:
+                continue
+            if self.extents and self.extents[-1][1] == start:
+                self.extents[-1] = (self.extents[-1][0], start + length)
+            else:
+                self.extents.append((start, start + length))
+        self.sparse = self.extents != [ (0, self.size) ] and self.size != 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def _chunk(self, i):
+        data = self.chunks.get(i)
+        if data is not None:
+            return data
+        start, length, off, zlen, crc = self.table[i]
+        if not zlen:
+            data = b'\0' * length
+        else:
+            self.fd.seek(off)
+            data = _decompress(self.codec, self.fd.read(zlen))
+            if len(data) != length or zlib.crc32(data) & 0xffffffff != crc:
+                raise IOError('{}: chunk @{} bad (len {}, crc)'.format(
+                    self.name, start, len(data)))
+        self.chunks[i] = data
+        self.order.append(i)
+        if len(self.order) > ARC_KEEP:
+            del self.chunks[self.order.pop(0)]
+        return data
+
+    def read(self, cnt):
+        out = []
+        while cnt > 0 and self.pos < self.size:
+            i = bisect_right(self.starts, self.pos) - 1
+            data = self._chunk(i)
+            j = self.pos - self.starts[i]
+            piece = data[j:j + cnt]
+            out.append(piece)
+            self.pos += len(piece)
+            cnt -= len(piece)
+        return b''.join(out)
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos, how = os.SEEK_SET):
+        if how == os.SEEK_CUR:
+            pos += self.pos
+        elif how == os.SEEK_END:
+            pos += self.size
+        self.pos = max(pos, 0)
+        return self.pos
+
+    def close(self):
+        self.fd.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def data_ranges(self):
+        return list(self.extents)
+
+    def next_data(self, pos):
+        for s, e in self.extents:
+            if pos < e:
+                return max(pos, s)
+        return None
+
+    def next_hole(self, pos):
+        if not self.sparse:
+            return None
+        for s, e in self.extents:
+            if s <= pos < e:
+                return e if e < self.size else None
+        return pos if pos < self.size else None
+
+    def coverage(self):
+        present = sum([ e - s for s, e in self.extents ])
+        holes   = len(self.extents) - 1 if self.extents else 0
+        if self.extents:
+            holes += (self.extents[0][0] != 0) + \
+                     (self.extents[-1][1] != self.size)
+        elif self.size:
+            holes = 1
+        return present, self.size, holes
+
+
+def open_dblk(name):
+    '''name opened for random access reads, an archive or a plain file'''
+    fd = open(name, 'rb')
+    if is_archive(fd):
+        return DblkArchive(fd)
+    return fd
+
@@ -0,0 +1,175 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''DBLK directory (dblk_dir_t) and dblk stream addressing
+
+The first sector of the DBLK area is the DBLK directory (see
+include/dblk_dir.h).  It tells us the absolute sectors the DBLK area
+occupies on the SD, [dblk_low, dblk_high] inclusive, with the directory
+itself at dblk_low and the data stream starting at dblk_low + 1.
+
+The directory doesn't say how much has been written.  Like DblkManager
+(and tagfmtsd) on the tag, we binary search for the first erased sector,
+dblk_nxt.  That is our high water mark.
+
+    DblkDir     decode/verify the directory, map absolute sectors to
+                file offsets and back, find dblk_nxt.
+
+base is the file offset of the directory sector.  0 when looking at the
+DBLK file (tagfuse, dblk/0), dblk_low * 512 for a raw image of the SD.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev6'
+
+import struct
+
+from   core_headers import obj_dblk_dir
+
+__all__ = [
+    'DblkDir',
+    'DBLK_DIR_SIG',
+    'DBLK_ID',
+    'SECTOR_SIZE',
+]
+
+SECTOR_SIZE     = 512
+DBLK_ID         = 'DBLK'
+DBLK_DIR_SIG    = 0x18961492
+DBLK_DIR_QUADS  = 9
+
+dir_quads = struct.Struct('<{}I'.format(DBLK_DIR_QUADS))
+
+erased_0s = '\x00' * SECTOR_SIZE
+erased_1s = '\xff' * SECTOR_SIZE
+
+
+def sector_erased(buf):
+    return buf == erased_0s[:len(buf)] or buf == erased_1s[:len(buf)]
+
+
+class DblkDir(object):
+    '''DBLK directory
+
+    inputs:     base    file offset of the directory sector
+
+    methods:    set         decode the directory from buf (a sector).
+                            returns True if it checks out.
+                read        read the directory from fd (at base) and set.
+                offset      absolute sector -> file offset
+                sector      file offset -> absolute sector
+                data_start  file offset of the first data sector
+                data_limit  file offset just past dblk_high
+                find_nxt    binary search for the first erased sector,
+                            returns its file offset (the high water mark)
+
+    attributes: valid, errors (list of what is wrong), low, high,
+                file_idx, obj (obj_dblk_dir, incept etc.)
+    '''
+
+    def __init__(self, base = 0):
+        super(DblkDir, self).__init__()
+        self.base     = base
+        self.obj      = obj_dblk_dir()
+        self.valid    = False
+        self.errors   = []
+        self.low      = 0
+        self.high     = 0
+        self.file_idx = 0
+
+    def set(self, buf):
+        buf = bytearray(buf)
+        self.valid  = False
+        self.errors = []
+        if len(buf) < len(self.obj):
+            self.errors.append('short, {} bytes'.format(len(buf)))
+            return False
+        self.obj.set(buf)
+        o = self.obj
+        if o['dblk_id'].val != DBLK_ID:
+            self.errors.append('id {!r}'.format(o['dblk_id'].val))
+        if o['dir_sig'].val != DBLK_DIR_SIG or o['dir_sig_a'].val != DBLK_DIR_SIG:
+            self.errors.append('sigs 0x{:08x}/0x{:08x}'.format(
+                o['dir_sig'].val, o['dir_sig_a'].val))
+        chk = sum(dir_quads.unpack_from(str(buf))) & 0xffffffff
+        if chk != 0:
+            self.errors.append('chksum 0x{:08x} (sum 0x{:08x})'.format(
+                o['chksum'].val, chk))
+        self.low      = o['dblk_low'].val
+        self.high     = o['dblk_high'].val
+        self.file_idx = o['file_idx'].val
+        if not self.errors and self.high <= self.low:
+            self.errors.append('low/high 0x{:x}/0x{:x}'.format(
+                self.low, self.high))
+        self.valid = not self.errors
+        return self.valid
+
+    def read(self, fd):
+        fd.seek(self.base)
+        return self.set(fd.read(SECTOR_SIZE))
+
+    def offset(self, blk):
+        return self.base + (blk - self.low) * SECTOR_SIZE
+
+    def sector(self, offset):
+        return (offset - self.base) / SECTOR_SIZE + self.low
+
+    def data_start(self):
+        return self.offset(self.low + 1)
+
+    def data_limit(self):
+        return self.offset(self.high + 1)
+
+    def find_nxt(self, fd, size = None):
+        '''file offset of the first erased sector (dblk_nxt)
+
+        same binary search the tag does.  Only looks at log2(sectors)
+        sectors.  size (if given) bounds the search, anything at or past
+        size counts as erased.  Returns data_limit() if full.
+        '''
+        def erased(blk):
+            off = self.offset(blk)
+            if size is not None and off >= size:
+                return True
+            fd.seek(off)
+            return sector_erased(fd.read(SECTOR_SIZE))
+
+        lower = self.low + 1
+        upper = self.high + 1                   # one past, "erased"
+        if erased(lower):
+            return self.offset(lower)
+        while upper - lower > 1:                # lower written, upper erased
+            blk = (upper - lower) / 2 + lower
+            if erased(blk):
+                upper = blk
+            else:
+                lower = blk
+        return self.offset(upper)
+
+    def __repr__(self):
+        o = self.obj
+        rt = o['incept']
+        return '{}{}  low/high: 0x{:x}/0x{:x}  incept: ' \
+               '{:04d}/{:02d}/{:02d} {:02d}:{:02d}:{:02d} UTC{}'.format(
+                   o['dblk_id'].val, self.file_idx, self.low, self.high,
+                   rt['year'].val, rt['mon'].val, rt['day'].val,
+                   rt['hr'].val, rt['min'].val, rt['sec'].val,
+                   '' if self.valid else '  <bad: {}>'.format(
+                       ', '.join(self.errors)))
@@ -26,6 +26,8 @@ stream record headers.  Includes print/display routines.
 Includes the following:
 
     - dt_records.  expose dictionary of data_type records we understand.
+    - dt_registry.  dt_records for each core revision seen, dt_select
+      switches dt_records to another revision's table.
     - indicies to dt_record fields
       DT_REQ_LEN, DT_DECODERS, etc.
     - dt types, DT_REBOOT, DT_VERSION, etc.
@@ -43,9 +45,11 @@ Includes the following:
 from   __future__         import print_function
 
 import struct
+from   base_objs    import lazy_table
 from   core_headers import obj_dt_hdr
+from   core_rev     import CORE_REV, CORE_MINOR
 
-__version__ = '0.3.3.dev1'
+__version__ = '0.3.3.dev25'
 
 cfg_print_hourly = True
 
@@ -84,6 +88,8 @@ __all__ = [
     'rtctime_str',
     'print_hourly',
     'dt_name',
+    'dt_select',
+    'rec_chksum',
     'dump_hdr',
     'print_hdr_obj',
 ]
@@ -107,12 +113,12 @@ __all__ = [
 # key and uses that to insert its vector (req_len. decode, obj, name)
 # into the dictionary.
 #
+# the object is normally a lazy_obj, it gets built the first time its
+# entry is looked up.  Only the rtypes actually seen cost anything.
+#
 # dt_count keeps track of what rtypes we have seen.
 #
 
-dt_records = {}
-dt_count   = {}
-
 DTR_REQ_LEN  = 0                        # required length
 DTR_DECODER  = 1                        # decode said rtype
 DTR_EMITTERS = 2                        # emitters for said record struct
@@ -120,6 +126,51 @@ DTR_OBJ      = 3                        # rtype obj descriptor
 DTR_NAME     = 4                        # rtype name
 DTR_OBJ_NAME = 5                        # object name
 
+dt_records = lazy_table(DTR_OBJ)
+dt_count   = {}
+
+
+# dt_registry
+#
+# a dblk stream can span firmware upgrades, each REBOOT record says
+# which core_rev/core_minor wrote what follows it.  dt_registry holds a
+# decode table (same shape as dt_records) per (core_rev, core_minor),
+# dt_records is always the one in use and dt_rev its key.  Tables are
+# built once and kept, switching is a dict lookup.
+#
+# core_minor doesn't change layouts, any table for the same core_rev
+# will do.
+#
+
+dt_rev      = (CORE_REV, CORE_MINOR)
+dt_registry = { dt_rev: dt_records }
+
+
+def dt_select(rev, minor, build = None):
+    '''make the table for rev/minor current, returns it
+
+    build(rev, minor), if given, makes a table when there isn't one.
+    returns None (and leaves dt_records alone) if there is no table.
+    '''
+    global dt_records, dt_rev
+    key = (rev, minor)
+    if key == dt_rev:
+        return dt_records
+    tbl = dt_registry.get(key)
+    if tbl is None:
+        for (r, m), t in dt_registry.items():
+            if r == rev:
+                tbl = t
+                break
+        if tbl is None and build:
+            tbl = build(rev, minor)
+        if tbl is None:
+            return None
+        dt_registry[key] = tbl
+    dt_records = tbl
+    dt_rev     = key
+    return tbl
+
 
 # all dt parts are native and little endian
 
@@ -222,10 +273,23 @@ def print_hourly(rtctime):
 
 
 def dt_name(rtype):
-    v = dt_records.get(rtype, (0, None, None, None, 'dt/' + str(rtype)))
+    # dict.get, don't build the object just to get its name
+    v = dict.get(dt_records, rtype, (0, None, None, None, 'dt/' + str(rtype)))
     return v[DTR_NAME]
 
 
+def rec_chksum(rec_buf, rlen, recsum):
+    '''16 bit byte sum of a record, less its recsum field
+
+    recsum was computed with the field 0 and then laid down, so its
+    bytes come back out before comparing with it.
+    '''
+    chksum = sum(rec_buf[:rlen])
+    chksum -= (recsum & 0xff00) >> 8
+    chksum -= (recsum & 0x00ff)
+    return chksum & 0xffff              # force to 16 bits vs. 16 bit recsum
+
+
 # header format when normal processing doesn't work (see print_record)
 hdr_format    = "{}@{:<8d} {:7d} {:>11s} {:<3d}  {:2d}  {:12s} @{} (0x{:06x}) [0x{:04x}]"
 hdr_additonal = ' @{} (0x{:06x}) [0x{:04x}]'
@@ -0,0 +1,101 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''records (events mostly) straight off the record index
+
+The record cache (rec_cache.RecCache) already knows where every good
+record in a dblk file is, its type, recnum and rtctime.  Analyzers that
+only care about a few record types (EVENTs, REBOOTs, ...) can walk that
+index instead of decoding the stream: headers come from the index, and
+only the records asked for get read, nothing gets checksummed again.
+
+The index is built by a tagdump --cache pass over the file.
+
+    index_records   (offset, fields, secs, buf) for selected records
+    event_args      (event, pcode, w, arg0-3) of a DT_EVENT record
+    rt_secs         rtctime tuple (index order) -> epoch secs
+    hdr_secs        same, for a (set) obj_dt_hdr
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import struct
+import calendar
+
+from   dt_defs      import DT_EVENT
+from   rec_cache    import RecCache, rt_keys, RC_LEN, RC_TYPE, RC_RT
+from   dblk_archive import open_dblk
+
+__all__ = [
+    'index_records',
+    'event_args',
+    'rt_secs',
+    'hdr_secs',
+    'DT_HDR_SIZE',
+]
+
+DT_HDR_SIZE = 20                        # sizeof(dt_header_t)
+event_body  = struct.Struct('<HBBIIII') # dt_event_t past the header
+
+
+def rt_secs(rt):
+    '''(sub_sec, sec, min, hr, dow, day, mon, year) -> UTC epoch secs
+
+    None if the rtctime isn't a real date (rtc never set).
+    '''
+    sub_sec, sec, mn, hr, dow, day, mon, year = rt
+    try:
+        return calendar.timegm((year, mon, day, hr, mn, sec)) + \
+            sub_sec / 32768.0
+    except (ValueError, OverflowError):
+        return None
+
+
+def hdr_secs(hdr):
+    rt = hdr['rt']
+    return rt_secs([ rt[k].val for k in rt_keys ])
+
+
+def event_args(buf):
+    '''(event, pcode, w, arg0, arg1, arg2, arg3) of a DT_EVENT record'''
+    return event_body.unpack_from(buf, DT_HDR_SIZE)
+
+
+def index_records(name, rtypes = None, read = (DT_EVENT,), cache = None):
+    '''generate (offset, fields, secs, buf) off name's record index
+
+    rtypes: record types wanted (None, all of them).  Records of a type
+    in read are read from the file and handed back as buf, all others
+    get None.  fields is the rec_cache tuple (len, type, recnum, rt,
+    recsum).  Stream order.
+    '''
+    if cache is None:
+        cache = RecCache(name)
+    with open_dblk(name) as fd:
+        for offset, fields in cache.records():
+            rtype = fields[RC_TYPE]
+            if rtypes and rtype not in rtypes:
+                continue
+            buf = None
+            if rtype in read:
+                fd.seek(offset)
+                buf = fd.read(fields[RC_LEN])
+            yield offset, fields, rt_secs(fields[RC_RT]), buf
@@ -0,0 +1,188 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''per satellite C/N0 series, built from navTrack (MID 4) packets
+
+A navTrack is week10, tow, chans, then per channel sv_id, az, el,
+state and ten C/N0 samples (100ms apart).  decode_sirf_navtrk builds a
+dict per channel for display; for a whole stream that's far too slow.
+
+While the stream is being decoded CnoTable only stashes the raw
+DT_GPS_RAW_SIRFBIN records holding navTracks, grouped by packet length.
+build() hands each group to numpy as one buffer with a structured dtype
+covering the dt header, the sirfbin header and every channel, so times,
+angles and C/N0s all come out as arrays.  One row per tracked channel
+(sv_id non-zero).
+
+    CnoTable        accumulate navTracks, build/write per SV series
+    navtrk_dtype    one DT_GPS_RAW_SIRFBIN navTrack record, n channels
+
+requires numpy.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev24'
+
+import numpy as np
+
+from   misc_utils   import write_columns
+from   rt_time      import rtctime_dtype, rt_epoch
+
+__all__ = [
+    'CnoTable',
+    'navtrk_dtype',
+    'cno_dtype',
+    'MID_NAV_TRACK',
+]
+
+MID_NAV_TRACK   = 4
+NAVTRK_CHANS    = 12                    # what the gsd4e sends
+GPS_RAW_HDR     = 28                    # sizeof(dt_gps_t)
+NAVTRK_FIXED    = 8                     # mid, week10, tow, chans
+NAVTRK_CHAN     = 15                    # per channel
+
+chan_dtype = np.dtype([
+    ('sv_id',   'u1'),
+    ('az23',    'u1'),                  # az * 2/3
+    ('el2',     'u1'),                  # el * 2
+    ('state',   '>u2'),
+    ('cno',     'u1', (10,)),
+])
+
+
+def navtrk_dtype(chans = NAVTRK_CHANS):
+    '''dt_gps_t + sirfbin navTrack with chans channels, one record'''
+    return np.dtype([
+        ('len',     '<u2'),
+        ('dtype',   '<u2'),
+        ('recnum',  '<u4'),
+        ('rt',      rtctime_dtype),
+        ('recsum',  '<u2'),
+        ('mark',    '<u4'),
+        ('chip',    'u1'),
+        ('dir',     'u1'),
+        ('pad',     '<u2'),
+        ('start',   '>u2'),             # sirfbin, big endian from here
+        ('plen',    '>u2'),
+        ('mid',     'u1'),
+        ('week10',  '>u2'),
+        ('tow',     '>u4'),             # secs * 100
+        ('chans',   'u1'),
+        ('chan',    chan_dtype, (chans,)),
+    ])
+
+
+cno_dtype = np.dtype([
+    ('offset',  np.int64),              # file offset of the record
+    ('recnum',  np.uint32),             # dblk record number
+    ('time',    np.float64),            # record rtctime, epoch secs
+    ('week10',  np.uint16),
+    ('tow',     np.float64),            # secs
+    ('sv_id',   np.uint8),
+    ('az',      np.float32),            # deg
+    ('el',      np.float32),            # deg
+    ('state',   np.uint16),
+] + [ ('cno{}'.format(i), np.uint8) for i in range(10) ] + [
+    ('cno_avg', np.float32),            # dB-Hz, mean of cno0-9
+])
+
+
+class CnoTable(object):
+    '''navTrack accumulator
+
+    add_gps_raw is handed each decoded DT_GPS_RAW_SIRFBIN record, the
+    raw record buffer, and keeps the navTracks that checked out.
+    build() returns every tracked channel as a numpy structured array
+    (cno_dtype), stream order; by_sv() splits that up per satellite.
+    Times are corrected with clock (rt_time Drift or DriftModel) if set.
+    '''
+
+    def __init__(self):
+        super(CnoTable, self).__init__()
+        self.groups = {}                # payload len -> ([offset], [bytes])
+        self.clock  = None              # rtc correction
+
+    def __len__(self):
+        return sum([ len(o) for o, r in self.groups.values() ])
+
+    def add_gps_raw(self, offset, buf, obj):
+        '''stash the navTrack (if that's what it is) in buf
+
+        obj is the obj_dt_gps_raw decode_gps_raw just set, bad packets
+        (obj.sirf_err) are skipped.
+        '''
+        if obj.sirf_err or obj['sirf_hdr']['mid'].val != MID_NAV_TRACK:
+            return
+        plen = obj['sirf_hdr']['len'].val
+        offs, recs = self.groups.setdefault(plen, ([], []))
+        offs.append(offset)
+        recs.append(bytes(buf[:GPS_RAW_HDR + 4 + plen]))
+
+    def build(self):
+        '''table (structured array, cno_dtype) of every tracked channel'''
+        parts = []
+        for plen, (offs, recs) in self.groups.items():
+            chans = (plen - NAVTRK_FIXED) / NAVTRK_CHAN
+            if chans <= 0 or plen != NAVTRK_FIXED + chans * NAVTRK_CHAN:
+                continue                # not a navTrack we understand
+            recs = np.frombuffer(b''.join(recs), dtype = navtrk_dtype(chans))
+            chan = recs['chan']
+            t = np.zeros(chan.shape, dtype = cno_dtype)
+            t['offset'] = np.asarray(offs, dtype = np.int64)[:, None]
+            t['recnum'] = recs['recnum'][:, None]
+            t['time']   = rt_epoch(recs['rt'])[:, None]
+            t['week10'] = recs['week10'][:, None]
+            t['tow']    = recs['tow'][:, None] / 100.0
+            t['sv_id']  = chan['sv_id']
+            t['az']     = chan['az23'] * 1.5
+            t['el']     = chan['el2'] / 2.0
+            t['state']  = chan['state']
+            cno = chan['cno']
+            for i in range(10):
+                t['cno{}'.format(i)] = cno[:, :, i]
+            t['cno_avg'] = cno.mean(axis = 2)
+            parts.append(t[chan['sv_id'] != 0])
+        if not parts:
+            return np.zeros(0, dtype = cno_dtype)
+        table = np.concatenate(parts)
+        if self.clock:
+            table['time'] = self.clock(table['time'], table['offset'])
+        return table[np.argsort(table['offset'], kind = 'mergesort')]
+
+    def by_sv(self, table = None):
+        '''{sv_id: table} from build()'''
+        if table is None:
+            table = self.build()
+        order = np.argsort(table['sv_id'], kind = 'mergesort')
+        table = table[order]
+        svs, starts = np.unique(table['sv_id'], return_index = True)
+        ends = list(starts[1:]) + [ len(table) ]
+        return dict((int(sv), table[s:e]) for sv, s, e in zip(svs, starts, ends))
+
+    def write(self, fname):
+        '''one series per SV, <base>_sv<NN><ext>.  returns {sv_id: rows}'''
+        base, dot, ext = fname.rpartition('.')
+        if not dot:
+            base, ext = fname, 'csv'
+        counts = {}
+        for sv, table in sorted(self.by_sv().items()):
+            write_columns('{}_sv{:02d}.{}'.format(base, sv, ext), table)
+            counts[sv] = len(table)
+        return counts
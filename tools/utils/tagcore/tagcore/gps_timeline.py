@@ -0,0 +1,248 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''gps monitor state timeline, from GPS_MON_MINOR/MAJOR events
+
+Every gps monitor state change is logged as an EVENT, GPS_MON_MINOR or
+GPS_MON_MAJOR, arg0 old state, arg1 new state, arg2 the monitor event
+that caused it.  GpsTimeline replays them into intervals, one per
+state visited:
+
+    kind        MINOR (0) or MAJOR (1)
+    state       gps_mon_minors/majors
+    start, end  epoch secs
+    duration    secs
+    trigger     monitor event that got us into the state
+    boot        which boot (REBOOTs seen before it)
+    ended       END_EVENT, END_REBOOT (cut short), END_DATA (still open)
+
+A REBOOT ends whatever was open at the last record seen before it.  The
+first change after a reboot also gives the interval of its old state,
+from the REBOOT.
+
+state_time() adds up the time spent in each state per hour (intervals
+are split on hour boundaries) or per boot, collect/mpm/standby time is
+where the gps power goes.
+
+Fed either from a decode pass (tagdump --gps_mon) or, with no decoding
+at all, off the record index (timeline_from_index, dblkstats --gps_mon).
+
+requires numpy.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import numpy as np
+
+from   misc_utils   import write_columns
+from   dt_defs      import DT_EVENT, DT_REBOOT
+from   core_headers import GPS_MON_MINOR, GPS_MON_MAJOR
+from   gps_mon      import gps_mon_minors, gps_mon_majors
+from   gps_mon      import gps_mon_minor_name, gps_mon_major_name
+from   rec_cache    import RC_TYPE, RC_RECNUM
+from   event_index  import index_records, event_args
+
+__all__ = [
+    'GpsTimeline',
+    'state_time',
+    'timeline_from_index',
+    'MINOR',
+    'MAJOR',
+]
+
+MINOR       = 0
+MAJOR       = 1
+
+END_EVENT   = 0                         # next state change
+END_REBOOT  = 1                         # cut short by a REBOOT
+END_DATA    = 2                         # end of the data, still open
+
+HOUR        = 3600.0
+
+interval_dtype = np.dtype([
+    ('kind',     np.uint8),
+    ('state',    np.uint8),
+    ('start',    np.float64),           # epoch secs
+    ('end',      np.float64),
+    ('duration', np.float64),
+    ('trigger',  np.uint8),             # gps_mon_events
+    ('boot',     np.uint32),
+    ('ended',    np.uint8),
+    ('offset',   np.int64),             # record that started it
+    ('recnum',   np.uint32),
+])
+
+minor_states = sorted([ k for k in gps_mon_minors if isinstance(k, int) ])
+major_states = sorted([ k for k in gps_mon_majors if isinstance(k, int) ])
+
+
+class GpsTimeline(object):
+    '''gps monitor state replay
+
+    note() every record's time (or at least the ones before a REBOOT),
+    reboot() on REBOOTs and event() on GPS_MON_MINOR/MAJOR, in stream
+    order.  build() closes anything still open and returns the
+    intervals (interval_dtype) by start time, write() also writes them
+    and the per hour/boot sums out.  clock (rt_time Drift or
+    DriftModel), if set, corrects start/end.
+    '''
+
+    def __init__(self):
+        super(GpsTimeline, self).__init__()
+        self.rows       = []
+        self.cur        = [ None, None ]    # open interval, per kind
+        self.boot       = 0
+        self.boot_start = None          # secs of the last REBOOT
+        self.boot_rec   = (0, 0)        # its offset, recnum
+        self.last       = None          # secs of the last record
+        self.mismatches = 0             # old state wasn't what we had
+        self.clock      = None          # rtc correction
+
+    def __len__(self):
+        return len(self.rows)
+
+    def note(self, secs):
+        if secs is not None:
+            self.last = secs
+
+    def _close(self, kind, end, how):
+        cur = self.cur[kind]
+        if cur is None:
+            return
+        state, start, trigger, boot, offset, recnum = cur
+        if end is None or end < start:
+            end = start
+        self.rows.append((kind, state, start, end, end - start, trigger,
+                          boot, how, offset, recnum))
+        self.cur[kind] = None
+
+    def reboot(self, secs, offset = 0, recnum = 0):
+        self._close(MINOR, self.last, END_REBOOT)
+        self._close(MAJOR, self.last, END_REBOOT)
+        self.boot      += 1
+        self.boot_start = secs
+        self.boot_rec   = (offset, recnum)
+        self.note(secs)
+
+    def event(self, secs, event, old, new, mon_ev, offset = 0, recnum = 0):
+        if secs is None:
+            return
+        kind = MINOR if event == GPS_MON_MINOR else MAJOR
+        cur  = self.cur[kind]
+        if cur is None:
+            if self.boot_start is not None:
+                self.cur[kind] = (old, self.boot_start, 0, self.boot) + \
+                                 self.boot_rec
+        elif cur[0] != old:
+            self.mismatches += 1
+        self._close(kind, secs, END_EVENT)
+        self.cur[kind] = (new, secs, mon_ev, self.boot, offset, recnum)
+        self.note(secs)
+
+    def build(self):
+        self._close(MINOR, self.last, END_DATA)
+        self._close(MAJOR, self.last, END_DATA)
+        table = np.array(self.rows, dtype = interval_dtype) if self.rows \
+                else np.zeros(0, dtype = interval_dtype)
+        if self.clock:
+            table['start']    = self.clock(table['start'], table['offset'])
+            table['end']      = self.clock(table['end'], table['offset'])
+            table['duration'] = table['end'] - table['start']
+        return table[np.argsort(table['start'], kind = 'mergesort')]
+
+    def write(self, fname):
+        '''intervals to fname, minor state secs to <base>_hour/_boot<ext>
+
+        returns the interval table.
+        '''
+        table = self.build()
+        base, dot, ext = fname.rpartition('.')
+        if not dot:
+            base, ext = fname, 'csv'
+        write_columns(fname, table)
+        write_columns('{}_hour.{}'.format(base, ext), state_time(table))
+        write_columns('{}_boot.{}'.format(base, ext),
+                      state_time(table, by = 'boot'))
+        return table
+
+
+def state_time(table, kind = MINOR, by = 'hour'):
+    '''secs spent in each state, per hour (UTC) or per boot
+
+    returns a structured array, first column hour (epoch secs of the
+    hour) or boot, then one column of secs per state (by name).
+    '''
+    states = minor_states if kind == MINOR else major_states
+    name   = gps_mon_minor_name if kind == MINOR else gps_mon_major_name
+    t      = table[(table['kind'] == kind) & (table['duration'] > 0) &
+                   np.in1d(table['state'], states)]
+    sidx   = np.searchsorted(states, t['state'])
+
+    if by == 'boot':
+        keys = np.unique(t['boot'])
+        kidx = np.searchsorted(keys, t['boot'])
+        secs = np.zeros((len(keys), len(states)))
+        np.add.at(secs, (kidx, sidx), t['duration'])
+        key_col = ('boot', np.uint32)
+    else:
+        h0 = np.floor(t['start'] / HOUR)
+        h1 = np.floor(t['end']   / HOUR)
+        h_lo = h0.min() if len(t) else 0
+        keys = np.arange(h_lo, h1.max() + 1) if len(t) else np.zeros(0)
+        secs = np.zeros((len(keys), len(states)))
+        one  = h0 == h1                 # most of them, inside one hour
+        np.add.at(secs, ((h0[one] - h_lo).astype(np.int64), sidx[one]),
+                  t['duration'][one])
+        for i in np.nonzero(~one)[0]:   # split on hour boundaries
+            start, end = t['start'][i], t['end'][i]
+            for h in np.arange(h0[i], h1[i] + 1):
+                lo = max(start, h * HOUR)
+                hi = min(end, (h + 1) * HOUR)
+                secs[int(h - h_lo), sidx[i]] += hi - lo
+        keys = keys * HOUR
+        key_col = ('hour', np.float64)
+
+    out = np.zeros(len(keys), dtype = [ key_col ] +
+                   [ (name(s), np.float64) for s in states ])
+    out[key_col[0]] = keys
+    for i, s in enumerate(states):
+        out[name(s)] = secs[:, i]
+    return out
+
+
+def timeline_from_index(name, cache = None):
+    '''GpsTimeline for dblk file name, off its record index'''
+    tl = GpsTimeline()
+    for offset, fields, secs, buf in index_records(name, cache = cache):
+        rtype = fields[RC_TYPE]
+        if rtype == DT_REBOOT:
+            tl.reboot(secs, offset, fields[RC_RECNUM])
+        elif rtype == DT_EVENT:
+            event, pcode, w, arg0, arg1, arg2, arg3 = event_args(buf)
+            if event in (GPS_MON_MINOR, GPS_MON_MAJOR):
+                tl.event(secs, event, arg0, arg1, arg2,
+                         offset, fields[RC_RECNUM])
+            else:
+                tl.note(secs)
+        else:
+            tl.note(secs)
+    return tl
+
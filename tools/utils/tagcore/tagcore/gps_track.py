@@ -0,0 +1,237 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''gps track table, built from navData (2) and geoData (41) fixes
+
+While the stream is being decoded we only stash the raw integers from
+each fix.  Conversion to engineering units (and ECEF to geodetic for
+navData) is done in bulk using numpy when the table is built.
+
+    ecef_to_geodetic    ECEF x/y/z (m) -> lat/lon (deg), alt (m)
+    ecef_vel_to_enu     ECEF vel -> east/north/up (m/s)
+    TrackTable          accumulate fixes, build/write the track table
+
+requires numpy.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev19'
+
+import numpy as np
+
+from   misc_utils   import write_columns
+from   sirf_defs    import *
+import sirf_defs    as     sirf
+
+__all__ = [
+    'ecef_to_geodetic',
+    'ecef_vel_to_enu',
+    'TrackTable',
+    'MID_NAV_DATA',
+    'MID_GEO_DATA',
+]
+
+MID_NAV_DATA = 2
+MID_GEO_DATA = 41
+
+# WGS84 ellipsoid
+WGS84_A   = 6378137.0
+WGS84_F   = 1 / 298.257223563
+WGS84_B   = WGS84_A * (1 - WGS84_F)
+WGS84_E2  = WGS84_F * (2 - WGS84_F)                     # first ecc^2
+WGS84_EP2 = (WGS84_A**2 - WGS84_B**2) / WGS84_B**2      # second ecc^2
+
+
+def ecef_to_geodetic(x, y, z):
+    '''convert ECEF x/y/z (meters) to geodetic lat/lon/alt
+
+    closed form (Heikkinen/Zhu), no iteration, so the whole array goes
+    through numpy in one shot.  Good to well under a mm for anything
+    near the surface of the earth.
+
+    input:  x, y, z     array_like, meters
+    output: lat, lon    ndarray, degrees
+            alt         ndarray, meters above the WGS84 ellipsoid
+    '''
+    a, b, e2, ep2 = WGS84_A, WGS84_B, WGS84_E2, WGS84_EP2
+    x = np.asarray(x, dtype = np.float64)
+    y = np.asarray(y, dtype = np.float64)
+    z = np.asarray(z, dtype = np.float64)
+
+    r2 = x * x + y * y
+    r  = np.sqrt(r2)
+    z2 = z * z
+    F  = 54.0 * b * b * z2
+    G  = r2 + (1 - e2) * z2 - e2 * (a * a - b * b)
+    c  = e2 * e2 * F * r2 / (G * G * G)
+    s  = np.cbrt(1 + c + np.sqrt(c * c + 2 * c))
+    P  = F / (3 * (s + 1 / s + 1)**2 * G * G)
+    Q  = np.sqrt(1 + 2 * e2 * e2 * P)
+    r0 = -(P * e2 * r) / (1 + Q) + \
+         np.sqrt(np.maximum(0.5 * a * a * (1 + 1 / Q) -
+                            P * (1 - e2) * z2 / (Q * (1 + Q)) -
+                            0.5 * P * r2, 0))
+    t  = (r - e2 * r0)**2
+    U  = np.sqrt(t + z2)
+    V  = np.sqrt(t + (1 - e2) * z2)
+    z0 = b * b * z / (a * V)
+
+    alt = U * (1 - b * b / (a * V))
+    lat = np.degrees(np.arctan2(z + ep2 * z0, r))
+    lon = np.degrees(np.arctan2(y, x))
+    return lat, lon, alt
+
+
+def ecef_vel_to_enu(lat, lon, vx, vy, vz):
+    '''rotate ECEF velocities into the local east/north/up frame
+
+    input:  lat, lon    array_like, degrees (see ecef_to_geodetic)
+            vx, vy, vz  array_like, m/s
+    output: ve, vn, vu  ndarray, m/s
+    '''
+    phi = np.radians(lat)
+    lam = np.radians(lon)
+    sphi, cphi = np.sin(phi), np.cos(phi)
+    slam, clam = np.sin(lam), np.cos(lam)
+    vx = np.asarray(vx, dtype = np.float64)
+    vy = np.asarray(vy, dtype = np.float64)
+    vz = np.asarray(vz, dtype = np.float64)
+
+    ve = -slam * vx + clam * vy
+    vn = -sphi * clam * vx - sphi * slam * vy + cphi * vz
+    vu =  cphi * clam * vx + cphi * slam * vy + sphi * vz
+    return ve, vn, vu
+
+
+# track table layout, one row per fix.  Both navData and geoData
+# fixes end up in the same columns.
+
+track_dtype = np.dtype([
+    ('offset',  np.int64),              # file offset of the record
+    ('recnum',  np.uint32),             # dblk record number
+    ('mid',     np.uint8),              # 2 (navData) or 41 (geoData)
+    ('week',    np.uint16),             # navData: week10, geo: extended
+    ('tow',     np.float64),            # secs
+    ('lat',     np.float64),            # deg
+    ('lon',     np.float64),            # deg
+    ('alt',     np.float64),            # m, ellipsoid
+    ('speed',   np.float64),            # m/s, over ground
+    ('heading', np.float64),            # deg true, 0-360
+    ('climb',   np.float64),            # m/s
+    ('nsats',   np.uint8),
+    ('valid',   np.bool_),
+])
+
+
+class TrackTable(object):
+    '''GPS track accumulator
+
+    add_gps_raw is handed each decoded DT_GPS_RAW_SIRFBIN record and
+    pulls the raw values out of navData and geoData fixes.  build()
+    does all the unit/coordinate conversion at once and returns the
+    track as a numpy structured array (track_dtype) in stream order.
+    '''
+
+    def __init__(self):
+        super(TrackTable, self).__init__()
+        self.nav_rows = []
+        self.geo_rows = []
+        self.bad      = 0               # gps_raw records skipped, bad packet
+
+    def __len__(self):
+        return len(self.nav_rows) + len(self.geo_rows)
+
+    def add_gps_raw(self, offset, obj):
+        '''stash the fix (if any) from a decoded gps_raw record
+
+        obj is the obj_dt_gps_raw that was just decoded (decode_gps_raw),
+        the mid's object in mid_table holds the sirfbin payload.  Packets
+        that didn't check out (obj.sirf_err) never got decoded, skipped.
+        '''
+        if obj.sirf_err:
+            self.bad += 1
+            return
+        mid    = obj['sirf_hdr']['mid'].val
+        recnum = obj['gps_hdr']['hdr']['recnum'].val
+        if mid == MID_NAV_DATA:
+            self.add_nav(offset, recnum, sirf.mid_table[mid][MID_OBJECT])
+        elif mid == MID_GEO_DATA:
+            self.add_geo(offset, recnum, sirf.mid_table[mid][MID_OBJECT])
+
+    def add_nav(self, offset, recnum, nav):
+        '''nav is a decoded obj_sirf_nav'''
+        self.nav_rows.append((offset, recnum,
+            nav['week10'].val, nav['tow'].val,
+            nav['xpos'].val, nav['ypos'].val, nav['zpos'].val,
+            nav['xvel'].val, nav['yvel'].val, nav['zvel'].val,
+            nav['nsats'].val, nav['mode1'].val))
+
+    def add_geo(self, offset, recnum, geo):
+        '''geo is a decoded obj_sirf_geo'''
+        self.geo_rows.append((offset, recnum,
+            geo['week_x'].val, geo['tow'].val,
+            geo['lat'].val, geo['lon'].val, geo['alt_elipsoid'].val,
+            geo['sog'].val, geo['cog'].val, geo['climb'].val,
+            geo['nsats'].val, geo['nav_valid'].val))
+
+    def build(self):
+        nav = np.array(self.nav_rows, dtype = np.int64).reshape(-1, 12)
+        geo = np.array(self.geo_rows, dtype = np.int64).reshape(-1, 12)
+        table = np.zeros(len(nav) + len(geo), dtype = track_dtype)
+
+        # navData: ECEF m, vel m/s * 8, tow s * 100, mode1 bits 0-2 fix type
+        t = table[:len(nav)]
+        t['offset'], t['recnum'] = nav[:, 0], nav[:, 1]
+        t['mid']     = MID_NAV_DATA
+        t['week']    = nav[:, 2]
+        t['tow']     = nav[:, 3] / 100.0
+        lat, lon, alt = ecef_to_geodetic(nav[:, 4], nav[:, 5], nav[:, 6])
+        ve, vn, vu    = ecef_vel_to_enu(lat, lon, nav[:, 7] / 8.0,
+                                        nav[:, 8] / 8.0, nav[:, 9] / 8.0)
+        t['lat'], t['lon'], t['alt'] = lat, lon, alt
+        t['speed']   = np.hypot(ve, vn)
+        t['heading'] = np.degrees(np.arctan2(ve, vn)) % 360.0
+        t['climb']   = vu
+        t['nsats']   = nav[:, 10]
+        t['valid']   = (nav[:, 11] & 7) != 0
+
+        # geoData: lat/lon deg * 1e7, alt cm, sog cm/s, cog deg * 100,
+        #          climb cm/s, tow ms, nav_valid 0 says good fix.
+        t = table[len(nav):]
+        t['offset'], t['recnum'] = geo[:, 0], geo[:, 1]
+        t['mid']     = MID_GEO_DATA
+        t['week']    = geo[:, 2]
+        t['tow']     = geo[:, 3] / 1000.0
+        t['lat']     = geo[:, 4] / 1e7
+        t['lon']     = geo[:, 5] / 1e7
+        t['alt']     = geo[:, 6] / 100.0
+        t['speed']   = geo[:, 7] / 100.0
+        t['heading'] = geo[:, 8] / 100.0
+        t['climb']   = geo[:, 9] / 100.0
+        t['nsats']   = geo[:, 10]
+        t['valid']   = geo[:, 11] == 0
+
+        return table[np.argsort(table['offset'], kind = 'mergesort')]
+
+    def write(self, fname):
+        '''build and write the track table, returns number of fixes'''
+        table = self.build()
+        write_columns(fname, table)
+        return len(table)
@@ -0,0 +1,306 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''time to first fix, per gps cycle
+
+A cycle starts with a GPS_TURN_ON event and runs to GPS_TURN_OFF, the
+next GPS_TURN_ON or a REBOOT.  Along the way the first of each of the
+milestone events is noted, secs since the turn on:
+
+    boot        GPS_BOOT
+    first       GPS_FIRST       (gsd4e: first char, sirf3: first fix)
+    first_lock  GPS_FIRST_LOCK  (gps monitor, SATS_STARTUP -> CYCLE)
+    fast        GPS_FAST
+    sats_2      GPS_SATS_2
+    sats_7      GPS_SATS_7
+    sats_41     GPS_SATS_41
+    mpm         GPS_MPM
+
+ttff is the first of the fix events (FIX_EVENTS, GPS_FIRST_LOCK unless
+told otherwise; older sirf3 streams want GPS_FIRST).  navTracks (MID 4)
+seen in the cycle give the satellites tracked at the fix (last navTrack
+before it) and the most tracked.
+
+ttff_hist() bins ttffs, one column per tag and one for all of them.
+
+Fed either from a decode pass (tagdump --ttff) or off the record index
+(ttff_from_index, dblkstats --ttff).
+
+requires numpy.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import numpy as np
+
+from   misc_utils   import write_columns
+from   dt_defs      import DT_EVENT, DT_REBOOT, DT_GPS_RAW_SIRFBIN
+from   core_headers import event_names
+from   sirf_defs    import SIRF_HDR_SIZE, packet_len
+from   rec_cache    import RC_TYPE, RC_RECNUM
+from   event_index  import index_records, event_args
+from   gps_cno      import MID_NAV_TRACK, GPS_RAW_HDR, NAVTRK_FIXED, NAVTRK_CHAN
+
+__all__ = [
+    'TtffTable',
+    'ttff_hist',
+    'ttff_stats',
+    'stats_str',
+    'ttff_from_index',
+    'navtrk_sats',
+    'FIX_EVENTS',
+]
+
+event_ids = dict((v, k) for k, v in event_names.items())
+
+GPS_TURN_ON  = event_ids['GPS_TURN_ON']
+GPS_TURN_OFF = event_ids['GPS_TURN_OFF']
+
+# milestone column -> event
+milestones = [
+    ('boot',        event_ids['GPS_BOOT']),
+    ('first',       event_ids['GPS_FIRST']),
+    ('first_lock',  event_ids['GPS_FIRST_LOCK']),
+    ('fast',        event_ids['GPS_FAST']),
+    ('sats_2',      event_ids['GPS_SATS_2']),
+    ('sats_7',      event_ids['GPS_SATS_7']),
+    ('sats_41',     event_ids['GPS_SATS_41']),
+    ('mpm',         event_ids['GPS_MPM']),
+]
+milestone_col = dict((ev, col) for col, ev in milestones)
+
+FIX_EVENTS  = (event_ids['GPS_FIRST_LOCK'],)
+
+END_OFF     = 0                         # GPS_TURN_OFF
+END_ON      = 1                         # turned on again, no turn off
+END_REBOOT  = 2
+END_DATA    = 3                         # end of the data, still on
+
+HIST_WIDTH  = 10                        # secs per bin
+HIST_TOP    = 300                       # last bin is everything above
+
+cycle_dtype = np.dtype([
+    ('start',      np.float64),         # GPS_TURN_ON, epoch secs
+    ('ttff',       np.float64),         # secs, nan no fix
+    ('on',         np.float64),         # secs to the end of the cycle
+] + [ (col, np.float64) for col, ev in milestones ] + [
+    ('fw_lock',    np.uint32),          # GPS_FIRST_LOCK arg0 (MajorTimer)
+    ('sats_fix',   np.uint8),           # tracked at the fix
+    ('sats_max',   np.uint8),           # most tracked, whole cycle
+    ('navtracks',  np.uint32),
+    ('reboot',     np.uint32),          # REBOOTs seen before it
+    ('ended',      np.uint8),
+    ('offset',     np.int64),           # GPS_TURN_ON record
+    ('recnum',     np.uint32),
+])
+
+
+def navtrk_sats(buf):
+    '''satellites tracked in a DT_GPS_RAW_SIRFBIN record
+
+    None if it isn't a navTrack (or the packet doesn't check out).
+    '''
+    b = bytearray(buf[:GPS_RAW_HDR + SIRF_HDR_SIZE + NAVTRK_FIXED])
+    if len(b) < GPS_RAW_HDR + SIRF_HDR_SIZE + NAVTRK_FIXED or \
+       b[GPS_RAW_HDR + SIRF_HDR_SIZE] != MID_NAV_TRACK:
+        return None
+    plen = packet_len(buf, GPS_RAW_HDR)
+    if plen is None or plen <= 0:
+        return None
+    chans = b[-1]
+    chan0 = GPS_RAW_HDR + SIRF_HDR_SIZE + NAVTRK_FIXED
+    if chan0 + chans * NAVTRK_CHAN > len(buf):
+        return None
+    b = bytearray(buf[chan0:chan0 + chans * NAVTRK_CHAN:NAVTRK_CHAN])
+    return len(b) - b.count(b'\0')      # sv_id non-zero
+
+
+class TtffTable(object):
+    '''gps cycle accumulator
+
+    In stream order: note() record times, reboot() on REBOOTs, event()
+    on EVENTs and nav_sats() with navtrk_sats() of navTracks.  build()
+    returns the cycles (cycle_dtype), start corrected with clock (rt_time
+    Drift or DriftModel) if set.
+    '''
+
+    def __init__(self, fix_events = FIX_EVENTS):
+        super(TtffTable, self).__init__()
+        self.fix_events = fix_events
+        self.rows       = []
+        self.cur        = None          # cycle being built, a dict
+        self.reboots    = 0
+        self.last       = None          # secs of the last record
+        self.orphans    = 0             # milestones outside of a cycle
+        self.clock      = None          # rtc correction
+
+    def __len__(self):
+        return len(self.rows)
+
+    def note(self, secs):
+        if secs is not None:
+            self.last = secs
+
+    def _close(self, end, how):
+        cur = self.cur
+        if cur is None:
+            return
+        if end is None or end < cur['start']:
+            end = cur['start']
+        cur['on']    = end - cur['start']
+        cur['ended'] = how
+        self.rows.append(tuple([ cur[n] for n in cycle_dtype.names ]))
+        self.cur = None
+
+    def reboot(self, secs):
+        self._close(self.last, END_REBOOT)
+        self.reboots += 1
+        self.note(secs)
+
+    def event(self, secs, event, arg0 = 0, offset = 0, recnum = 0):
+        if secs is None:
+            return
+        self.note(secs)
+        if event == GPS_TURN_ON:
+            self._close(secs, END_ON)
+            cur = dict((n, 0) for n in cycle_dtype.names)
+            for col, ev in milestones:
+                cur[col] = np.nan
+            cur.update(start = secs, ttff = np.nan, reboot = self.reboots,
+                       offset = offset, recnum = recnum)
+            self.cur = cur
+            return
+        if event == GPS_TURN_OFF:
+            self._close(secs, END_OFF)
+            return
+        col = milestone_col.get(event)
+        if col is None:
+            return
+        cur = self.cur
+        if cur is None:
+            self.orphans += 1
+            return
+        if not np.isnan(cur[col]):
+            return                      # only the first counts
+        cur[col] = secs - cur['start']
+        if col == 'first_lock':
+            cur['fw_lock'] = arg0
+        if event in self.fix_events and np.isnan(cur['ttff']):
+            cur['ttff'] = cur[col]
+
+    def nav_sats(self, secs, sats):
+        self.note(secs)
+        cur = self.cur
+        if cur is None or sats is None:
+            return
+        cur['navtracks'] += 1
+        cur['sats_max']   = max(cur['sats_max'], sats)
+        if np.isnan(cur['ttff']):
+            cur['sats_fix'] = sats
+
+    def build(self):
+        self._close(self.last, END_DATA)
+        if not self.rows:
+            return np.zeros(0, dtype = cycle_dtype)
+        table = np.array(self.rows, dtype = cycle_dtype)
+        if self.clock:
+            table['start'] = self.clock(table['start'], table['offset'])
+        return table
+
+    def write(self, fname, label = 'ttff'):
+        '''cycles to fname, histogram to <base>_hist<ext>
+
+        returns the cycle table.
+        '''
+        table = self.build()
+        base, dot, ext = fname.rpartition('.')
+        if not dot:
+            base, ext = fname, 'csv'
+        write_columns(fname, table)
+        write_columns('{}_hist.{}'.format(base, ext),
+                      ttff_hist([ (label, table) ]))
+        return table
+
+
+def ttff_hist(tables, width = HIST_WIDTH, top = HIST_TOP):
+    '''ttff histogram, [ (label, cycle table) ] -> structured array
+
+    columns lo, hi (secs, the last bin's hi is inf), a count per label
+    and, for more than one, all.  Cycles with no fix aren't counted.
+    '''
+    edges = np.append(np.arange(0, top + width, width, dtype = np.float64),
+                      np.inf)
+    cols  = [ (label, table['ttff']) for label, table in tables ]
+    if len(tables) > 1:
+        cols.append(('all', np.concatenate([ t for l, t in cols ])))
+    out = np.zeros(len(edges) - 1, dtype = [ ('lo', np.float64),
+                                             ('hi', np.float64) ] +
+                   [ (label, np.uint32) for label, t in cols ])
+    out['lo'] = edges[:-1]
+    out['hi'] = edges[1:]
+    for label, ttff in cols:
+        out[label] = np.histogram(ttff[~np.isnan(ttff)], bins = edges)[0]
+    return out
+
+
+def ttff_stats(table):
+    '''(cycles, fixed, median, p90, max) ttff secs, None if no fixes'''
+    ttff = table['ttff'][~np.isnan(table['ttff'])]
+    if not len(ttff):
+        return len(table), 0, None, None, None
+    return (len(table), len(ttff), np.median(ttff),
+            np.percentile(ttff, 90), ttff.max())
+
+
+def stats_str(table):
+    cycles, fixed, med, p90, top = ttff_stats(table)
+    s = '{} cycles, {} fixed'.format(cycles, fixed)
+    if fixed:
+        s += ', ttff median {:.1f}s  p90 {:.1f}s  max {:.1f}s'.format(
+            med, p90, top)
+    sats = table['sats_fix'][~np.isnan(table['ttff']) & (table['navtracks'] > 0)]
+    if len(sats):
+        s += ', sats at fix {:.1f}'.format(sats.mean())
+    return s
+
+
+def ttff_from_index(name, sats = False, fix_events = FIX_EVENTS,
+                    cache = None):
+    '''TtffTable for dblk file name, off its record index
+
+    sats also reads the GPS_RAW records for navTrack satellite counts.
+    '''
+    tt   = TtffTable(fix_events)
+    read = (DT_EVENT, DT_GPS_RAW_SIRFBIN) if sats else (DT_EVENT,)
+    for offset, fields, secs, buf in index_records(name, read = read,
+                                                   cache = cache):
+        rtype = fields[RC_TYPE]
+        if rtype == DT_EVENT:
+            event, pcode, w, arg0, arg1, arg2, arg3 = event_args(buf)
+            tt.event(secs, event, arg0, offset, fields[RC_RECNUM])
+        elif rtype == DT_REBOOT:
+            tt.reboot(secs)
+        elif buf is not None and rtype == DT_GPS_RAW_SIRFBIN:
+            tt.nav_sats(secs, navtrk_sats(buf))
+        else:
+            tt.note(secs)
+    return tt
+
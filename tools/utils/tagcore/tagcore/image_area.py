@@ -0,0 +1,251 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''images: image_info verification and the ImageManager directory
+
+Every image carries an image_info block at IMAGE_META_OFFSET, right
+after the exception vectors (include/image_info.h).  ImageInfo.check does
+what OverWatch does before it will boot something: ii_sig, image_length
+in bounds, image_start one of the known bases, and, if image_chk is
+non-zero, the byte sum of the image.  image_chk was computed with itself
+zeroed, so its own bytes get backed out of the sum before comparing.
+
+The first sector of the IMAGE area is the ImageManager directory
+(tos/mm/image_mgr.h), four slots of IMAGE_SIZE_SECTORS each starting
+just after the directory.  The directory's 32 bit sum must be 0.
+
+    ImageInfo   decode/verify one image, wherever it sits in fd
+    ImageDir    decode/verify the directory, where each slot lives
+    byte_sum    streaming 8 bit sum, SUM_CHUNK at a time
+
+All i/o is read/seek, so a file, a TagFile, or an AreaView (raw SD
+image, mmap'd) all work.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev11'
+
+import struct
+
+from   core_headers import obj_image_info, obj_image_dir
+from   core_headers import IMAGE_INFO_SIG
+
+__all__ = [
+    'ImageInfo',
+    'ImageDir',
+    'byte_sum',
+    'slot_state_name',
+    'IMAGE_META_OFFSET',
+    'IMAGE_SIZE',
+    'IMAGE_DIR_SLOTS',
+]
+
+SECTOR_SIZE        = 512
+IMAGE_META_OFFSET  = 0x140
+IMAGE_MAX_SIZE     = 128 * 1024
+IMAGE_SIZE         = IMAGE_MAX_SIZE             # slot size
+IMAGE_SIZE_SECTORS = IMAGE_SIZE / SECTOR_SIZE
+IMAGE_DIR_SIG      = 0x17254172
+IMAGE_DIR_SLOTS    = 4
+IMAGE_DIR_QUADS    = 16
+
+GOLD_BASE          = 0x00000000
+NIB_BASE           = 0x00020000
+
+SUM_CHUNK          = 64 * 1024
+
+dir_quads = struct.Struct('<{}I'.format(IMAGE_DIR_QUADS))
+
+slot_state_strs = {
+    0:  'empty',
+    1:  'filling',
+    2:  'valid',
+    3:  'backup',
+    4:  'active',
+    5:  'ejected',
+}
+
+def slot_state_name(state):
+    return slot_state_strs.get(state, 'state/' + str(state))
+
+
+def byte_sum(fd, offset, cnt, chunk = SUM_CHUNK):
+    '''8 bit sum of cnt bytes at offset, (sum, bytes actually summed)'''
+    fd.seek(offset)
+    total = 0
+    done  = 0
+    while done < cnt:
+        buf = fd.read(min(chunk, cnt - done))
+        if not buf:
+            break
+        total += sum(bytearray(buf))
+        done  += len(buf)
+    return total & 0xffffffff, done
+
+
+class ImageInfo(object):
+    '''image_info of an image starting at offset base of fd
+
+    methods:    check       decode and verify, returns True if it would boot
+                version     (major, minor, build)
+
+    attributes: obj (obj_image_info), valid, errors, chk ('ok', 'bad',
+                'off' if image_chk is 0, None if never summed), sum
+    '''
+
+    def __init__(self, base = 0):
+        super(ImageInfo, self).__init__()
+        self.base   = base
+        self.obj    = obj_image_info()
+        self.valid  = False
+        self.errors = []
+        self.chk    = None
+        self.sum    = 0
+
+    def check(self, fd, limit = None, verify = True):
+        '''limit, if given, is how many bytes the image has room for'''
+        o = self.obj
+        self.errors = []
+        self.chk    = None
+        fd.seek(self.base + IMAGE_META_OFFSET)
+        buf = bytearray(fd.read(len(o)))
+        if len(buf) < len(o):
+            self.errors.append('short, no image_info')
+            self.valid = False
+            return False
+        o.set(buf)
+        if o['ii_sig'].val != IMAGE_INFO_SIG:
+            self.errors.append('sig 0x{:08x}'.format(o['ii_sig'].val))
+            self.valid = False
+            return False
+        im_len = o['im_len'].val
+        if im_len < IMAGE_META_OFFSET + len(o) or im_len >= IMAGE_MAX_SIZE:
+            self.errors.append('im_len 0x{:x}'.format(im_len))
+        elif limit is not None and im_len > limit:
+            self.errors.append('im_len 0x{:x} > 0x{:x}'.format(im_len, limit))
+        if o['im_start'].val not in (GOLD_BASE, NIB_BASE):
+            self.errors.append('im_start 0x{:08x}'.format(o['im_start'].val))
+        if verify and not self.errors:
+            im_chk = o['im_chk'].val
+            if im_chk == 0:
+                self.chk = 'off'
+            else:
+                self.sum, done = byte_sum(fd, self.base, im_len)
+                self.sum = (self.sum - sum(bytearray(
+                    struct.pack('<I', im_chk)))) & 0xffffffff
+                if done < im_len:
+                    self.errors.append('short, {} of {} bytes'.format(
+                        done, im_len))
+                elif self.sum != im_chk:
+                    self.chk = 'bad'
+                    self.errors.append('im_chk 0x{:08x}, sum 0x{:08x}'.format(
+                        im_chk, self.sum))
+                else:
+                    self.chk = 'ok'
+        self.valid = not self.errors
+        return self.valid
+
+    def version(self):
+        v = self.obj['ver_id']
+        return v['major'].val, v['minor'].val, v['build'].val
+
+    def desc(self, field):
+        return self.obj[field].val.rstrip('\0 ')
+
+    def __repr__(self):
+        o = self.obj
+        if o['ii_sig'].val != IMAGE_INFO_SIG:
+            return '<no image: {}>'.format(', '.join(self.errors))
+        hw = o['hw_ver']
+        s = '{}.{}.{:<5d} start: 0x{:05x}  len: 0x{:05x}  chk: 0x{:08x} ({})' \
+            '  hw: {}/{}'.format(
+                *(self.version() + (o['im_start'].val, o['im_len'].val,
+                                    o['im_chk'].val, self.chk or '-',
+                                    hw['model'].val, hw['rev'].val)))
+        if not self.valid:
+            s += '  <bad: {}>'.format(', '.join(self.errors))
+        return s
+
+
+class ImageDir(object):
+    '''ImageManager directory, first sector of the IMAGE area
+
+    inputs:     low     absolute sector of the area (the directory).
+                        None, figure it out from slot 0.
+
+    methods:    set, read, slot_offset
+
+    attributes: valid, errors, slots [(version, start_sec, state)], obj
+    '''
+
+    def __init__(self, low = None):
+        super(ImageDir, self).__init__()
+        self.low    = low
+        self.obj    = obj_image_dir()
+        self.valid  = False
+        self.errors = []
+        self.slots  = []
+
+    def set(self, buf):
+        buf = bytearray(buf)
+        self.errors = []
+        self.slots  = []
+        if len(buf) < len(self.obj):
+            self.errors.append('short, {} bytes'.format(len(buf)))
+            self.valid = False
+            return False
+        o = self.obj
+        o.set(buf)
+        if o['dir_sig'].val != IMAGE_DIR_SIG or o['dir_sig_a'].val != IMAGE_DIR_SIG:
+            self.errors.append('sigs 0x{:08x}/0x{:08x}'.format(
+                o['dir_sig'].val, o['dir_sig_a'].val))
+        chk = sum(dir_quads.unpack_from(str(buf))) & 0xffffffff
+        if chk:
+            self.errors.append('chksum 0x{:08x} (sum 0x{:08x})'.format(
+                o['chksum'].val, chk))
+        for i in range(IMAGE_DIR_SLOTS):
+            slot = o['slot{}'.format(i)]
+            v    = slot['ver_id']
+            self.slots.append(((v['major'].val, v['minor'].val, v['build'].val),
+                               slot['start_sec'].val, slot['slot_state'].val))
+        if self.low is None and self.slots[0][1]:
+            self.low = self.slots[0][1] - 1
+        for i, (ver, start_sec, state) in enumerate(self.slots):
+            if state and self.low is not None and \
+               start_sec != self.low + 1 + i * IMAGE_SIZE_SECTORS:
+                self.errors.append('slot {} start_sec 0x{:x}'.format(
+                    i, start_sec))
+        self.valid = not self.errors
+        return self.valid
+
+    def read(self, fd):
+        fd.seek(0)
+        return self.set(fd.read(SECTOR_SIZE))
+
+    def slot_offset(self, idx):
+        '''area offset of slot idx, where ImageManager says it should be'''
+        return (1 + idx * IMAGE_SIZE_SECTORS) * SECTOR_SIZE
+
+    def __repr__(self):
+        s = '{}  low: 0x{:x}'.format(self.obj['imgr_id'].val.rstrip('\0'),
+                                     self.low or 0)
+        if not self.valid:
+            s += '  <bad: {}>'.format(', '.join(self.errors))
+        return s
@@ -49,3 +49,21 @@ def dump_buf(buf, pre = '', desc = 'rec:  '):
         idx += (stride * 3)
         if idx < len(bs):              # if more then print counter
             print(pre + '{:04x}: '.format(idx/3), end = '')
+
+
+def write_columns(fname, table):
+    """
+    write a numpy structured array (a table) out column by column.
+
+    <name>.npz gets one array per column (np.savez), anything else
+    gets csv with a header line naming the columns.
+    """
+    import numpy as np
+
+    if fname.endswith('.npz'):
+        np.savez(fname, **dict((n, table[n]) for n in table.dtype.names))
+        return
+    with open(fname, 'w') as fd:
+        fd.write(','.join(table.dtype.names) + '\n')
+        for row in table.tolist():
+            fd.write(','.join([ str(x) for x in row ]) + '\n')
@@ -0,0 +1,313 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''Panic area: panic directory and panic blocks
+
+The Panic area (PANIC001, or FS_LOC_PANIC of a raw SD image) starts with
+the panic directory sector, followed by panic blocks of
+panic_block_size (PBLK_SIZE, 150) sectors each.  See
+tos/system/panic/panic.h and doc/06_Panic_CrashDumps.
+
+A panic block is:
+
+    home (1 sector)     panic_block_0: panic_info, image_info,
+                        add_info, ..., crash_info, ram_header.
+                        crash_info/ram_header sit at the very end of
+                        the sector.
+    RAM  (128 sectors)  64 KiB of RAM, add_info.ram_offset
+    IO   (following)    IO regions, each a cc_region_header_t
+                        (start, end) followed by end - start bytes.
+                        A zero header (or running out of room) ends it.
+
+crash_info from cc_sig on, ram_header, RAM, and the IO regions are laid
+down contiguously in the form CrashCatcher/CrashDebug wants.  All
+offsets here are relative to the start of the panic area (the dir
+sector), which is how the tag fills in add_info.
+
+    PanicDir        decode/verify the directory
+    PanicBlock      decode/verify the home sector of one panic block
+    panic_blocks    walk all written panic blocks
+    write_crash_dump  stream one block out as a CrashCatcher dump
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev9'
+
+import struct
+
+from   base_objs     import *
+from   core_headers  import IMAGE_INFO_SIG
+from   panic_headers import *
+
+__all__ = [
+    'PanicDir',
+    'PanicBlock',
+    'panic_blocks',
+    'write_crash_dump',
+    'copy_out',
+    'pcode_name',
+    'PBLK_SIZE',
+    'SECTOR_SIZE',
+]
+
+SECTOR_SIZE     = 512
+PBLK_SIZE       = 150                   # sectors, panic.h
+PBLK_RAM        = 1
+PBLK_RAM_SIZE   = 64 * 1024 / SECTOR_SIZE
+PBLK_IO         = PBLK_RAM + PBLK_RAM_SIZE
+PBLK_FCRUMBS_SIZE = 8                   # at the end of the block
+
+CC_SIG_OFFSET   = 32                    # cc_sig within crash_info
+COPY_CHUNK      = 16 * SECTOR_SIZE
+
+dir_quads       = struct.Struct('<8I')
+region_hdr      = struct.Struct('<II')
+
+
+def pcode_name(pcode):
+    return panic_codes.get(pcode, 'pcode/{}'.format(pcode))
+
+
+class PanicDir(object):
+    '''panic directory, first sector of the panic area
+
+    attributes: valid, errors, index (next block to write), index_max,
+                block_size, dir_sector, high_sector, obj
+    '''
+
+    def __init__(self):
+        super(PanicDir, self).__init__()
+        self.obj    = obj_panic_dir()
+        self.valid  = False
+        self.errors = []
+        self.empty  = False
+
+    def set(self, buf):
+        buf = bytearray(buf)
+        self.errors = []
+        self.empty  = not any(buf[:dir_quads.size])
+        if len(buf) < dir_quads.size:
+            self.errors.append('short, {} bytes'.format(len(buf)))
+            self.valid = False
+            return False
+        o = self.obj
+        o.set(buf)
+        if o['panic_dir_sig'].val != PANIC_DIR_SIG:
+            self.errors.append('sig 0x{:08x}'.format(o['panic_dir_sig'].val))
+        chk = sum(dir_quads.unpack_from(str(buf))) & 0xffffffff
+        if chk:
+            self.errors.append('chksum (sum 0x{:08x})'.format(chk))
+        self.dir_sector  = o['panic_dir_sector'].val
+        self.high_sector = o['panic_high_sector'].val
+        self.index       = o['panic_block_index'].val
+        self.index_max   = o['panic_block_index_max'].val
+        self.block_size  = o['panic_block_size'].val
+        if not self.errors and self.block_size == 0:
+            self.errors.append('block_size 0')
+        self.valid = not self.errors
+        return self.valid
+
+    def read(self, fd):
+        fd.seek(0)
+        return self.set(fd.read(SECTOR_SIZE))
+
+    def written(self):
+        '''number of panic blocks with something in them'''
+        if not self.valid:
+            return 0
+        return min(self.index, self.index_max)
+
+    def block_offset(self, idx):
+        '''area offset of panic block idx'''
+        return (1 + idx * self.block_size) * SECTOR_SIZE
+
+    def __repr__(self):
+        o = self.obj
+        s = '{}  sectors: 0x{:x}-0x{:x}  blocks: {}/{}  size: {}'.format(
+            o['panic_dir_id'].val, self.dir_sector, self.high_sector,
+            self.index, self.index_max, self.block_size)
+        if not self.valid:
+            s += '  <bad: {}>'.format(', '.join(self.errors))
+        return s
+
+
+class PanicBlock(object):
+    '''one panic block, decoded from its home sector
+
+    inputs:     idx         panic block index
+                offset      area offset of the block
+                block_size  bytes in the block (bounds the IO walk)
+
+    attributes: pi, ii, ai, ci, ram_hdr (decoded objs), valid, errors
+                ram_offset, ram_size, io_offset
+    '''
+
+    def __init__(self, idx, offset, block_size = PBLK_SIZE * SECTOR_SIZE):
+        super(PanicBlock, self).__init__()
+        self.idx        = idx
+        self.offset     = offset
+        self.block_size = block_size
+        self.pi      = obj_panic_info()
+        self.ii      = obj_image_info()
+        self.ai      = obj_add_info()
+        self.ci      = obj_crash_info()
+        self.ram_hdr = obj_region()
+        self.ci_offset = SECTOR_SIZE - len(self.ci) - len(self.ram_hdr)
+        self.valid   = False
+        self.errors  = []
+
+    def set(self, buf):
+        buf = bytearray(buf)
+        self.errors = []
+        if len(buf) < SECTOR_SIZE:
+            self.errors.append('short, {} bytes'.format(len(buf)))
+            self.valid = False
+            return False
+        pos  = self.pi.set(buf)
+        pos += self.ii.set(buf[pos:])
+        self.ai.set(buf[pos:])
+        pos  = self.ci_offset
+        pos += self.ci.set(buf[pos:])
+        self.ram_hdr.set(buf[pos:])
+
+        for name, val, sig in (
+                ('panic_info', self.pi['pi_sig'].val, PANIC_INFO_SIG),
+                ('image_info', self.ii['ii_sig'].val, IMAGE_INFO_SIG),
+                ('add_info',   self.ai['ai_sig'].val, PANIC_ADDITIONS),
+                ('crash_info', self.ci['ci_sig'].val, CRASH_INFO_SIG),
+                ('crash_catcher', self.ci['cc_sig'].val, CRASH_CATCHER_SIG)):
+            if val != sig:
+                self.errors.append('{} sig 0x{:08x}'.format(name, val))
+
+        # where RAM/IO live.  Use add_info if it agrees with the block,
+        # otherwise what panic.h says.
+        self.ram_offset = self.offset + PBLK_RAM * SECTOR_SIZE
+        self.ram_size   = PBLK_RAM_SIZE * SECTOR_SIZE
+        self.io_offset  = self.offset + PBLK_IO * SECTOR_SIZE
+        ram = self.ai['ram_sector'].val
+        io  = self.ai['io_sector'].val
+        if self.ai['ai_sig'].val == PANIC_ADDITIONS:
+            if ram != self.ram_offset or io != self.io_offset:
+                self.errors.append('add_info ram/io 0x{:x}/0x{:x}'.format(ram, io))
+            elif 0 < self.ai['ram_size'].val <= io - ram:
+                self.ram_size = self.ai['ram_size'].val
+        self.valid = not self.errors
+        return self.valid
+
+    def read(self, fd):
+        fd.seek(self.offset)
+        return self.set(fd.read(SECTOR_SIZE))
+
+    def cc_header(self, buf):
+        '''crash_info from cc_sig through ram_header, straight from buf'''
+        return str(buf[self.ci_offset + CC_SIG_OFFSET:SECTOR_SIZE])
+
+    def io_regions(self, fd):
+        '''walk the IO regions, returns list of (offset, start, end)
+
+        offset is the area offset of the region's header.
+        '''
+        limit   = self.offset + self.block_size - \
+                  PBLK_FCRUMBS_SIZE * SECTOR_SIZE
+        regions = []
+        pos     = self.io_offset
+        while pos + region_hdr.size <= limit:
+            fd.seek(pos)
+            hdr = fd.read(region_hdr.size)
+            if len(hdr) < region_hdr.size:
+                break
+            start, end = region_hdr.unpack(hdr)
+            if end <= start or \
+               pos + region_hdr.size + (end - start) > limit:
+                break
+            regions.append((pos, start, end))
+            pos += region_hdr.size + (end - start)
+        return regions
+
+    def summary(self):
+        pi = self.pi
+        rt = pi['rt']
+        ver = '{}.{}.{}'.format(self.ii['ver_id']['major'].val,
+                                self.ii['ver_id']['minor'].val,
+                                self.ii['ver_id']['build'].val)
+        return '{:3d}  b/p: {:3d}/{:3d}  {:04d}/{:02d}/{:02d}-{:02d}:{:02d}:{:02d}  ' \
+               '{:>20s}/{:<3d} x({:04x} {:04x} {:04x} {:04x})  ' \
+               'v: {:10s}  pc: 0x{:08x}  lr: 0x{:08x}{}'.format(
+                   self.idx, pi['boot_count'].val, pi['panic_count'].val,
+                   rt['year'].val, rt['mon'].val, rt['day'].val,
+                   rt['hr'].val, rt['min'].val, rt['sec'].val,
+                   pcode_name(pi['pcode'].val), pi['where'].val,
+                   pi['arg_0'].val, pi['arg_1'].val,
+                   pi['arg_2'].val, pi['arg_3'].val, ver,
+                   self.ci['bxPC'].val, self.ci['bxLR'].val,
+                   '' if self.valid else '  <bad: {}>'.format(
+                       ', '.join(self.errors)))
+
+
+def panic_blocks(fd, pdir = None):
+    '''generate (PanicBlock, home sector buf) for each written block'''
+    if pdir is None:
+        pdir = PanicDir()
+        pdir.read(fd)
+    for idx in range(pdir.written()):
+        blk = PanicBlock(idx, pdir.block_offset(idx),
+                         pdir.block_size * SECTOR_SIZE)
+        fd.seek(blk.offset)
+        buf = fd.read(SECTOR_SIZE)
+        blk.set(buf)
+        yield blk, buf
+
+
+def copy_out(fd, out, offset, cnt, chunk = COPY_CHUNK):
+    '''copy cnt bytes at offset of fd to out, chunk bytes at a time
+
+    returns the number of bytes copied, less than cnt if fd runs out.
+    '''
+    fd.seek(offset)
+    done = 0
+    while done < cnt:
+        buf = fd.read(min(chunk, cnt - done))
+        if not buf:
+            break
+        out.write(buf)
+        done += len(buf)
+    return done
+
+
+def write_crash_dump(fd, blk, home, fname):
+    '''write a CrashCatcher dump for blk (home is its home sector)
+
+    crash_info (from cc_sig), ram_header, RAM, and the IO regions.  RAM
+    and IO are streamed across COPY_CHUNK at a time so memory use
+    doesn't depend on how big the block is.
+
+    returns the number of bytes written.
+    '''
+    regions = blk.io_regions(fd)
+    with open(fname, 'wb') as out:
+        hdr = blk.cc_header(home)
+        out.write(hdr)
+        nbytes  = len(hdr)
+        nbytes += copy_out(fd, out, blk.ram_offset, blk.ram_size)
+        if regions:
+            io_end = regions[-1][0] + region_hdr.size + \
+                     regions[-1][2] - regions[-1][1]
+            nbytes += copy_out(fd, out, regions[0][0], io_end - regions[0][0])
+    return nbytes
@@ -0,0 +1,174 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''join panic blocks with the REBOOT records in a dblk stream
+
+When the tag comes back from a panic, OverWatch hands the REBOOT record
+the panic it just took (owcb pi_panic_idx, pi_pcode, pi_where, and
+pi_arg0-3).  The panic block itself has panic_info (boot_count,
+panic_count, pcode, where, args).
+
+    reboot_index    scan a dblk stream for REBOOT records, only the
+                    records are looked at, found via their SYNC majik.
+    panic_index     panic blocks keyed by panic block index.
+    join            match each REASON_PANIC reboot to its panic block.
+
+join returns a list of CrashRow, one per panic block and one per
+panic reboot that doesn't have a block.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import dt_defs      as     dtd
+from   core_headers import obj_dt_hdr, obj_dt_reboot
+from   core_emitters import REASON_PANIC
+from   panic_area   import panic_blocks
+
+__all__ = [
+    'reboot_index',
+    'panic_index',
+    'join',
+    'CrashRow',
+]
+
+SCAN_CHUNK        = 256 * 1024          # multiple of 4, majik never straddles
+SYNC_MAJIK_OFFSET = 24                  # majik from start of REBOOT record
+
+majik_bytes = dtd.quad_struct.pack(dtd.dt_sync_majik)
+
+
+class RebootInfo(object):
+    '''the parts of a REBOOT record we care about'''
+
+    def __init__(self, offset, obj):
+        super(RebootInfo, self).__init__()
+        hdr  = obj['hdr']
+        owcb = obj['owcb']
+        self.offset       = offset
+        self.recnum       = hdr['recnum'].val
+        self.rt           = hdr['rt']
+        self.reason       = owcb['reboot_reason'].val
+        self.reboot_count = owcb['reboot_count'].val
+        self.panic_count  = owcb['panic_count'].val
+        self.pi_idx       = owcb['pi_panic_idx'].val
+        self.pi_pcode     = owcb['pi_pcode'].val
+        self.pi_where     = owcb['pi_where'].val
+        self.pi_args      = (owcb['pi_arg0'].val, owcb['pi_arg1'].val,
+                             owcb['pi_arg2'].val, owcb['pi_arg3'].val)
+
+
+class CrashRow(object):
+    '''one line of the crash table
+
+    blk         PanicBlock or None (reboot says panic, no block)
+    reboot      RebootInfo or None (block never showed up in the stream)
+    problems    list of fields that don't agree
+    '''
+
+    def __init__(self, blk, reboot):
+        super(CrashRow, self).__init__()
+        self.blk      = blk
+        self.reboot   = reboot
+        self.problems = []
+        if blk is None or reboot is None:
+            return
+        pi = blk.pi
+        if pi['pcode'].val != reboot.pi_pcode or \
+           pi['where'].val != reboot.pi_where:
+            self.problems.append('pcode/where')
+        if (pi['arg_0'].val, pi['arg_1'].val,
+            pi['arg_2'].val, pi['arg_3'].val) != reboot.pi_args:
+            self.problems.append('args')
+        if pi['boot_count'].val >= reboot.reboot_count:
+            self.problems.append('boot_count')
+
+    def idx(self):
+        return self.blk.idx if self.blk else self.reboot.pi_idx
+
+
+def reboot_index(fd, start = 0, end = None):
+    '''list of RebootInfo for every REBOOT record in fd[start:end]
+
+    only looks for the SYNC majik, REBOOT and SYNC records both carry it,
+    and decodes just the REBOOT records found that way.  Like get_record
+    (tagdump) a REBOOT has to be the right length and check out (recsum).
+    '''
+    hdr     = obj_dt_hdr()
+    rb_len  = len(obj_dt_reboot())
+    req_len = dtd.dt_records.get(dtd.DT_REBOOT,
+                                 (rb_len,))[dtd.DTR_REQ_LEN] or rb_len
+    reboots = []
+    start  &= ~3
+    offset  = start
+    while end is None or offset < end:
+        fd.seek(offset)
+        cnt = SCAN_CHUNK if end is None else min(SCAN_CHUNK, end - offset)
+        buf = fd.read(cnt)
+        if not buf:
+            break
+        i = buf.find(majik_bytes)
+        while i >= 0:
+            rec = offset + i - SYNC_MAJIK_OFFSET
+            if i & 3 == 0 and rec >= start:
+                fd.seek(rec)
+                rbuf = bytearray(fd.read(rb_len))
+                if len(rbuf) >= len(hdr):
+                    hdr.set(rbuf)
+                    if hdr['type'].val == dtd.DT_REBOOT and \
+                       hdr['len'].val == req_len <= len(rbuf) and \
+                       dtd.rec_chksum(rbuf, req_len, hdr['recsum'].val) == \
+                           hdr['recsum'].val:
+                        obj = obj_dt_reboot()
+                        obj.set(rbuf)
+                        reboots.append(RebootInfo(rec, obj))
+            i = buf.find(majik_bytes, i + 1)
+        offset += len(buf)
+    return reboots
+
+
+def panic_index(fd, pdir = None):
+    '''dict of panic block idx -> PanicBlock'''
+    return dict([ (blk.idx, blk) for blk, home in panic_blocks(fd, pdir) ])
+
+
+def join(reboots, panics):
+    '''match panic reboots to panic blocks, returns list of CrashRow
+
+    keyed on pi_panic_idx.  If more than one panic reboot names the same
+    block (the panic area got wiped and reused), the last one wins and
+    the earlier ones show up as reboots without a block.
+    '''
+    by_idx = {}
+    orphans = []
+    for rb in reboots:
+        if rb.reason != REASON_PANIC:
+            continue
+        if rb.pi_idx in panics:
+            if rb.pi_idx in by_idx:
+                orphans.append(by_idx[rb.pi_idx])
+            by_idx[rb.pi_idx] = rb
+        else:
+            orphans.append(rb)
+    rows = [ CrashRow(panics[idx], by_idx.get(idx))
+             for idx in sorted(panics) ]
+    rows.extend([ CrashRow(None, rb) for rb in orphans ])
+    return sorted(rows, key = lambda r: (r.idx(),
+                                         r.reboot.offset if r.reboot else -1))
@@ -0,0 +1,304 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''persistent record cache (record index) for dblk streams
+
+Remembers what we learned the last time a given dblk file was walked:
+
+    o where each valid record starts (its offset) along with its
+      decoded header fields (len, type, recnum, rtctime, recsum).
+      Only records that passed all the length and checksum checks
+      are entered.
+
+    o where a resync starting at a given offset ended up.
+
+    o things derived from the records (rtc drift model, ...), see
+      get_derived/set_derived.  These are stamped with the state of
+      the index they came from and go stale when it changes.
+
+A later pass over the same file can then pull a record directly
+without redoing the header decode, length checks and checksum, and can
+jump over bad regions without rescanning for SYNC_MAJIK.  Only header
+fields are kept, the record data is still decoded for display.  high
+is where the cached records end, a rerun can start there (tagdump
+--new) and only look at what was appended.
+
+The cache is keyed on the file's identity, (st_dev, st_ino, and a hash
+of the first sector).  Entries are trusted as is, so the cache is only
+kept if the file is untouched (same size and mtime), or has only grown
+with the tail of the cached data still the same (more data appended).
+Anything else, including a same size file with a new mtime (rewritten
+in place), throws the entries away.
+
+Each file's cache lives in its own file under the cache directory
+(TAGCORE_CACHE or ~/.cache/tagcore).  The directory is kept under
+max_bytes by throwing away the least recently used cache files.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import os
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from   dt_defs      import DT_REBOOT
+
+__all__ = [
+    'RecCache',
+    'hdr_fields',
+    'set_hdr',
+    'CACHE_MAX_BYTES',
+]
+
+CACHE_DIR       = os.environ.get('TAGCORE_CACHE',
+                        os.path.join(os.path.expanduser('~'), '.cache', 'tagcore'))
+CACHE_MAX_BYTES = 256 * 1024 * 1024     # whole cache directory
+CACHE_SUFFIX    = '.rc'
+CACHE_REV       = 1                     # bump if the pickled layout changes
+
+IDENT_SIZE      = 512                   # how much of the file head we hash
+TAIL_SIZE       = 512                   # check area at end of cached data
+
+# order of the fields in a record entry, see hdr_fields
+RC_LEN          = 0
+RC_TYPE         = 1
+RC_RECNUM       = 2
+RC_RT           = 3
+RC_RECSUM       = 4
+
+rt_keys = ('sub_sec', 'sec', 'min', 'hr', 'dow', 'day', 'mon', 'year')
+
+
+def hdr_fields(hdr):
+    '''pull a tuple of the decoded fields out of a (set) obj_dt_hdr'''
+    rt = hdr['rt']
+    return (hdr['len'].val, hdr['type'].val, hdr['recnum'].val,
+            tuple([ rt[k].val for k in rt_keys ]), hdr['recsum'].val)
+
+
+def set_hdr(hdr, fields):
+    '''load an obj_dt_hdr from a fields tuple, no buffer decode needed'''
+    hdr['len'].val    = fields[RC_LEN]
+    hdr['type'].val   = fields[RC_TYPE]
+    hdr['recnum'].val = fields[RC_RECNUM]
+    hdr['recsum'].val = fields[RC_RECSUM]
+    rt = hdr['rt']
+    for k, v in zip(rt_keys, fields[RC_RT]):
+        rt[k].val = v
+    return hdr
+
+
+def _hash_region(name, pos, size):
+    import hashlib                      # only when --cache is in play
+    with open(name, 'rb') as fd:
+        fd.seek(pos)
+        return hashlib.sha1(fd.read(size)).hexdigest()
+
+
+class RecCache(object):
+    '''record cache for one dblk file
+
+    inputs:     name        path of the dblk file
+                cache_dir   where to keep cache files
+                max_bytes   size bound for the whole cache directory
+                verbose     how chatty
+
+    methods:    get         fields tuple for a record at offset (or None)
+                add         enter a validated record (obj_dt_hdr)
+                get_resync  where a resync from offset ended up (or None)
+                add_resync  remember where a resync went
+                records     sorted list of (offset, fields)
+                last_reboot offset of the last cached REBOOT (or None)
+                get_derived value derived from the records (or None)
+                set_derived remember one
+                save        write back out (and prune the directory)
+    '''
+
+    def __init__(self, name, cache_dir = None, max_bytes = CACHE_MAX_BYTES,
+                 verbose = 0):
+        super(RecCache, self).__init__()
+        self.name      = name
+        self.cache_dir = cache_dir if cache_dir else CACHE_DIR
+        self.max_bytes = max_bytes
+        self.verbose   = verbose
+        self.recs      = {}             # offset -> fields
+        self.syncs     = {}             # offset -> resync offset
+        self.derived   = {}             # key -> (stamp, value)
+        self.high      = 0              # end of highest cached record
+        self.dirty     = False
+        self.hits      = 0
+        self.added     = 0
+
+        st = os.stat(name)
+        self.size  = st.st_size
+        self.mtime = st.st_mtime
+        head = _hash_region(name, 0, IDENT_SIZE)
+        self.key   = '{:x}-{:x}-{}'.format(st.st_dev, st.st_ino, head[:16])
+        self.path  = os.path.join(self.cache_dir, self.key + CACHE_SUFFIX)
+        self.load()
+
+    def __len__(self):
+        return len(self.recs)
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as fd:
+                c = pickle.load(fd)
+        except Exception:               # not there or garbage, start over
+            return
+        if c.get('rev') != CACHE_REV:
+            return
+        if c['size'] != self.size or c['mtime'] != self.mtime:
+            #
+            # file changed.  if it only grew, and the tail of what we
+            # had cached is still the same, keep it.  New stuff will
+            # get added as it is processed.  Same size, it was written
+            # in place, the entries can't be trusted.
+            #
+            if self.size <= c['size'] or c['high'] > self.size or \
+               c['tail'] != self._tail_hash(c['high']):
+                if self.verbose >= 1:
+                    print('*** cache: {} changed, discarding'.format(self.name))
+                return
+            self.dirty = True
+        self.recs  = c['recs']
+        self.syncs = c['syncs']
+        self.derived = c.get('derived', {})
+        self.high  = c['high']
+        try:
+            os.utime(self.path, None)   # LRU, we just used it
+        except OSError:
+            pass
+
+    def _tail_hash(self, high):
+        if high == 0:
+            return None
+        pos = max(high - TAIL_SIZE, 0)
+        return _hash_region(self.name, pos, high - pos)
+
+    def save(self):
+        if not self.dirty:
+            return
+        for offset in [ o for o, n in self.syncs.items() if n not in self.recs ]:
+            del self.syncs[offset]
+        c = {
+            'rev':   CACHE_REV,
+            'name':  self.name,
+            'size':  self.size,
+            'mtime': self.mtime,
+            'high':  self.high,
+            'tail':  self._tail_hash(self.high),
+            'recs':  self.recs,
+            'syncs': self.syncs,
+            'derived': self.derived,
+        }
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wb') as fd:
+                pickle.dump(c, fd, 2)
+            os.rename(tmp, self.path)
+        except (IOError, OSError) as e:
+            print('*** cache: unable to save {}: {}'.format(self.path, e))
+            return
+        self.dirty = False
+        self.prune()
+
+    def prune(self):
+        '''keep the cache directory under max_bytes, oldest use goes first'''
+        files = []
+        total = 0
+        for f in os.listdir(self.cache_dir):
+            if not f.endswith(CACHE_SUFFIX):
+                continue
+            p = os.path.join(self.cache_dir, f)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        files.sort()
+        for mtime, size, p in files:
+            if total <= self.max_bytes:
+                break
+            if p == self.path:
+                continue
+            try:
+                os.remove(p)
+                total -= size
+                if self.verbose >= 1:
+                    print('*** cache: evicted {}'.format(p))
+            except OSError:
+                pass
+
+    def get(self, offset):
+        fields = self.recs.get(offset)
+        if fields:
+            self.hits += 1
+        return fields
+
+    def add(self, offset, hdr):
+        fields = hdr_fields(hdr)
+        if self.recs.get(offset) == fields:
+            return
+        self.recs[offset] = fields
+        self.high  = max(self.high, offset + fields[RC_LEN])
+        self.added += 1
+        self.dirty = True
+
+    def get_resync(self, offset):
+        '''only hand back resyncs that landed on a record we know is good'''
+        new_offset = self.syncs.get(offset)
+        if new_offset is None or new_offset not in self.recs:
+            return None
+        self.hits += 1
+        return new_offset
+
+    def add_resync(self, offset, new_offset):
+        if new_offset <= offset or self.syncs.get(offset) == new_offset:
+            return
+        self.syncs[offset] = new_offset
+        self.dirty = True
+
+    def records(self):
+        return sorted(self.recs.items())
+
+    def last_reboot(self):
+        reboots = [ o for o, f in self.recs.items()
+                    if f[RC_TYPE] == DT_REBOOT ]
+        return max(reboots) if reboots else None
+
+    def stamp(self):
+        return (self.high, len(self.recs))
+
+    def get_derived(self, key):
+        '''value set_derived was handed, None if the index changed since'''
+        stamp, value = self.derived.get(key, (None, None))
+        return value if stamp == self.stamp() else None
+
+    def set_derived(self, key, value):
+        self.derived[key] = (self.stamp(), value)
+        self.dirty = True
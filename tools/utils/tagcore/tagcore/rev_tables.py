@@ -0,0 +1,159 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''decode tables for core revisions other than the one we were built for
+
+The emitters in core_emitters know the current (CORE_REV) layouts.  For
+data written by some other revision, build_table makes a dt_records
+style table from that revision's compiled schema (see schema.py):
+required lengths and objects come from its headers, and every record is
+shown by emit_schema, the header line plus (verbose) each field.
+
+The schema for an old revision has to have been compiled once, from
+that revision's tree:
+
+    cd tagcore/tagcore; python schema.py <old tree>/include ...
+
+With no schema for the revision the table still works, records just get
+their header decoded and, other than SYNC, no length checks.
+
+    build_table     (rev, minor) -> table, hand to dt_defs.dt_select
+    reboot_rev      core_rev/core_minor out of a raw REBOOT record
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev14'
+
+import struct
+
+from   dt_defs      import *
+import dt_defs      as     dtd
+from   base_objs    import aggie, lazy_obj, lazy_table
+from   core_headers import obj_dt_hdr
+from   core_rev     import CORE_REV, CORE_MINOR
+
+__all__ = [
+    'build_table',
+    'reboot_rev',
+    'REBOOT_REV_OFFSET',
+    'emit_schema',
+]
+
+# dt_reboot_t: hdr (20), prev_sync, sync_majik, then core_rev/core_minor.
+# hasn't moved since the REBOOT record learned about core_rev.
+REBOOT_REV_OFFSET = 28
+rev_struct = struct.Struct('<HH')
+
+# rtype -> C struct of the whole record (include/typed_data.h)
+rtype_structs = {
+    DT_REBOOT:          'dt_dump_reboot_t',
+    DT_VERSION:         'dt_dump_version_t',
+    DT_SYNC:            'dt_sync_t',
+    DT_SYNC_FLUSH:      'dt_sync_t',
+    DT_EVENT:           'dt_event_t',
+    DT_GPS_VERSION:     'dt_gps_t',
+    DT_GPS_TIME:        'dt_gps_t',
+    DT_GPS_GEO:         'dt_gps_t',
+    DT_GPS_XYZ:         'dt_gps_t',
+    DT_GPS_RAW_SIRFBIN: 'dt_gps_t',
+    DT_SENSOR_DATA:     'dt_sensor_data_t',
+    DT_SENSOR_SET:      'dt_sensor_set_t',
+}
+
+HDR_STRUCT = 'dt_header_t'
+
+dt_hdr = obj_dt_hdr()
+
+
+def reboot_rev(buf):
+    '''(core_rev, core_minor) of the REBOOT record in buf, None if short'''
+    if len(buf) < REBOOT_REV_OFFSET + rev_struct.size:
+        return None
+    return rev_struct.unpack_from(str(buf), REBOOT_REV_OFFSET)
+
+
+def decode_schema(level, offset, buf, obj):
+    return obj.set(buf)
+
+
+def _fields(obj, prefix = ''):
+    for key, v in obj.iteritems():
+        if key.startswith('_pad'):
+            continue
+        if isinstance(v, aggie):
+            for f in _fields(v, prefix + key + '.'):
+                yield f
+        else:
+            yield prefix + key, v
+
+
+hdr_leaves = len(list(_fields(dt_hdr)))
+
+
+def emit_schema(level, offset, buf, obj):
+    '''any record of a foreign revision: rec0 line, fields if verbose'''
+    dt_hdr.set(buf)
+    rtctime = dt_hdr['rt']
+    xtype   = dt_hdr['type'].val
+    print_hourly(rtctime)
+    print(rec0.format(offset, dt_hdr['recnum'].val, rtctime_str(rtctime),
+                      dt_hdr['len'].val, xtype, dt_name(xtype)), end = '')
+    print('  (rev {}/{})'.format(*dtd.dt_rev))
+    if level >= 1:
+        # every record starts with the header, already shown
+        for name, v in list(_fields(obj))[hdr_leaves:]:
+            print('    {:24s} {}'.format(name, v))
+
+
+def _load(rev, minor):
+    from schema import load_rev, cached_revs
+    s = load_rev(rev, minor)
+    if s is None:
+        for r, m in reversed(cached_revs()):
+            if r == rev:
+                return load_rev(r, m)
+    return s
+
+
+def build_table(rev, minor):
+    '''dt_records style table for core_rev rev/minor
+
+    same rtypes and names as the current table.  Objects come from the
+    revision's schema, if we have one, otherwise just the header.
+    '''
+    s   = _load(rev, minor)
+    cur = dtd.dt_registry[(CORE_REV, CORE_MINOR)]
+    tbl = lazy_table(DTR_OBJ)
+    for rtype, v in dict.items(cur):
+        sname = rtype_structs.get(rtype, HDR_STRUCT)
+        lay   = None
+        if s is not None:
+            lay = s.layouts.get(sname) or s.layouts.get(HDR_STRUCT)
+        if lay is None:
+            # SYNC hasn't changed, keep its length so resync still works
+            req = v[DTR_REQ_LEN] if rtype in (DT_SYNC, DT_SYNC_FLUSH) else 0
+            tbl[rtype] = (req, decode_schema, [ emit_schema ],
+                          lazy_obj(obj_dt_hdr), v[DTR_NAME], 'obj_dt_hdr')
+            continue
+        req = lay.size if v[DTR_REQ_LEN] else 0
+        tbl[rtype] = (req, decode_schema, [ emit_schema ],
+                      lazy_obj(lay.obj), v[DTR_NAME], lay.name)
+    tbl.schema = s
+    return tbl
@@ -0,0 +1,115 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''rtc drift model for a dblk file, kept with its record index
+
+Walks the record index (no decoding), reads only the GPS_RAW records,
+pairs each good geoData fix's utc with the record's rtctime and fits a
+rt_time.DriftModel, a line per reboot interval.  The pieces go into the
+record cache (RecCache.set_derived) so the next run, or anything else
+that wants corrected times, just loads them; they are refit only when
+the index has changed.
+
+    geo_utc         utc fields of a good geoData in a GPS_RAW record
+    fit_index       DriftModel off a file's record index
+    load_model      cached DriftModel (fit and cache it if need be)
+
+The index is built by tagdump --cache, dblkstats --drift prints each
+file's pieces.
+
+requires numpy.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import struct
+
+from   dt_defs      import DT_REBOOT, DT_GPS_RAW_SIRFBIN
+from   sirf_defs    import SIRF_HDR_SIZE, packet_len
+from   rec_cache    import RecCache, RC_TYPE, RC_RT
+from   event_index  import index_records
+from   rt_time      import GpsClock, DriftModel, MID_GEO_DATA
+
+__all__ = [
+    'geo_utc',
+    'fit_index',
+    'load_model',
+]
+
+DRIFT_KEY   = 'rt_drift'                # RecCache derived key
+GPS_RAW_HDR = 28                        # sizeof(dt_gps_t)
+GEO_PAYLOAD = GPS_RAW_HDR + SIRF_HDR_SIZE
+
+# geoData, mid thru utc_ms
+geo_utc_struct = struct.Struct('>BHHHIHBBBBH')
+
+
+def geo_utc(buf):
+    '''(year, mon, day, hr, min, ms) of the geoData in a GPS_RAW record
+
+    None if it isn't a geoData, doesn't check out, or isn't a good fix
+    (nav_valid non-zero).
+    '''
+    if len(buf) < GEO_PAYLOAD + geo_utc_struct.size:
+        return None
+    mid, nav_valid, nav_type, week_x, tow, year, mon, day, hr, mn, ms = \
+        geo_utc_struct.unpack_from(buf, GEO_PAYLOAD)
+    if mid != MID_GEO_DATA or nav_valid != 0:
+        return None
+    plen = packet_len(buf, GPS_RAW_HDR)
+    if plen is None or plen <= 0:
+        return None
+    return year, mon, day, hr, mn, ms
+
+
+def fit_index(name, cache = None, clip = 3.0):
+    '''DriftModel for dblk file name, off its record index'''
+    clock = GpsClock()
+    for offset, fields, secs, buf in index_records(name,
+            rtypes = (DT_REBOOT, DT_GPS_RAW_SIRFBIN),
+            read = (DT_GPS_RAW_SIRFBIN,), cache = cache):
+        if fields[RC_TYPE] == DT_REBOOT:
+            clock.reboot(offset)
+            continue
+        utc = geo_utc(buf)
+        if utc:
+            clock.add(offset, fields[RC_RT], utc)
+    return clock.fit(clip)
+
+
+def load_model(name, cache = None, refit = False):
+    '''name's DriftModel, from its record cache if it's still good
+
+    otherwise it's fit off the index and saved with it.  None if there
+    is no index (run tagdump --cache over the file first).
+    '''
+    if cache is None:
+        cache = RecCache(name)
+    if not len(cache):
+        return None
+    pieces = None if refit else cache.get_derived(DRIFT_KEY)
+    if pieces is not None:
+        return DriftModel.from_list(pieces)
+    model = fit_index(name, cache)
+    cache.set_derived(DRIFT_KEY, model.to_list())
+    cache.save()
+    return model
+
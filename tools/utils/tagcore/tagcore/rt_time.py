@@ -0,0 +1,319 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''record time, rtctime to UTC epoch secs, whole arrays at a time
+
+Every record header carries an rtctime (sub_sec in 32768 Hz jiffies,
+sec, min, hr, dow, day, mon, year), the tag's rtc.  Here they get
+turned into float epoch secs with numpy, no per record python, and an
+rtc that was never set (or is garbage) comes out nan.
+
+The rtc drifts.  geoData (MID 41) fixes carry GPS UTC, so each good
+fix pairs the tag's idea of the time (the record's rtctime) with the
+real one.  A straight line through those pairs (fit_drift) gives a
+Drift, the correction, applied to any array of epoch secs.  The record
+is written a bit after the fix, that latency ends up in the offset.
+The rtc gets set and its temperature changes, so a DriftModel has a
+line per reboot interval; rt_drift keeps one with the record index.
+
+    rtctime_dtype   rtctime as laid out in the record header
+    rt_epoch        rtctime array -> epoch secs (nan if not valid)
+    rt_valid        rtctime array -> bool
+    hdr_rt          rtctimes of the records at offsets in a buffer
+    fields_rt       rtctimes from rec_cache rt tuples
+    index_epoch     offset, recnum, epoch secs of a whole record index
+    utc_epoch       geoData utc fields -> epoch secs
+    Drift           linear rtc correction
+    fit_drift       fit a Drift to (rtc secs, gps secs) pairs
+    DriftModel      a Drift per reboot interval
+    GpsClock        collect geoData/rtctime pairs (and reboots), fit a
+                    DriftModel
+
+requires numpy.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev24'
+
+import struct
+import numpy as np
+
+import sirf_defs    as     sirf
+from   rec_cache    import RC_RECNUM, RC_RT
+
+__all__ = [
+    'rtctime_dtype',
+    'rt_epoch',
+    'rt_valid',
+    'hdr_rt',
+    'fields_rt',
+    'index_epoch',
+    'utc_epoch',
+    'Drift',
+    'fit_drift',
+    'DriftModel',
+    'GpsClock',
+    'RT_JIFFIES',
+]
+
+RT_JIFFIES  = 32768                     # sub_sec ticks per sec
+RT_OFFSET   = 8                         # rtctime in dt_header_t
+MID_GEO_DATA = 41
+
+rt_struct   = struct.Struct('<HBBBBBBH')  # rtctime, rt_keys order
+
+rtctime_dtype = np.dtype([
+    ('sub_sec', '<u2'), ('sec',  'u1'), ('min',  'u1'), ('hr',   'u1'),
+    ('dow',     'u1'),  ('day',  'u1'), ('mon',  'u1'), ('year', '<u2'),
+])
+
+
+def days_from_civil(year, mon, day):
+    '''days since 1970-01-01, arrays of year, mon (1-12), day (1-31)'''
+    months = (np.asarray(year, dtype = np.int64) - 1970) * 12 + \
+             np.asarray(mon, dtype = np.int64) - 1
+    return months.astype('datetime64[M]').astype('datetime64[D]') \
+                 .astype(np.int64) + day - 1
+
+
+def rt_valid(rt):
+    '''rtctime array -> bool array, looks like a real date/time'''
+    return ((rt['sub_sec'] < RT_JIFFIES) & (rt['sec'] < 60) &
+            (rt['min'] < 60) & (rt['hr'] < 24) &
+            (rt['day'] >= 1) & (rt['day'] <= 31) &
+            (rt['mon'] >= 1) & (rt['mon'] <= 12) & (rt['year'] >= 1970))
+
+
+def rt_epoch(rt):
+    '''rtctime (structured array, rtctime_dtype) -> float secs, UTC epoch
+
+    sub_sec is jiffies (1/32768 sec).  nan where rt isn't valid.
+    '''
+    ok   = rt_valid(rt)
+    mon  = np.where(ok, rt['mon'], 1)
+    secs = days_from_civil(rt['year'], mon, rt['day']) * 86400.0 + \
+           rt['hr'] * 3600.0 + rt['min'] * 60.0 + rt['sec'] + \
+           rt['sub_sec'] / float(RT_JIFFIES)
+    return np.where(ok, secs, np.nan)
+
+
+def hdr_rt(buf, offsets):
+    '''rtctimes of the records starting at offsets in buf
+
+    buf is anything numpy can see as bytes (str, bytearray, mmap).
+    '''
+    u8   = np.frombuffer(buf, dtype = np.uint8)
+    idx  = np.asarray(offsets, dtype = np.int64)[:, None] + RT_OFFSET + \
+           np.arange(rtctime_dtype.itemsize)
+    return np.ascontiguousarray(u8[idx]).view(rtctime_dtype)[:, 0]
+
+
+def fields_rt(rts):
+    '''rtctime array from rt tuples in rec_cache order (rt_keys)'''
+    return np.array([ tuple(rt) for rt in rts ], dtype = rtctime_dtype)
+
+
+def index_epoch(cache):
+    '''(offset, recnum, secs) arrays for every record in a RecCache'''
+    recs = cache.records()
+    offsets = np.array([ o for o, f in recs ], dtype = np.int64)
+    recnums = np.array([ f[RC_RECNUM] for o, f in recs ], dtype = np.uint32)
+    return offsets, recnums, rt_epoch(fields_rt([ f[RC_RT] for o, f in recs ]))
+
+
+def utc_epoch(year, mon, day, hr, mn, ms):
+    '''geoData utc_year/month/day/hour/min/ms (ms into the minute)'''
+    return days_from_civil(year, mon, day) * 86400.0 + \
+           np.asarray(hr) * 3600.0 + np.asarray(mn) * 60.0 + \
+           np.asarray(ms) / 1000.0
+
+
+class Drift(object):
+    '''rtc correction, utc = t + offset + rate * (t - t0)
+
+    t0 is where the fit was centered (epoch secs), rate is secs/sec
+    (ppm * 1e-6).  Called with an array (or a float) of rtc epoch secs,
+    returns corrected ones (offsets, for DriftModel's sake, ignored).
+    '''
+
+    def __init__(self, t0 = 0.0, offset = 0.0, rate = 0.0, n = 0, rms = 0.0):
+        super(Drift, self).__init__()
+        self.t0     = t0
+        self.offset = offset
+        self.rate   = rate
+        self.n      = n                 # fixes used
+        self.rms    = rms               # residual, secs
+
+    def __call__(self, secs, offsets = None):
+        return secs + self.offset + self.rate * (secs - self.t0)
+
+    def __str__(self):
+        return 'offset {:+.3f}s  drift {:+.2f} ppm  ({} fixes, rms {:.3f}s)'.format(
+            self.offset, self.rate * 1e6, self.n, self.rms)
+
+
+def fit_drift(rt_secs, gps_secs, clip = 3.0):
+    '''least squares Drift for rtc secs vs gps secs, None if no pairs
+
+    pairs more than clip (robust) sigmas off the first fit are dropped
+    and the fit done again.  One pair gives an offset only.
+    '''
+    t   = np.asarray(rt_secs, dtype = np.float64)
+    g   = np.asarray(gps_secs, dtype = np.float64)
+    ok  = ~(np.isnan(t) | np.isnan(g))
+    t, g = t[ok], g[ok]
+    if not len(t):
+        return None
+    t0  = t.mean()
+    err = g - t
+    if len(t) < 2 or t.max() == t.min():
+        off = np.median(err)
+        return Drift(t0, off, 0.0, len(t), np.abs(err - off).mean())
+    keep = np.ones(len(t), dtype = bool)
+    for _ in range(3):
+        t0  = t[keep].mean()
+        rate, off = np.polyfit(t[keep] - t0, err[keep], 1)
+        res = err - (off + rate * (t - t0))
+        mad = np.median(np.abs(res[keep] - np.median(res[keep]))) * 1.4826
+        new = np.abs(res) <= max(clip * mad, 1e-3)
+        if (new == keep).all() or new.sum() < 2:
+            break
+        keep = new
+    return Drift(t0, off, rate, keep.sum(), np.sqrt(np.mean(res[keep] ** 2)))
+
+
+class DriftModel(object):
+    '''piecewise Drift, one piece per reboot interval
+
+    starts are the file offsets where each piece begins (the REBOOT
+    records, the first piece starts at 0), drifts the Drift fitted to
+    that interval's fixes, None if it had none.  Those borrow the
+    nearest earlier fitted piece (later if there isn't one), the rtc
+    keeps running across a reboot.
+
+    Called with epoch secs and the offsets of the records they came
+    from, returns corrected secs: one lookup and a multiply-add per
+    record.  Without offsets the last piece is used.
+    '''
+
+    def __init__(self, starts, drifts):
+        super(DriftModel, self).__init__()
+        self.starts = np.asarray(starts, dtype = np.int64)
+        self.drifts = list(drifts)
+        fitted = [ i for i, d in enumerate(self.drifts) if d is not None ]
+        use    = []
+        for i in range(len(self.drifts)):
+            before = [ j for j in fitted if j <= i ]
+            after  = [ j for j in fitted if j > i ]
+            j = before[-1] if before else (after[0] if after else None)
+            use.append(self.drifts[j] if j is not None else Drift())
+        self.t0     = np.array([ d.t0     for d in use ], dtype = np.float64)
+        self.offset = np.array([ d.offset for d in use ], dtype = np.float64)
+        self.rate   = np.array([ d.rate   for d in use ], dtype = np.float64)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def fixes(self):
+        return sum([ d.n for d in self.drifts if d is not None ])
+
+    def piece(self, offsets):
+        i = np.searchsorted(self.starts, offsets, side = 'right') - 1
+        return np.maximum(i, 0)
+
+    def __call__(self, secs, offsets = None):
+        if offsets is None:
+            i = len(self.starts) - 1
+        else:
+            i = self.piece(offsets)
+        return secs + self.offset[i] + self.rate[i] * (secs - self.t0[i])
+
+    def __str__(self):
+        return '{} pieces, {} fixed, {} fixes'.format(
+            len(self), len([ d for d in self.drifts if d is not None ]),
+            self.fixes)
+
+    def to_list(self):
+        '''plain python, for pickling: [ (start, (t0, offset, rate, n, rms)) ]'''
+        return [ (int(s), None if d is None else
+                  (float(d.t0), float(d.offset), float(d.rate), int(d.n),
+                   float(d.rms)))
+                 for s, d in zip(self.starts, self.drifts) ]
+
+    @classmethod
+    def from_list(cls, pieces):
+        return cls([ s for s, d in pieces ],
+                   [ None if d is None else Drift(*d) for s, d in pieces ])
+
+
+class GpsClock(object):
+    '''rtc vs gps time pairs, from geoData fixes
+
+    add_gps_raw is handed each decoded DT_GPS_RAW_SIRFBIN record (offset,
+    raw buffer and obj) and keeps the record's rtctime and the utc of
+    every good geoData fix (nav_valid 0), reboot() each REBOOT's
+    offset.  fit() returns a DriftModel, a Drift per reboot interval.
+    '''
+
+    def __init__(self):
+        super(GpsClock, self).__init__()
+        self.offs  = []                 # record offsets
+        self.rts   = []                 # record rtctime (rt_keys order)
+        self.utcs  = []                 # (year, mon, day, hr, min, ms)
+        self.boots = [ 0 ]              # piece starts
+
+    def __len__(self):
+        return len(self.rts)
+
+    def reboot(self, offset):
+        if offset > self.boots[-1]:
+            self.boots.append(offset)
+
+    def add_gps_raw(self, offset, buf, obj):
+        if obj.sirf_err or obj['sirf_hdr']['mid'].val != MID_GEO_DATA:
+            return
+        geo = sirf.mid_table[MID_GEO_DATA][sirf.MID_OBJECT]
+        if geo['nav_valid'].val != 0:
+            return
+        self.add(offset, rt_struct.unpack_from(buf, RT_OFFSET),
+                 (geo['utc_year'].val, geo['utc_month'].val,
+                  geo['utc_day'].val, geo['utc_hour'].val,
+                  geo['utc_min'].val, geo['utc_ms'].val))
+
+    def add(self, offset, rt, utc):
+        self.offs.append(offset)
+        self.rts.append(rt)
+        self.utcs.append(utc)
+
+    def pairs(self):
+        '''(offsets, rtc secs, gps secs) arrays'''
+        if not self.rts:
+            return np.zeros(0, dtype = np.int64), np.zeros(0), np.zeros(0)
+        utc = np.array(self.utcs, dtype = np.int64)
+        return (np.array(self.offs, dtype = np.int64),
+                rt_epoch(fields_rt(self.rts)), utc_epoch(*utc.T))
+
+    def fit(self, clip = 3.0):
+        offs, t, g = self.pairs()
+        piece = np.searchsorted(self.boots, offs, side = 'right') - 1
+        return DriftModel(self.boots,
+                          [ fit_drift(t[piece == i], g[piece == i], clip)
+                            for i in range(len(self.boots)) ])
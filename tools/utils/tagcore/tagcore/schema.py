@@ -0,0 +1,773 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''record layouts compiled from the C headers
+
+The hand built obj_* factories (core_headers, panic_headers, ...) mirror
+C structs in include/*.h and have to be redone every time CORE_REV
+moves.  The schema compiler reads the headers themselves and produces a
+layout for every typedef'd struct: field offsets and sizes, and one
+struct format string for the whole thing, so a record can be pulled
+apart with a single unpack.
+
+What it understands is what our headers use:
+
+    o #define NAME <integer expression>   (array sizes)
+    o typedef enum { ... } name;          sized like arm-none-eabi does
+                                          (short enums, 1/2/4 bytes)
+    o typedef struct [tag] { ... } [PACKED] name;  and  struct tag { };
+    o typedef <type> name;
+    o scalar, array (incl. [0]), nested struct, and pointer members
+
+A struct is packed if it says PACKED or __attribute__((packed)),
+otherwise members get their natural ARM alignment.  Unions and
+bitfields aren't supported, those structs are listed in
+Schema.errors and left out.  rtctime.h lives outside include/, its
+rtctime_t is built in.
+
+A Schema is keyed by the CORE_REV/CORE_MINOR it was compiled from
+(core_rev.h) and is cached (pickle) under the tagcore cache directory
+as schema-<rev>.<minor>.pkl.  Once a revision has been compiled it can
+be loaded by revision alone (load_rev), the headers don't need to be
+around.  That's how old data gets decoded by a current install.
+
+    s = load_schema(['include', 'tos/system/panic'])
+    lay = s['dt_reboot_t']
+    lay.size, lay.fmt           36, '<HHI...'
+    lay.unpack(buf)             OrderedDict of dotted field -> value
+    lay.obj()                   aggie/atom tree, like the obj_* factories
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev14'
+
+import os
+import re
+import glob
+import struct
+import hashlib
+from   collections  import OrderedDict
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from   base_objs    import atom, aggie
+from   rec_cache    import CACHE_DIR
+
+__all__ = [
+    'Schema',
+    'Layout',
+    'compile_headers',
+    'load_schema',
+    'load_rev',
+    'cached_revs',
+    'SchemaError',
+]
+
+SCHEMA_REV     = 1                      # bump if the pickled layout changes
+SCHEMA_PREFIX  = 'schema-'
+SCHEMA_SUFFIX  = '.pkl'
+
+# headers whose structs are on the wire big endian (sirfbin)
+BIG_ENDIAN_HDRS = ('sirf_msg.h',)
+
+# c type -> (struct code, size).  alignment is the size.  ARM, 32 bit.
+base_types = {
+    'uint8_t':   ('B', 1), 'int8_t':   ('b', 1),
+    'uint16_t':  ('H', 2), 'int16_t':  ('h', 2),
+    'uint32_t':  ('I', 4), 'int32_t':  ('i', 4),
+    'uint64_t':  ('Q', 8), 'int64_t':  ('q', 8),
+    'char':      ('B', 1), 'signed char':   ('b', 1),
+    'unsigned char': ('B', 1),
+    'short':     ('h', 2), 'unsigned short': ('H', 2),
+    'int':       ('i', 4), 'unsigned int':   ('I', 4),
+    'unsigned':  ('I', 4), 'signed':         ('i', 4),
+    'long':      ('i', 4), 'unsigned long':  ('I', 4),
+    'long long': ('q', 8), 'unsigned long long': ('Q', 8),
+    'float':     ('f', 4), 'double':         ('d', 8),
+    'bool':      ('B', 1), '_Bool':          ('B', 1),
+    'size_t':    ('I', 4),
+}
+
+POINTER = ('I', 4)
+
+# types defined in headers we don't have (rtctime.h is down in tos/chips)
+builtin_structs = '''
+typedef struct {
+  uint16_t sub_sec;
+  uint8_t  sec;
+  uint8_t  min;
+  uint8_t  hr;
+  uint8_t  dow;
+  uint8_t  day;
+  uint8_t  mon;
+  uint16_t year;
+} PACKED rtctime_t;
+'''
+
+tok_re = re.compile(r'[A-Za-z_]\w*|0[xX][0-9a-fA-F]+[uUlL]*|\d+[uUlL]*|\S')
+num_re = re.compile(r'^(0[xX][0-9a-fA-F]+|\d+)[uUlL]*$')
+
+
+class SchemaError(Exception):
+    pass
+
+
+def _strip(text):
+    '''comments gone, line continuations joined'''
+    text = re.sub(r'/\*.*?\*/', ' ', text, flags = re.S)
+    text = re.sub(r'//[^\n]*', '', text)
+    return text.replace('\\\n', ' ')
+
+
+class Field(object):
+    '''one member of a struct
+
+    code is the struct code of a scalar (or element), None for a nested
+    struct (layout).  count is None for a scalar, otherwise the array
+    dimension (0 for a trailing data[0]).
+    '''
+
+    def __init__(self, name, ctype, offset, size, code = None,
+                 layout = None, count = None):
+        self.name   = name
+        self.ctype  = ctype
+        self.offset = offset
+        self.size   = size
+        self.code   = code
+        self.layout = layout
+        self.count  = count
+
+
+class Layout(object):
+    '''compiled layout of one struct
+
+    attributes: name, size, align, packed, endian, fields [Field]
+                fmt     one struct format string for the whole struct
+                leaves  [(dotted name, number of values)] in fmt order
+    '''
+
+    def __init__(self, name, packed, endian):
+        self.name   = name
+        self.packed = packed
+        self.endian = endian
+        self.fields = []
+        self.size   = 0
+        self.align  = 1
+        self.fmt    = None
+        self.leaves = None
+        self._s     = None
+
+    def _flatten(self, prefix, base, codes, leaves):
+        '''append codes/leaves, returns the offset we've covered to'''
+        pos = base
+        for f in self.fields:
+            off = base + f.offset
+            if off > pos:
+                codes.append('{}x'.format(off - pos))
+                pos = off
+            name = prefix + f.name
+            if f.layout:
+                n = f.count if f.count is not None else 1
+                for i in range(n):
+                    sub = name if f.count is None else '{}[{}]'.format(name, i)
+                    pos = f.layout._flatten(sub + '.', pos, codes, leaves)
+                continue
+            if f.count == 0:
+                continue
+            if f.count is None:
+                codes.append(f.code)
+                leaves.append((name, 1))
+            elif f.code in ('B', 'b') and f.size == f.count:
+                codes.append('{}s'.format(f.count))
+                leaves.append((name, 1))
+            else:
+                codes.append('{}{}'.format(f.count, f.code))
+                leaves.append((name, f.count))
+            pos = off + f.size
+        end = base + self.size
+        if end > pos:
+            codes.append('{}x'.format(end - pos))
+            pos = end
+        return pos
+
+    def finish(self):
+        codes, leaves = [], []
+        self._flatten('', 0, codes, leaves)
+        self.fmt    = self.endian + ''.join(codes)
+        self.leaves = leaves
+        if struct.calcsize(self.fmt) != self.size:
+            raise SchemaError('{}: fmt {} is {} bytes, layout {}'.format(
+                self.name, self.fmt, struct.calcsize(self.fmt), self.size))
+
+    @property
+    def struct(self):
+        if self._s is None:
+            self._s = struct.Struct(self.fmt)
+        return self._s
+
+    def unpack(self, buf, offset = 0):
+        '''OrderedDict of dotted name -> value (tuple for arrays)'''
+        vals = self.struct.unpack_from(buf, offset)
+        out  = OrderedDict()
+        i    = 0
+        for name, n in self.leaves:
+            out[name] = vals[i] if n == 1 else vals[i:i + n]
+            i += n
+        return out
+
+    def obj(self):
+        '''aggie/atom tree for this struct, same shape as the C'''
+        d   = OrderedDict()
+        pos = 0
+        for f in self.fields:
+            if f.offset > pos:
+                d['_pad{}'.format(pos)] = atom(('{}s'.format(f.offset - pos), '{}'))
+            pos = f.offset + f.size
+            if f.layout:
+                if f.count is None:
+                    d[f.name] = f.layout.obj()
+                else:
+                    d[f.name] = aggie(OrderedDict([
+                        ('{}'.format(i), f.layout.obj())
+                        for i in range(f.count) ]))
+            elif f.count == 0:
+                continue
+            elif f.count is None:
+                d[f.name] = atom((self.endian + f.code, '{}'))
+            elif f.code in ('B', 'b') and f.size == f.count:
+                d[f.name] = atom(('{}s'.format(f.count), '{}'))
+            else:
+                d[f.name] = atom((self.endian + '{}{}'.format(f.count, f.code),
+                                  '{}'))
+        if self.size > pos:
+            d['_pad{}'.format(pos)] = atom(('{}s'.format(self.size - pos), '{}'))
+        return aggie(d)
+
+    def __repr__(self):
+        return '{}: {} bytes{}  {}'.format(self.name, self.size,
+            ' packed' if self.packed else '', self.fmt)
+
+
+class Schema(object):
+    '''all the layouts from one set of headers
+
+    attributes: rev, minor (CORE_REV, CORE_MINOR), layouts {name: Layout},
+                enums {name: (size, {enumerator: value})}, defines,
+                digest (sha1 of the headers), errors [(struct, why)]
+    '''
+
+    def __init__(self):
+        super(Schema, self).__init__()
+        self.rev      = None
+        self.minor    = None
+        self.layouts  = OrderedDict()
+        self.enums    = {}
+        self.defines  = {}
+        self.types    = {}              # typedef aliases, name -> c type
+        self.digest   = None
+        self.errors   = []
+
+    def __getitem__(self, name):
+        return self.layouts[name]
+
+    def __contains__(self, name):
+        return name in self.layouts
+
+    def key(self):
+        return (self.rev, self.minor)
+
+    # ---- parsing
+
+    def _eval(self, expr):
+        '''integer value of a #define/array/enum expression, or None'''
+        toks = []
+        for t in tok_re.findall(expr):
+            m = num_re.match(t)
+            if m:
+                toks.append(str(int(m.group(1), 0)))
+            elif re.match(r'[A-Za-z_]', t):
+                if t in self.defines and self.defines[t] is not None:
+                    toks.append(str(self.defines[t]))
+                else:
+                    return None
+            elif t in '()+-*/%<>|&~^':
+                toks.append('//' if t == '/' else t)
+            else:
+                return None
+        if not toks:
+            return None
+        try:
+            return int(eval(' '.join(toks).replace('< <', '<<')
+                            .replace('> >', '>>'), {'__builtins__': {}}))
+        except Exception:
+            return None
+
+    def _defines(self, text):
+        for line in text.split('\n'):
+            m = re.match(r'\s*#\s*define\s+([A-Za-z_]\w*)\s+(.+)$', line)
+            if m:
+                v = self._eval(m.group(2).strip())
+                if v is not None:
+                    self.defines[m.group(1)] = v
+
+    def _type_info(self, ctype):
+        '''(code, size, align, layout) of a c type, None if unknown'''
+        seen = set()
+        while ctype in self.types and ctype not in seen:
+            seen.add(ctype)
+            ctype = self.types[ctype]
+        if ctype.endswith('*'):
+            return POINTER[0], POINTER[1], POINTER[1], None
+        if ctype in base_types:
+            code, size = base_types[ctype]
+            return code, size, size, None
+        if ctype in self.enums:
+            size = self.enums[ctype][0]
+            return {1: 'B', 2: 'H', 4: 'I'}[size], size, size, None
+        if ctype in self.layouts:
+            lay = self.layouts[ctype]
+            return None, lay.size, lay.align, lay
+        return None
+
+    def _attrs(self, toks, i):
+        '''skip PACKED/__attribute__((...)), returns (i, packed)'''
+        packed = False
+        while i < len(toks):
+            if toks[i] == 'PACKED':
+                packed = True
+                i += 1
+            elif toks[i] in ('__attribute__', '__attribute'):
+                depth, j = 0, i + 1
+                while j < len(toks):
+                    if toks[j] == '(':
+                        depth += 1
+                    elif toks[j] == ')':
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    elif toks[j] in ('packed', '__packed__'):
+                        packed = True
+                    j += 1
+                i = j + 1
+            else:
+                break
+        return i, packed
+
+    def _match(self, toks, i):
+        '''index just past the } matching the { at toks[i]'''
+        depth = 0
+        while i < len(toks):
+            if toks[i] == '{':
+                depth += 1
+            elif toks[i] == '}':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        raise SchemaError('unbalanced braces')
+
+    def _enum(self, body):
+        vals, nxt = OrderedDict(), 0
+        for item in ' '.join(body).split(','):
+            item = item.strip()
+            if not item:
+                continue
+            if '=' in item:
+                name, expr = [ x.strip() for x in item.split('=', 1) ]
+                v = self._eval(expr)
+                if v is None:
+                    v = vals.get(expr, nxt)
+            else:
+                name, v = item, nxt
+            vals[name] = v
+            self.defines[name] = v
+            nxt = v + 1
+        lo = min(vals.values()) if vals else 0
+        hi = max(vals.values()) if vals else 0
+        if lo < 0:
+            size = 1 if lo >= -0x80 and hi < 0x80 else \
+                   2 if lo >= -0x8000 and hi < 0x8000 else 4
+        else:
+            size = 1 if hi <= 0xff else 2 if hi <= 0xffff else 4
+        return size, vals
+
+    def _struct(self, name, body, packed, endian):
+        '''compile members (token list) into a Layout'''
+        lay = Layout(name, packed, endian)
+        off = 0
+        for decl in self._split_decls(body):
+            if 'union' in decl or ':' in decl or '{' in decl:
+                raise SchemaError('unsupported member: {}'.format(' '.join(decl)))
+            # type words, then declarators separated by ','
+            j = 0
+            while j < len(decl) and decl[j] in ('const', 'volatile', 'struct',
+                                                 'enum', 'unsigned', 'signed',
+                                                 'short', 'long'):
+                j += 1
+            tw = decl[:j + 1]
+            tw = [ t for t in tw if t not in ('const', 'volatile', 'struct',
+                                              'enum') ]
+            ctype = ' '.join(tw)
+            if ctype in ('unsigned short int', 'short int', 'long int',
+                         'unsigned long int'):
+                ctype = ctype.replace(' int', '')
+            for dcl in self._split_commas(decl[j + 1:]):
+                ptr = dcl.count('*')
+                dcl = [ t for t in dcl if t != '*' ]
+                if not dcl:
+                    # type word was the name (int x;  "unsigned x")
+                    raise SchemaError('bad member {}'.format(' '.join(decl)))
+                fname = dcl[0]
+                dims  = []
+                k = 1
+                while k < len(dcl) and dcl[k] == '[':
+                    e = dcl.index(']', k)
+                    v = self._eval(' '.join(dcl[k + 1:e]))
+                    if v is None:
+                        raise SchemaError('{}.{}: array size {}'.format(
+                            name, fname, ' '.join(dcl[k + 1:e])))
+                    dims.append(v)
+                    k = e + 1
+                info = self._type_info(ctype + ' *' if ptr else ctype) \
+                       if not ptr else (POINTER[0], POINTER[1], POINTER[1], None)
+                if info is None:
+                    raise SchemaError('{}.{}: unknown type {}'.format(
+                        name, fname, ctype))
+                code, esize, ealign, sub = info
+                count = None
+                if dims:
+                    count = 1
+                    for d in dims:
+                        count *= d
+                if not packed:
+                    off = (off + ealign - 1) / ealign * ealign
+                    lay.align = max(lay.align, ealign)
+                size = esize * (count if count is not None else 1)
+                lay.fields.append(Field(fname, ctype, off, size, code, sub, count))
+                off += size
+        if not packed:
+            off = (off + lay.align - 1) / lay.align * lay.align
+        lay.size = off
+        lay.finish()
+        return lay
+
+    def _split_decls(self, body):
+        decls, cur = [], []
+        for t in body:
+            if t == ';':
+                if cur:
+                    decls.append(cur)
+                cur = []
+            else:
+                cur.append(t)
+        return decls
+
+    def _split_commas(self, toks):
+        out, cur, depth = [], [], 0
+        for t in toks:
+            if t == '[':
+                depth += 1
+            elif t == ']':
+                depth -= 1
+            if t == ',' and depth == 0:
+                out.append(cur)
+                cur = []
+            else:
+                cur.append(t)
+        if cur:
+            out.append(cur)
+        return out
+
+    def parse(self, text, endian = '<'):
+        '''parse one header's worth of text'''
+        text = _strip(text)
+        self._defines(text)
+        text = '\n'.join([ l for l in text.split('\n')
+                           if not l.lstrip().startswith('#') ])
+        toks = tok_re.findall(text)
+        i = 0
+        while i < len(toks):
+            t = toks[i]
+            if t == 'typedef' and i + 1 < len(toks) and \
+               toks[i + 1] in ('struct', 'enum', 'union'):
+                kind = toks[i + 1]
+                i, packed = self._attrs(toks, i + 2)
+                tag = None
+                if toks[i] != '{':
+                    tag = toks[i]
+                    i += 1
+                if toks[i] != '{':      # typedef struct tag name;
+                    self.types[toks[i]] = tag
+                    i += 2
+                    continue
+                end = self._match(toks, i)
+                body = toks[i + 1:end - 1]
+                i, p2 = self._attrs(toks, end)
+                names = []
+                while toks[i] != ';':
+                    if toks[i] not in (',', '*'):
+                        names.append(toks[i])
+                    i += 1
+                i += 1
+                self._define(kind, names[0] if names else tag, body,
+                             packed or p2, endian, tag, names[1:])
+            elif t in ('struct', 'enum', 'union') and i + 2 < len(toks) and \
+                 (toks[i + 1] == '{' or toks[i + 2] == '{'):
+                kind = t
+                i, packed = self._attrs(toks, i + 1)
+                tag = None
+                if toks[i] != '{':
+                    tag = toks[i]
+                    i += 1
+                end = self._match(toks, i)
+                body = toks[i + 1:end - 1]
+                i, p2 = self._attrs(toks, end)
+                while i < len(toks) and toks[i] != ';':
+                    i += 1
+                i += 1
+                self._define(kind, tag, body, packed or p2, endian, tag, [])
+            elif t == 'typedef':
+                j = i + 1
+                while toks[j] != ';':
+                    j += 1
+                decl = [ x for x in toks[i + 1:j]
+                         if x not in ('const', 'volatile', 'struct', 'enum') ]
+                if len(decl) >= 2 and '(' not in decl:
+                    ptr = '*' in decl
+                    decl = [ x for x in decl if x != '*' ]
+                    self.types[decl[-1]] = ' '.join(decl[:-1]) + (' *' if ptr else '')
+                i = j + 1
+            else:
+                # anything else (prototypes, externs, ...), skip the statement
+                depth = 0
+                while i < len(toks):
+                    if toks[i] == '{':
+                        depth += 1
+                    elif toks[i] == '}':
+                        depth -= 1
+                    elif toks[i] == ';' and depth == 0:
+                        break
+                    i += 1
+                i += 1
+
+    def _define(self, kind, name, body, packed, endian, tag, aliases):
+        if kind == 'enum':
+            size, vals = self._enum(body)
+            for n in [ name, tag ] + aliases:
+                if n:
+                    self.enums[n] = (size, vals)
+            return
+        if not name:
+            return
+        if kind == 'union':
+            self.errors.append((name, 'union'))
+            return
+        try:
+            lay = self._struct(name, body, packed, endian)
+        except SchemaError as e:
+            self.errors.append((name, str(e)))
+            return
+        self.layouts[name] = lay
+        if tag and tag != name:
+            self.types[tag] = name
+        for n in aliases:
+            self.types[n] = name
+
+    def resolve_aliases(self):
+        '''typedef foo_t bar_t; where foo_t is a struct, bar_t gets it too'''
+        for n, t in self.types.items():
+            if t in self.layouts and n not in self.layouts:
+                self.layouts[n] = self.layouts[t]
+
+    def save(self, path):
+        '''pickle as plain data, loads no matter how we got imported'''
+        lays = []
+        for lay in self.layouts.values():
+            if lay in [ l for l, x in lays ]:
+                continue
+            lays.append((lay, (lay.name, lay.packed, lay.endian, lay.size,
+                lay.align, [ (f.name, f.ctype, f.offset, f.size, f.code,
+                              f.layout.name if f.layout else None, f.count)
+                             for f in lay.fields ])))
+        data = {
+            'rev':      SCHEMA_REV,
+            'core':     (self.rev, self.minor),
+            'digest':   self.digest,
+            'defines':  self.defines,
+            'types':    self.types,
+            'enums':    self.enums,
+            'errors':   self.errors,
+            'layouts':  [ x for l, x in lays ],
+            'names':    [ (n, lay.name) for n, lay in self.layouts.items() ],
+        }
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as fd:
+            pickle.dump(data, fd, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, path)
+
+    @classmethod
+    def from_data(cls, data):
+        s = cls()
+        s.rev, s.minor = data['core']
+        s.digest  = data['digest']
+        s.defines = data['defines']
+        s.types   = data['types']
+        s.enums   = data['enums']
+        s.errors  = data['errors']
+        by_name = {}
+        for name, packed, endian, size, align, fields in data['layouts']:
+            lay = Layout(name, packed, endian)
+            lay.size, lay.align = size, align
+            by_name[name] = (lay, fields)
+        for lay, fields in by_name.values():
+            lay.fields = [ Field(n, ct, off, sz, code,
+                                 by_name[sub][0] if sub else None, cnt)
+                           for n, ct, off, sz, code, sub, cnt in fields ]
+        for lay, fields in by_name.values():
+            lay.finish()
+        for n, name in data['names']:
+            s.layouts[n] = by_name[name][0]
+        return s
+
+
+def _header_files(dirs):
+    files = []
+    for d in dirs:
+        if os.path.isdir(d):
+            files.extend(sorted(glob.glob(os.path.join(d, '*.h'))))
+        elif os.path.isfile(d):
+            files.append(d)
+    return files
+
+
+def _order(files):
+    '''headers, included ones before the ones that include them'''
+    by_name = dict([ (os.path.basename(f), f) for f in files ])
+    out, seen = [], set()
+    def visit(f):
+        if f in seen:
+            return
+        seen.add(f)
+        with open(f) as fd:
+            for inc in re.findall(r'#\s*include\s*[<"]([^>"]+)[>"]', fd.read()):
+                if inc in by_name:
+                    visit(by_name[inc])
+        out.append(f)
+    for f in files:
+        visit(f)
+    return out
+
+
+def compile_headers(dirs):
+    '''compile every *.h in dirs (or files) into a Schema'''
+    if isinstance(dirs, basestring):
+        dirs = [ dirs ]
+    files = _order(_header_files(dirs))
+    s = Schema()
+    h = hashlib.sha1()
+    s.parse(builtin_structs)
+    for f in files:
+        with open(f) as fd:
+            text = fd.read()
+        h.update(text)
+        base = os.path.basename(f)
+        s.parse(text, '>' if base in BIG_ENDIAN_HDRS else '<')
+    s.resolve_aliases()
+    s.rev    = s.defines.get('CORE_REV')
+    s.minor  = s.defines.get('CORE_MINOR')
+    s.digest = h.hexdigest()
+    return s
+
+
+def _cache_path(rev, minor, cache_dir):
+    return os.path.join(cache_dir or CACHE_DIR,
+                        '{}{}.{}{}'.format(SCHEMA_PREFIX, rev, minor, SCHEMA_SUFFIX))
+
+
+def load_rev(rev, minor, cache_dir = None):
+    '''cached Schema for CORE_REV rev/minor, None if never compiled'''
+    try:
+        with open(_cache_path(rev, minor, cache_dir), 'rb') as fd:
+            c = pickle.load(fd)
+    except Exception:
+        return None
+    if c.get('rev') != SCHEMA_REV:
+        return None
+    return Schema.from_data(c)
+
+
+def cached_revs(cache_dir = None):
+    '''list of (rev, minor) we have compiled schemas for'''
+    out = []
+    for p in glob.glob(os.path.join(cache_dir or CACHE_DIR,
+                                    SCHEMA_PREFIX + '*' + SCHEMA_SUFFIX)):
+        m = re.match(r'(\d+)\.(\d+)$', os.path.basename(p)[
+            len(SCHEMA_PREFIX):-len(SCHEMA_SUFFIX)])
+        if m:
+            out.append((int(m.group(1)), int(m.group(2))))
+    return sorted(out)
+
+
+def load_schema(dirs, cache_dir = None):
+    '''Schema for the headers in dirs, from the cache if they haven't changed'''
+    if isinstance(dirs, basestring):
+        dirs = [ dirs ]
+    files = _order(_header_files(dirs))
+    h = hashlib.sha1()
+    rev = minor = None
+    for f in files:
+        with open(f) as fd:
+            text = fd.read()
+        h.update(text)
+        m = re.search(r'#\s*define\s+CORE_REV\s+(\d+)', text)
+        if m:
+            rev = int(m.group(1))
+        m = re.search(r'#\s*define\s+CORE_MINOR\s+(\d+)', text)
+        if m:
+            minor = int(m.group(1))
+    s = load_rev(rev, minor, cache_dir)
+    if s is not None and s.digest == h.hexdigest():
+        return s
+    s = compile_headers(dirs)
+    try:
+        d = cache_dir or CACHE_DIR
+        if not os.path.isdir(d):
+            os.makedirs(d)
+        s.save(_cache_path(s.rev, s.minor, cache_dir))
+    except (IOError, OSError):
+        pass                            # no cache, just slower next time
+    return s
+
+
+if __name__ == '__main__':
+    import sys
+    s = load_schema(sys.argv[1:] if len(sys.argv) > 1 else ['include'])
+    print('core_rev {}/{}  {} layouts  digest {}'.format(
+        s.rev, s.minor, len(s.layouts), s.digest[:12]))
+    for name, lay in s.layouts.items():
+        if name == lay.name:
+            print('  {}'.format(lay))
+        else:
+            print('  {} -> {}'.format(name, lay.name))
+    for name, why in s.errors:
+        print('  *** {}: {}'.format(name, why))
@@ -0,0 +1,192 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''raw SD image access, areas located via the fs locator
+
+A raw image (dd) of a tag's SD has the filesystem locator (fs_loc_t,
+include/fs_loc.h) in sector 0 at FS_LOC_OFFSET, with a backup copy in
+sector 6.  It gives the absolute start and end sectors (inclusive) of
+each area: PANIC, CONFIG, IMAGE, and DBLK.
+
+    SdImage     mmap the image, find the locator, hand out area views.
+    AreaView    one area as a file-like object (read/seek/tell plus the
+                TagFile extras tagdump uses).  Offset 0 is the first
+                sector of the area.  Reads come straight out of the mmap,
+                nothing gets copied out to a separate file.
+
+    sd  = SdImage('tag.img')
+    dblk = sd.area(FS_LOC_DBLK)
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev7'
+
+import os
+import mmap
+import struct
+
+from   core_headers import obj_fs_loc
+
+__all__ = [
+    'SdImage',
+    'AreaView',
+    'FS_LOC_PANIC',
+    'FS_LOC_CONFIG',
+    'FS_LOC_IMAGE',
+    'FS_LOC_DBLK',
+]
+
+SECTOR_SIZE     = 512
+FS_LOC_SECTOR   = 0
+FS_LOC_BACKUP   = 6                     # fatxfc also writes it here
+FS_LOC_OFFSET   = 0x140
+FS_LOC_SIG      = 0xdeedbeaf
+FS_LOC_SHORTS   = 38                    # sizeof(fs_loc_t)/2, incl pad
+
+FS_LOC_PANIC    = 0
+FS_LOC_CONFIG   = 1
+FS_LOC_IMAGE    = 2
+FS_LOC_DBLK     = 3
+FS_LOC_MAX      = 4
+
+area_names = ('panic', 'config', 'image', 'dblk')
+
+loc_shorts = struct.Struct('<{}H'.format(FS_LOC_SHORTS))
+
+
+class AreaView(object):
+    '''file-like view of part of a mmap'd image
+
+    looks enough like a TagFile (read, tell, seek, name, tail, sparse,
+    data_ranges, next_data, next_hole, coverage) to be handed to
+    tagdump and friends.  Never sparse, the image has it all.
+    '''
+
+    def __init__(self, mm, base, size, name = ''):
+        super(AreaView, self).__init__()
+        self.mm     = mm
+        self.base   = base
+        self.size   = size
+        self.name   = name
+        self.pos    = 0
+        self.tail   = False
+        self.net_io = False
+        self.sparse = False
+
+    def read(self, cnt):
+        if self.pos >= self.size:
+            return ''
+        end = min(self.pos + cnt, self.size)
+        buf = self.mm[self.base + self.pos:self.base + end]
+        self.pos = end
+        return buf
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos, how = os.SEEK_SET):
+        if how == os.SEEK_CUR:
+            pos += self.pos
+        elif how == os.SEEK_END:
+            pos += self.size
+        self.pos = max(pos, 0)
+        return self.pos
+
+    def data_ranges(self):
+        return [ (0, self.size) ] if self.size else []
+
+    def next_data(self, pos):
+        return pos if pos < self.size else None
+
+    def next_hole(self, pos):
+        return None
+
+    def coverage(self):
+        return self.size, self.size, 0
+
+
+class SdImage(object):
+    '''raw SD image
+
+    inputs:     input   file name or (binary) file object
+
+    methods:    area    AreaView for an area (FS_LOC_*)
+                extent  (start, end) sectors of an area, inclusive
+
+    attributes: valid, errors, loc (obj_fs_loc), locators [(start, end)]
+    '''
+
+    def __init__(self, input):
+        super(SdImage, self).__init__()
+        if isinstance(input, basestring):
+            input = open(input, 'rb')
+        self.fd     = input
+        self.name   = input.name
+        self.size   = os.fstat(input.fileno()).st_size
+        self.mm     = mmap.mmap(input.fileno(), 0, access = mmap.ACCESS_READ)
+        self.loc    = obj_fs_loc()
+        self.valid  = False
+        self.errors = []
+        self.locators = []
+        for sector in (FS_LOC_SECTOR, FS_LOC_BACKUP):
+            if self.set_loc(sector):
+                break
+
+    def set_loc(self, sector):
+        off = sector * SECTOR_SIZE + FS_LOC_OFFSET
+        buf = self.mm[off:off + loc_shorts.size]
+        self.errors = []
+        if len(buf) < loc_shorts.size:
+            self.errors.append('sector {}: short'.format(sector))
+            return False
+        self.loc.set(bytearray(buf))
+        if self.loc['loc_sig'].val != FS_LOC_SIG or \
+           self.loc['loc_sig_a'].val != FS_LOC_SIG:
+            self.errors.append('sector {}: sigs 0x{:08x}/0x{:08x}'.format(
+                sector, self.loc['loc_sig'].val, self.loc['loc_sig_a'].val))
+        chk = sum(loc_shorts.unpack(buf)) & 0xffff
+        if chk:
+            self.errors.append('sector {}: chksum 0x{:04x} (sum 0x{:04x})'.format(
+                sector, self.loc['loc_chksum'].val, chk))
+        self.locators = [ (self.loc[n]['start'].val, self.loc[n]['end'].val)
+                          for n in area_names ]
+        self.valid = not self.errors
+        return self.valid
+
+    def extent(self, idx):
+        return self.locators[idx]
+
+    def area(self, idx):
+        '''AreaView of area idx, clipped to the image'''
+        start, end = self.locators[idx]
+        base = start * SECTOR_SIZE
+        size = (end - start + 1) * SECTOR_SIZE
+        if base >= self.size:
+            size = 0
+        elif base + size > self.size:
+            size = self.size - base
+        return AreaView(self.mm, base, size, self.name)
+
+    def __repr__(self):
+        s = ' '.join([ '{}: 0x{:x}-0x{:x}'.format(n, lo, hi)
+                       for n, (lo, hi) in zip(area_names, self.locators) ])
+        if not self.valid:
+            s += '  <bad: {}>'.format(', '.join(self.errors))
+        return s
@@ -0,0 +1,172 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''sensor data tables, built from DT_SENSOR_DATA records
+
+A DT_SENSOR_DATA record is a dt_sensor_data_t (28 bytes, sched_delta,
+sns_id) followed by the payload, 16 bit datums, one or more samples of
+however many datums the sensor produces (include/typed_data.h,
+<sensor>_PAYLOAD_SIZE).
+
+While the stream is being decoded SensorTable only stashes the raw
+record bytes, grouped by sensor and record length.  build() hands each
+group to numpy as one buffer with a structured dtype covering header
+and payload, so headers, times, and samples all come out as arrays with
+no per sample (or per record) python.  Tables from different streams
+(or different tags) concatenate with concat().
+
+    SensorTable     accumulate records, build/write per sensor tables
+    concat          merge tables of the same sensor, time ordered
+
+requires numpy.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev24'
+
+import numpy as np
+
+from   misc_utils   import write_columns
+from   core_headers import sensors, sensor_name
+from   rt_time      import rtctime_dtype, rt_epoch
+
+__all__ = [
+    'SensorTable',
+    'rt_epoch',
+    'concat',
+    'sensor_name',
+    'sensors',
+    'SNS_HDR_SIZE',
+]
+
+SNS_HDR_SIZE = 28                       # sizeof(dt_sensor_data_t)
+
+def record_dtype(ndatums, datum = '<u2'):
+    '''dt_sensor_data_t plus ndatums of payload, one record'''
+    return np.dtype([
+        ('len',         '<u2'),
+        ('dtype',       '<u2'),
+        ('recnum',      '<u4'),
+        ('rt',          rtctime_dtype),
+        ('recsum',      '<u2'),
+        ('sched_delta', '<u4'),
+        ('sns_id',      '<u2'),
+        ('pad',         '<u2'),
+        ('data',        datum, (ndatums,)),
+    ])
+
+
+def table_dtype(columns, datum):
+    return np.dtype([
+        ('offset',      np.int64),      # file offset of the record
+        ('recnum',      np.uint32),     # dblk record number
+        ('time',        np.float64),    # record rtctime, epoch secs
+        ('sched_delta', np.uint32),
+    ] + [ (c, datum) for c in columns ])
+
+
+class SensorTable(object):
+    '''sensor data accumulator
+
+    add_record is handed each DT_SENSOR_DATA record (the raw record
+    buffer).  build(sns_id) returns that sensor's samples as a numpy
+    structured array, one row per sample, in stream order.  A record
+    with more than one sample gives that many rows, same time.  Times
+    are corrected with clock (rt_time Drift or DriftModel) if set.
+    '''
+
+    def __init__(self):
+        super(SensorTable, self).__init__()
+        self.groups = {}                # (sns_id, rlen) -> ([offset], [bytes])
+        self.clock  = None              # rtc correction
+
+    def __len__(self):
+        return sum([ len(o) for o, r in self.groups.values() ])
+
+    def add_record(self, offset, buf):
+        '''stash one record, buf starts at the record header'''
+        rlen   = buf[0] | (buf[1] << 8)
+        sns_id = buf[24] | (buf[25] << 8)
+        offs, recs = self.groups.setdefault((sns_id, rlen), ([], []))
+        offs.append(offset)
+        recs.append(bytes(buf[:rlen]))
+
+    def sensor_ids(self):
+        return sorted(set([ sid for sid, rlen in self.groups ]))
+
+    def build(self, sns_id):
+        '''table (structured array) of every sample of sensor sns_id'''
+        name, columns, datum = sensors.get(sns_id,
+                                           (sensor_name(sns_id), ('d0',), '<u2'))
+        ncols  = len(columns)
+        parts  = []
+        for (sid, rlen), (offs, recs) in self.groups.items():
+            if sid != sns_id:
+                continue
+            ndatums = (rlen - SNS_HDR_SIZE) / 2
+            if ndatums < ncols or rlen & 1:
+                print('*** {}: {} records of len {} skipped, {} datums, '
+                      'a sample is {}'.format(name, len(recs), rlen,
+                                              ndatums, ncols))
+                continue                # runt, no complete sample
+            if ndatums % ncols:
+                print('*** {}: {} records of len {}, {} datums not a '
+                      'multiple of {}, extra dropped'.format(name,
+                          len(recs), rlen, ndatums, ncols))
+            nsamp = ndatums / ncols
+            dt    = record_dtype(ndatums, datum)
+            recs  = np.frombuffer(b''.join(recs), dtype = dt)
+            t = np.zeros((len(recs), nsamp), dtype = table_dtype(columns, datum))
+            t['offset']      = np.asarray(offs, dtype = np.int64)[:, None]
+            t['recnum']      = recs['recnum'][:, None]
+            t['time']        = rt_epoch(recs['rt'])[:, None]
+            t['sched_delta'] = recs['sched_delta'][:, None]
+            data = recs['data'][:, :nsamp * ncols].reshape(len(recs), nsamp, ncols)
+            for i, c in enumerate(columns):
+                t[c] = data[:, :, i]
+            parts.append(t.reshape(-1))
+        if not parts:
+            return np.zeros(0, dtype = table_dtype(columns, datum))
+        table = np.concatenate(parts)
+        if self.clock:
+            table['time'] = self.clock(table['time'], table['offset'])
+        return table[np.argsort(table['offset'], kind = 'mergesort')]
+
+    def write(self, fname):
+        '''one table per sensor, <base>_<sensor><ext>.  returns {name: rows}'''
+        base, dot, ext = fname.rpartition('.')
+        if not dot:
+            base, ext = fname, 'csv'
+        counts = {}
+        for sid in self.sensor_ids():
+            table = self.build(sid)
+            name  = sensor_name(sid)
+            write_columns('{}_{}.{}'.format(base, name, ext), table)
+            counts[name] = len(table)
+        return counts
+
+
+def concat(tables):
+    '''merge tables of one sensor (several streams/tags) into one, by time'''
+    tables = [ t for t in tables if len(t) ]
+    if not tables:
+        return np.zeros(0)
+    table = np.concatenate(tables)
+    return table[np.argsort(table['time'], kind = 'mergesort')]
@@ -37,8 +37,9 @@ packets
 # when someone does a wild import of this module.
 
 import struct
+from   base_objs    import lazy_table
 
-__version__ = '0.3.2'
+__version__ = '0.3.3.dev25'
 
 __all__ = [
     'MID_DECODER',
@@ -61,7 +62,11 @@ __all__ = [
     'SIRF_SID_OFFSET',
 
     'SIRF_EOP_SEQ',
-    'SIRF_END_SIZE'
+    'SIRF_END_SIZE',
+
+    'SOP_BYTES',
+    'PKT_OVERHEAD',
+    'packet_len',
 ]
 
 
@@ -74,9 +79,9 @@ __all__ = [
 # mid.  When evaluated the tuple will display the name of the object
 # rather than the __repr__ of the object (decode_base), which
 # typically is some value.  What you want to see is the object name.
-
-mid_table = {}
-mid_count = {}
+#
+# the object is normally a lazy_obj and only gets built when the mid is
+# first looked up (see base_objs.lazy_table).
 
 MID_DECODER  = 0
 MID_EMITTERS = 1
@@ -84,27 +89,31 @@ MID_OBJECT   = 2
 MID_NAME     = 3
 MID_OBJ_NAME = 4
 
+mid_table = lazy_table(MID_OBJECT)
+mid_count = {}
+mid_bad   = {}                          # embedded packets that failed checks
+
 
 # ee{56,232}_table holds vectors for how to decode extended ephemeris
 # packets, mids 56 and 232.  EE_ defines are used to access the vectors
 # pulled from the tables.  The ee56 and ee232 tables contain the same
 # tuples.
 
-ee56_table  = {}
-ee56_count  = {}
-
-nl64_table  = {}
-nl64_count  = {}
-
-ee232_table = {}
-ee232_count = {}
-
 EE_DECODER  = 0
 EE_EMITTERS = 1
 EE_OBJECT   = 2
 EE_NAME     = 3
 EE_OBJ_NAME = 4
 
+ee56_table  = lazy_table(EE_OBJECT)
+ee56_count  = {}
+
+nl64_table  = lazy_table(EE_OBJECT)
+nl64_count  = {}
+
+ee232_table = lazy_table(EE_OBJECT)
+ee232_count = {}
+
 
 # SIRF_MAX_PAYLOAD is the maximum payload bytes we allow.
 # the protocol allows for up to 2^11 - 1 (2047)
@@ -126,3 +135,30 @@ SIRF_EOP_SEQ    = 0xb0b3
 sirf_end_str    = '>HH'
 sirf_end_struct = struct.Struct(sirf_end_str)
 SIRF_END_SIZE   = sirf_end_struct.size
+
+SOP_BYTES    = struct.pack('>H', SIRF_SOP_SEQ)
+PKT_OVERHEAD = SIRF_HDR_SIZE + SIRF_END_SIZE
+
+
+def packet_len(buf, i):
+    '''good packet at buf[i]?
+
+    returns its length (SOP thru EOP), 0 bad (len, EOP), -1 bad
+    checksum, None if it runs off the end of buf.  buf is anything
+    that struct can unpack from (str, bytearray, mmap).
+    '''
+    if i + SIRF_HDR_SIZE > len(buf):
+        return None
+    rlen = sirf_hdr_struct.unpack_from(buf, i)[1]
+    if rlen == 0 or rlen > SIRF_MAX_PAYLOAD:
+        return 0
+    plen = rlen + PKT_OVERHEAD
+    if i + plen > len(buf):
+        return None
+    e = i + SIRF_HDR_SIZE + rlen
+    chk, eop = sirf_end_struct.unpack_from(buf, e)
+    if eop != SIRF_EOP_SEQ:
+        return 0
+    if sum(bytearray(buf[i + SIRF_HDR_SIZE:e])) & 0x7fff != chk:
+        return -1
+    return plen
@@ -347,7 +347,7 @@ def emit_sirf_set_msg_rate(level, offset, buf, obj):
 
     print(' ({},{},{})'.format(mode,mid,rate))
     mode_name = mode_names.get(mode, 'mode/' + str(mode))
-    v = sirf.mid_table.get(mid, (None, None, None, 'mid/' + str(mid)))
+    v = dict.get(sirf.mid_table, mid, (None, None, None, 'mid/' + str(mid)))
     mid_name = v[MID_NAME]
     rate = 'off' if rate == 0 else str(rate)
     result = 'ick'
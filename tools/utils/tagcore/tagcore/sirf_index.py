@@ -0,0 +1,298 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''packet index for raw sirfbin captures
+
+One pass over a capture, SCAN_CHUNK at a time, finds every packet that
+checks out (SOP, len, EOP, checksum) and remembers (offset, len, mid,
+sid) for it, 12 bytes a packet.  With the index a reader can seek
+straight to the packets it wants (say just MID 41, or 225/6) instead of
+walking hundreds of MB.
+
+The index is kept next to the capture as <capture>.sidx.  It carries the
+size of the capture it covers and a hash of the first IDENT_SIZE bytes.
+A capture that has only grown gets its index extended from where the
+last scan stopped, anything else gets rescanned.
+
+    SirfIndex       the index: build/extend, select, save/load
+    load_index      index for a capture, from its sidecar if still good
+    split_points    cut a capture into pieces on packet boundaries
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import os
+import struct
+import hashlib
+
+from   sirf_defs    import *
+import sirf_defs    as     sirf
+from   sirf_headers import mids_w_sids
+
+__all__ = [
+    'SirfIndex',
+    'load_index',
+    'SIDX_SUFFIX',
+    'packet_len',
+    'find_packet',
+    'split_points',
+]
+
+SIDX_SUFFIX  = '.sidx'
+SIDX_MAGIC   = 'SIDX'
+SIDX_REV     = 1
+SCAN_CHUNK   = 1024 * 1024
+IDENT_SIZE   = 512
+
+EOP_BYTES    = struct.pack('>H', SIRF_EOP_SEQ)
+
+# magic, rev, covered size, scan end, count, hunts, chksum errs, ident
+sidx_hdr   = struct.Struct('<4sHQQIII20s')
+sidx_entry = struct.Struct('<QHBB')     # offset, len, mid, sid
+
+
+def find_packet(buf, start, end):
+    '''first good packet starting in [start, end), -1 if none
+
+    a lone good packet in the middle of junk (or of another packet)
+    is too easy to come by, it also has to be followed by another
+    good packet (or the end of buf).  Used to pick places a capture
+    can be split without cutting a packet.
+    '''
+    i = buf.find(SOP_BYTES, start, end + 1)
+    while 0 <= i < end:
+        plen = packet_len(buf, i)
+        if plen is None:
+            return i                    # runs to the end of the capture
+        if plen > 0:
+            nxt = packet_len(buf, i + plen)
+            if nxt is None or nxt > 0:
+                return i
+        i = buf.find(SOP_BYTES, i + 1, end + 1)
+    return -1
+
+
+def split_points(buf, start, end, n):
+    '''cut [start, end) of buf into n pieces at good packets
+
+    returns the piece boundaries, [start, ..., end].  Each cut is the
+    first good packet (see find_packet) at or past its even share, so
+    pieces can come out fewer (and uneven) if the packets are sparse.
+    '''
+    points = [ start ]
+    step   = max((end - start) / max(n, 1), 1)
+    for k in xrange(1, n):
+        edge = max(start + k * step, points[-1] + 1)
+        if edge >= end:
+            break
+        cut = find_packet(buf, edge, end)
+        if cut < 0:
+            break
+        if cut > points[-1]:
+            points.append(cut)
+    points.append(end)
+    return points
+
+
+def _ident(fd):
+    fd.seek(0)
+    return hashlib.sha1(fd.read(IDENT_SIZE)).digest()
+
+
+class SirfIndex(object):
+    '''index of the good packets in a sirfbin capture
+
+    methods:    scan        (re)index fd from self.end on
+                select      generate (offset, len, mid, sid), filtered
+                entry       i'th entry
+                save/load   sidecar i/o
+                mid_counts  mid -> packets
+
+    attributes: size (bytes of capture covered), end (where the next
+                scan starts), hunts (candidate SOPs that didn't check
+                out), chksum_errors, ident
+    '''
+
+    def __init__(self):
+        super(SirfIndex, self).__init__()
+        self.entries       = bytearray()
+        self.size          = 0
+        self.end           = 0
+        self.hunts         = 0
+        self.chksum_errors = 0
+        self.ident         = None
+
+    def __len__(self):
+        return len(self.entries) / sidx_entry.size
+
+    def entry(self, i):
+        return sidx_entry.unpack_from(self.entries, i * sidx_entry.size)
+
+    def _check(self, buf, i):
+        '''packet at buf[i]?  returns its length, 0 bad, None need more'''
+        plen = packet_len(buf, i)
+        if plen is not None and plen < 0:
+            self.chksum_errors += 1
+            return 0
+        return plen
+
+    def scan(self, fd, size = None, chunk = SCAN_CHUNK):
+        '''index from self.end up to size (eof), returns packets added
+
+        a packet running off the end isn't counted as bad, the next scan
+        (the capture grew) starts with it.
+        '''
+        if self.ident is None:
+            self.ident = _ident(fd)
+        if size is None:
+            fd.seek(0, os.SEEK_END)
+            size = fd.tell()
+        # entries past the last scan's end (after a partial packet) get
+        # found again
+        while len(self) and self.entry(len(self) - 1)[0] >= self.end:
+            del self.entries[-sidx_entry.size:]
+        added = 0
+        pos   = self.end
+        tail  = None
+        carry = ''
+        while True:
+            fd.seek(pos)
+            new  = fd.read(min(chunk, size - pos)) if pos < size else ''
+            pos += len(new)
+            buf  = carry + new
+            base = pos - len(buf)
+            eof  = pos >= size or not new
+            keep = max(len(buf) - 1, 0)     # a SOP could straddle the edge
+            i    = buf.find(SOP_BYTES)
+            while i >= 0:
+                plen = self._check(buf, i)
+                if plen is None:
+                    if not eof:
+                        keep = i        # finish it with the next chunk
+                        break
+                    if tail is None:    # partial, or a false SOP
+                        tail = base + i
+                    i = buf.find(SOP_BYTES, i + 1)
+                    continue
+                if plen:
+                    mid = ord(buf[i + SIRF_MID_OFFSET])
+                    sid = ord(buf[i + SIRF_SID_OFFSET]) \
+                          if mid in mids_w_sids and plen > PKT_OVERHEAD + 1 else 0
+                    self.entries.extend(sidx_entry.pack(base + i, plen, mid, sid))
+                    added += 1
+                    keep = max(keep, i + plen)
+                    i = buf.find(SOP_BYTES, i + plen)
+                else:
+                    self.hunts += 1
+                    i = buf.find(SOP_BYTES, i + 1)
+            carry = buf[keep:]
+            if eof:
+                break
+        if tail is None:
+            tail = pos - 1 if buf[-1:] == SOP_BYTES[:1] else pos
+        self.end  = tail
+        self.size = size
+        return added
+
+    def select(self, mids = None, sids = None, start = 0, end = None):
+        '''generate (offset, len, mid, sid) for matching packets
+
+        mids, sids: collections, None for don't care.  A sid only
+        matches packets of mids that carry one.
+        '''
+        for i in xrange(len(self)):
+            offset, plen, mid, sid = sidx_entry.unpack_from(
+                self.entries, i * sidx_entry.size)
+            if offset < start:
+                continue
+            if end is not None and offset > end:
+                break
+            if mids and mid not in mids:
+                continue
+            if sids and (mid not in mids_w_sids or sid not in sids):
+                continue
+            yield offset, plen, mid, sid
+
+    def mid_counts(self):
+        counts = {}
+        for i in xrange(len(self)):
+            mid = self.entries[i * sidx_entry.size + 10]
+            counts[mid] = counts.get(mid, 0) + 1
+        return counts
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as fd:
+            fd.write(sidx_hdr.pack(SIDX_MAGIC, SIDX_REV, self.size, self.end,
+                                   len(self), self.hunts, self.chksum_errors,
+                                   self.ident))
+            fd.write(self.entries)
+        os.rename(tmp, path)
+
+    def load(self, path):
+        '''True if path held a good index'''
+        try:
+            with open(path, 'rb') as fd:
+                hdr = fd.read(sidx_hdr.size)
+                if len(hdr) < sidx_hdr.size:
+                    return False
+                magic, rev, size, end, count, hunts, errs, ident = \
+                    sidx_hdr.unpack(hdr)
+                if magic != SIDX_MAGIC or rev != SIDX_REV:
+                    return False
+                entries = bytearray(fd.read(count * sidx_entry.size))
+        except (IOError, OSError):
+            return False
+        if len(entries) != count * sidx_entry.size:
+            return False
+        self.entries, self.size, self.end = entries, size, end
+        self.hunts, self.chksum_errors, self.ident = hunts, errs, ident
+        return True
+
+
+def load_index(fd, name, save = True, verbose = 0):
+    '''SirfIndex for capture name (open as fd)
+
+    uses name.sidx if it still matches the capture, extends it if the
+    capture grew, otherwise builds a new one.  Saved back if anything
+    changed (and save).
+    '''
+    path = name + SIDX_SUFFIX
+    fd.seek(0, os.SEEK_END)
+    size = fd.tell()
+    idx  = SirfIndex()
+    if idx.load(path):
+        if idx.ident != _ident(fd) or idx.size > size:
+            if verbose:
+                print('*** sirf index: {} stale, rebuilding'.format(path))
+            idx = SirfIndex()
+        elif idx.size == size:
+            return idx
+    added = idx.scan(fd, size)
+    if verbose:
+        print('*** sirf index: {} packets ({} new), {} hunts, {} chksum errs'.format(
+            len(idx), added, idx.hunts, idx.chksum_errors))
+    if save:
+        try:
+            idx.save(path)
+        except (IOError, OSError) as e:
+            print('*** sirf index: can not write {}: {}'.format(path, e))
+    return idx
@@ -0,0 +1,220 @@
+# Copyright (c) 2018 Eric B. Decker
+# All rights reserved.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# See COPYING in the top level directory of this source tree.
+#
+# Contact: Eric B. Decker <cire831@gmail.com>
+
+'''live sirfbin input, a serial port (or pty, or pipe) as it talks
+
+SirfFramer is handed bytes as they show up and hands back packets as
+soon as they are complete and check out (SOP, len, EOP, checksum).
+Consumed bytes are dropped off the front of its buffer, so it never
+holds more than the packet being assembled.
+
+A false SOP (with a length that looks fine) would hold everything up
+until that many bytes have come in.  So while a packet is incomplete,
+the framer also looks inside it, and a good packet starting in there
+means the SOP was false.  Nothing waits longer than the next good
+packet.
+
+read_live does non-blocking reads off the device, optionally copies
+everything to a raw capture, and runs the framer.
+
+    open_live       open a tty (raw, baud) / pty / fifo non-blocking
+    SirfFramer      incremental framing
+    read_live       generate packets off a live fd
+    pty_standin     replay a capture through a pty, for testing
+
+sirfplay (tools/utils/sirfplay) replays a capture through pty_standin,
+point sirfdump --live at the pty it prints.
+'''
+
+from   __future__         import print_function
+
+__version__ = '0.3.3.dev25'
+
+import os
+import tty
+import time
+import errno
+import select
+import termios
+
+from   sirf_defs    import *
+
+__all__ = [
+    'SirfFramer',
+    'open_live',
+    'read_live',
+    'pty_standin',
+    'LIVE_BAUD',
+]
+
+LIVE_BAUD   = 9600                      # GPS_TARGET_SPEED (gsd4e_v4/gps.h)
+LIVE_READ   = 4096                      # most per read
+LIVE_IDLE   = 0.25                      # select timeout, capture flush
+
+
+def open_live(name, baud = LIVE_BAUD):
+    '''non-blocking fd for name
+
+    a tty is put in raw mode at baud, anything else (pty master side,
+    fifo, plain file) is just opened.
+    '''
+    fd = os.open(name, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+    if os.isatty(fd):
+        speed = getattr(termios, 'B{}'.format(baud), None)
+        if speed is None:
+            os.close(fd)
+            raise ValueError('unsupported baud rate {}'.format(baud))
+        tty.setraw(fd, termios.TCSANOW)
+        attrs = termios.tcgetattr(fd)
+        attrs[4] = attrs[5] = speed     # ispeed, ospeed
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+    return fd
+
+
+class SirfFramer(object):
+    '''incremental sirfbin framing
+
+    feed() bytes in, packets() generates (offset, len, mid, rec_buf)
+    for every complete good packet, offset counting bytes fed.  Bytes
+    that don't frame are hunted over.
+
+    attributes: hunts (SOPs that didn't check out), chksum_errors,
+                skipped (bytes hunted over), end (bytes fed)
+    '''
+
+    def __init__(self):
+        super(SirfFramer, self).__init__()
+        self.buf           = bytearray()
+        self.base          = 0          # stream offset of buf[0]
+        self.hunts         = 0
+        self.chksum_errors = 0
+        self.skipped       = 0
+        self.look          = 0          # looked inside buf[0] to here
+
+    @property
+    def end(self):
+        return self.base + len(self.buf)
+
+    @property
+    def pending(self):
+        '''bytes of an incomplete packet being held'''
+        return len(self.buf)
+
+    def feed(self, data):
+        self.buf.extend(data)
+
+    def _consume(self, n):
+        del self.buf[:n]
+        self.base += n
+        self.look  = max(self.look - n, 0)
+
+    def _overtaken(self):
+        '''does a good packet start inside the incomplete one at buf[0]'''
+        buf = self.buf
+        j = buf.find(SOP_BYTES, max(self.look, 1))
+        while j > 0:
+            plen = packet_len(buf, j)
+            if plen is None:
+                self.look = j           # see how it turns out
+                return False
+            if plen > 0:
+                return True
+            j = buf.find(SOP_BYTES, j + 1)
+        self.look = max(len(buf) - 1, 1)
+        return False
+
+    def packets(self):
+        buf = self.buf
+        while buf:
+            i = buf.find(SOP_BYTES)
+            if i < 0:
+                # a trailing first byte of SOP could be the real thing
+                i = len(buf) - 1 if buf[-1] == ord(SOP_BYTES[0]) else len(buf)
+            if i:
+                self.skipped += i
+                self._consume(i)
+                continue
+            plen = packet_len(buf, 0)
+            if plen is None:
+                if not self._overtaken():
+                    return              # wait for the rest
+                plen = 0                # false SOP
+            if plen <= 0:
+                self.hunts += 1
+                if plen < 0:
+                    self.chksum_errors += 1
+                self.skipped += 1
+                self._consume(1)
+                continue
+            rec_buf = buf[:plen]
+            offset  = self.base
+            self._consume(plen)
+            yield offset, plen, rec_buf[SIRF_MID_OFFSET], rec_buf
+
+def read_live(fd, framer, capture = None, idle = LIVE_IDLE):
+    '''generate (offset, len, mid, rec_buf) as packets come in on fd
+
+    capture, if given, is a file that gets every byte read.  Returns
+    at eof (writer of a pipe gone, pty master closed).
+    '''
+    while True:
+        if not select.select([ fd ], [], [], idle)[0]:
+            if capture:
+                capture.flush()
+            continue
+        try:
+            data = os.read(fd, LIVE_READ)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                continue
+            if e.errno == errno.EIO:    # pty, other side closed
+                return
+            raise
+        if not data:
+            return
+        if capture:
+            capture.write(data)
+        framer.feed(data)
+        for rec in framer.packets():
+            yield rec
+
+
+def pty_standin(data, baud = LIVE_BAUD, burst = 1.0):
+    '''play data out a pty like a gps would
+
+    opens a pty pair (raw), returns (master fd, slave name, writer)
+    where writer() writes data to the master at about baud, a burst
+    worth (burst secs) at a time.  The reader opens slave name.
+    '''
+    import pty
+
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    name = os.ttyname(slave)
+    step = max(int(baud / 10 * burst), 1)
+
+    def writer():
+        for i in xrange(0, len(data), step):
+            t0 = time.time()
+            os.write(master, data[i:i + step])
+            time.sleep(max(burst - (time.time() - t0), 0))
+        os.close(slave)
+
+    return master, name, writer
+
@@ -1,6 +1,7 @@
 '''assign decoders and emitters for sirfbin mids'''
 
 import sirf_defs     as     sirf
+from   base_objs     import lazy_obj
 from   sirf_headers  import *
 from   sirf_emitters import *
 
@@ -11,8 +12,8 @@ def decode_null(level, offset, buf, obj):
     return 0
 
 
-#                      EE_DECODER            EE_EMITTERS               EE_OBJECT                   EE_NAME         EE_OBJ_NAME
-sirf.ee56_table[42] = (decode_default,     [ emit_ee56_sifStat ],      obj_sirf_ee56_sifStat(),   'eeSifStat',    'obj_sirf_ee_sifStat')
+#                      EE_DECODER            EE_EMITTERS               EE_OBJECT                            EE_NAME         EE_OBJ_NAME
+sirf.ee56_table[42] = (decode_default,     [ emit_ee56_sifStat ],      lazy_obj(obj_sirf_ee56_sifStat),   'eeSifStat',    'obj_sirf_ee_sifStat')
 
 sirf.ee56_table[1]    = (decode_null, None, None, 'eeGPSDataEphemMask', 'none')
 sirf.ee56_table[2]    = (decode_null, None, None, 'eeIntegrity',        'none')
@@ -38,36 +39,36 @@ sirf.nl64_table[2]    = (decode_null, None, None, 'auxMeas',            'none')
 sirf.nl64_table[3]    = (decode_null, None, None, 'aidingInit',         'none')
 
 
-#                      MID_DECODER           MID_EMITTERS              MID_OBJECT                  MID_NAME        MID_OBJ_NAME
-sirf.mid_table[2]   = (decode_default,     [ emit_sirf_nav_data ],     obj_sirf_nav(),            'navData',      'obj_sirf_nav')
-sirf.mid_table[4]   = (decode_sirf_navtrk, [ emit_sirf_navtrk ],       obj_sirf_navtrk(),         'navTrack',     'obj_sirf_navtrk')
-sirf.mid_table[6]   = (decode_default,     [ emit_sirf_swver ],        obj_sirf_swver(),          'swVer',        'obj_sirf_swver')
+#                      MID_DECODER           MID_EMITTERS              MID_OBJECT                           MID_NAME        MID_OBJ_NAME
+sirf.mid_table[2]   = (decode_default,     [ emit_sirf_nav_data ],     lazy_obj(obj_sirf_nav),            'navData',      'obj_sirf_nav')
+sirf.mid_table[4]   = (decode_sirf_navtrk, [ emit_sirf_navtrk ],       lazy_obj(obj_sirf_navtrk),         'navTrack',     'obj_sirf_navtrk')
+sirf.mid_table[6]   = (decode_default,     [ emit_sirf_swver ],        lazy_obj(obj_sirf_swver),          'swVer',        'obj_sirf_swver')
 sirf.mid_table[11]  = (decode_null,        [ emit_sirf_ack_nack ],     None,                      'ack',          'none')
 sirf.mid_table[12]  = (decode_null,        [ emit_sirf_ack_nack ],     None,                      'nack',         'none')
-sirf.mid_table[13]  = (decode_sirf_vis,    [ emit_sirf_vis ],          obj_sirf_vis(),            'visList',      'obj_sirf_vis')
-sirf.mid_table[14]  = (decode_default,     [ emit_sirf_alm_data ],     obj_sirf_alm_data(),       'almData',      'obj_sirf_alm_data')
-sirf.mid_table[15]  = (decode_default,     [ emit_sirf_ephem_data ],   obj_sirf_ephem_data(),     'ephemData',    'obj_sirf_ephem_data')
-sirf.mid_table[18]  = (decode_default,     [ emit_sirf_ots ],          obj_sirf_ots(),            'okToSend',     'obj_sirf_ots')
-sirf.mid_table[19]  = (decode_default,     [ emit_default  ],          obj_sirf_nav_params(),     'navParamsRsp', 'obj_sirf_nav_params')
+sirf.mid_table[13]  = (decode_sirf_vis,    [ emit_sirf_vis ],          lazy_obj(obj_sirf_vis),            'visList',      'obj_sirf_vis')
+sirf.mid_table[14]  = (decode_default,     [ emit_sirf_alm_data ],     lazy_obj(obj_sirf_alm_data),       'almData',      'obj_sirf_alm_data')
+sirf.mid_table[15]  = (decode_default,     [ emit_sirf_ephem_data ],   lazy_obj(obj_sirf_ephem_data),     'ephemData',    'obj_sirf_ephem_data')
+sirf.mid_table[18]  = (decode_default,     [ emit_sirf_ots ],          lazy_obj(obj_sirf_ots),            'okToSend',     'obj_sirf_ots')
+sirf.mid_table[19]  = (decode_default,     [ emit_default  ],          lazy_obj(obj_sirf_nav_params),     'navParamsRsp', 'obj_sirf_nav_params')
 
-sirf.mid_table[28]  = (decode_default,     [ emit_default ],           obj_sirf_nl_measData(),    'nl_measData',  'obj_sirf_navlib_measData')
-sirf.mid_table[29]  = (decode_default,     [ emit_default ],           obj_sirf_nl_dgpsData(),    'nl_dgpsData',  'obj_sirf_navlib_dgpsData')
-sirf.mid_table[30]  = (decode_default,     [ emit_default ],           obj_sirf_nl_svState(),     'nl_svState',   'obj_sirf_navlib_svState')
-sirf.mid_table[31]  = (decode_default,     [ emit_default ],           obj_sirf_nl_initData(),    'nl_initData',  'obj_sirf_navlib_initData')
+sirf.mid_table[28]  = (decode_default,     [ emit_default ],           lazy_obj(obj_sirf_nl_measData),    'nl_measData',  'obj_sirf_navlib_measData')
+sirf.mid_table[29]  = (decode_default,     [ emit_default ],           lazy_obj(obj_sirf_nl_dgpsData),    'nl_dgpsData',  'obj_sirf_navlib_dgpsData')
+sirf.mid_table[30]  = (decode_default,     [ emit_default ],           lazy_obj(obj_sirf_nl_svState),     'nl_svState',   'obj_sirf_navlib_svState')
+sirf.mid_table[31]  = (decode_default,     [ emit_default ],           lazy_obj(obj_sirf_nl_initData),    'nl_initData',  'obj_sirf_navlib_initData')
 
-sirf.mid_table[41]  = (decode_default,     [ emit_sirf_geo ],          obj_sirf_geo(),            'geoData',      'obj_sirf_geo')
+sirf.mid_table[41]  = (decode_default,     [ emit_sirf_geo ],          lazy_obj(obj_sirf_geo),            'geoData',      'obj_sirf_geo')
 sirf.mid_table[56]  = (decode_sirf_ee56,   [ emit_sirf_ee56 ],         None,                      'extEphem',     'none, sub-objects')
 sirf.mid_table[64]  = (decode_sirf_nl64,   [ emit_sirf_nl64 ],         None,                      'navlib msgs',  'none, sub-objects')
-sirf.mid_table[90]  = (decode_default,     [ emit_sirf_pwr_mode_rsp ], obj_sirf_pwr_mode_rsp(),   'pwrRsp',       'obj_sirf_pwr_mode_rsp')
-sirf.mid_table[128] = (decode_default,     [ emit_default  ],          obj_sirf_init_data_src(),  'initDataSrc',  'obj_sirf_init_data_src')
-sirf.mid_table[130] = (decode_default,     [ emit_sirf_alm_set ],      obj_sirf_alm_set(),        'setAlmanac',   'obj_sirf_alm_set')
-sirf.mid_table[149] = (decode_default,     [ emit_sirf_ephem_set ],    obj_sirf_ephem_set(),      'setEphemeris', 'obj_sirf_ephem_set')
-sirf.mid_table[166] = (decode_default,     [ emit_sirf_set_msg_rate ], obj_sirf_set_msg_rate(),   'setMsgRate',   'obj_sirf_set_msg_rate')
-sirf.mid_table[214] = (decode_default,     [ emit_default  ],          obj_sirf_hw_conf_rsp(),    'hwConfigRsp',  'obj_sirf_hw_conf_rsp')
-sirf.mid_table[218] = (decode_default,     [ emit_sirf_pwr_mode_req ], obj_sirf_pwr_mode_req(),   'pwrReq',       'obj_sirf_pwr_mode_req')
-sirf.mid_table[225] = (decode_default,     [ emit_sirf_statistics ],   obj_sirf_statistics(),     'stats',        'obj_sirf_statistics')
+sirf.mid_table[90]  = (decode_default,     [ emit_sirf_pwr_mode_rsp ], lazy_obj(obj_sirf_pwr_mode_rsp),   'pwrRsp',       'obj_sirf_pwr_mode_rsp')
+sirf.mid_table[128] = (decode_default,     [ emit_default  ],          lazy_obj(obj_sirf_init_data_src),  'initDataSrc',  'obj_sirf_init_data_src')
+sirf.mid_table[130] = (decode_default,     [ emit_sirf_alm_set ],      lazy_obj(obj_sirf_alm_set),        'setAlmanac',   'obj_sirf_alm_set')
+sirf.mid_table[149] = (decode_default,     [ emit_sirf_ephem_set ],    lazy_obj(obj_sirf_ephem_set),      'setEphemeris', 'obj_sirf_ephem_set')
+sirf.mid_table[166] = (decode_default,     [ emit_sirf_set_msg_rate ], lazy_obj(obj_sirf_set_msg_rate),   'setMsgRate',   'obj_sirf_set_msg_rate')
+sirf.mid_table[214] = (decode_default,     [ emit_default  ],          lazy_obj(obj_sirf_hw_conf_rsp),    'hwConfigRsp',  'obj_sirf_hw_conf_rsp')
+sirf.mid_table[218] = (decode_default,     [ emit_sirf_pwr_mode_req ], lazy_obj(obj_sirf_pwr_mode_req),   'pwrReq',       'obj_sirf_pwr_mode_req')
+sirf.mid_table[225] = (decode_default,     [ emit_sirf_statistics ],   lazy_obj(obj_sirf_statistics),     'stats',        'obj_sirf_statistics')
 sirf.mid_table[232] = (decode_sirf_ee232,  [ emit_sirf_ee232 ],        None,                      'extEphem',     'none, sub-objects')
-sirf.mid_table[255] = (decode_default,     [ emit_sirf_dev_data ],     obj_sirf_dev_data(),       'devData',      'obj_sirf_dev_data')
+sirf.mid_table[255] = (decode_default,     [ emit_sirf_dev_data ],     lazy_obj(obj_sirf_dev_data),       'devData',      'obj_sirf_dev_data')
 
 
 #
@@ -33,9 +33,25 @@ import sys
 import types
 import time
 import errno
+from   bisect import bisect_right
+
+from   dblk_archive import DblkArchive, is_archive
 
 # NOTE: os.lseek(fd, pos, how) and file.seek(pos, whence) use os.SEEK_SET (0),
 # os.SEEK_CUR (1), and os.SEEK_END (2) for the how or whence parameter.
+#
+# SEEK_DATA/SEEK_HOLE (Linux 3.1+) let us find the holes in a sparse file
+# (tagfuse only has the pieces that have been pulled) without reading
+# them.  python2's os doesn't define them and the values are different
+# on other systems, so only Linux.  A filesystem that doesn't know about
+# holes reports the whole file as data.
+
+if sys.platform.startswith('linux'):
+    TF_SEEK_DATA = getattr(os, 'SEEK_DATA', 3)
+    TF_SEEK_HOLE = getattr(os, 'SEEK_HOLE', 4)
+else:
+    TF_SEEK_DATA = None
+    TF_SEEK_HOLE = None
 
 TF_SEEK_END = os.SEEK_END
 
@@ -57,6 +73,22 @@ class TagFile(object):
 
                 seek    set stream position to position/whence.  Whence
                         determines the base that is used for using position.
+
+                data_ranges list of (start, end) of the regions that are
+                        actually present (not holes).
+
+                next_data   where data starts at or after pos (pos if not
+                        in a hole), None if nothing but hole from pos on.
+
+                next_hole   where the next hole after pos starts, None if
+                        none before eof.
+
+                coverage    (bytes present, size, number of holes)
+
+    sparse is True if the input has any holes (see data_ranges).
+
+    A compressed dblk archive (see dblk_archive) is read as the stream it
+    holds, tell/seek/data_ranges are in terms of the original stream.
     '''
 
     def __init__(self, input, net_io = False, tail = False,
@@ -72,6 +104,14 @@ class TagFile(object):
         self.timeout= timeout
         self.fd     = input
         self.name   = input.name
+        self.extents= None              # see data_ranges
+        self.ext_end= 0                 # file size when extents were found
+        self.sparse = False
+        self.arc    = None
+
+        if not self.net_io and is_archive(input):
+            self.arc = DblkArchive(input)
+            self.fd  = self.arc
 
         if (self.net_io):
             self.fd.close()
@@ -125,3 +165,82 @@ class TagFile(object):
             return os.lseek(self.fileno, pos, how)
         else:
             return self.fd.seek(pos, how)
+
+    def _fileno(self):
+        return self.fileno if self.net_io else self.fd.fileno()
+
+    def data_ranges(self):
+        '''find the data (non-hole) regions, doesn't read any data'''
+        if self.arc:
+            self.extents = self.arc.data_ranges()
+            self.ext_end = self.arc.size
+            self.sparse  = self.arc.sparse
+            return self.extents
+        fileno = self._fileno()
+        size   = os.fstat(fileno).st_size
+        ranges = []
+        if TF_SEEK_DATA is None:
+            ranges = [ (0, size) ] if size else []
+        else:
+            cur = self.tell()
+            pos = 0
+            try:
+                while pos < size:
+                    try:
+                        start = os.lseek(fileno, pos, TF_SEEK_DATA)
+                    except OSError as e:
+                        if e.errno == errno.ENXIO:      # only hole to eof
+                            break
+                        raise
+                    end = os.lseek(fileno, start, TF_SEEK_HOLE)
+                    ranges.append((start, end))
+                    pos = end
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                ranges = [ (0, size) ] if size else []
+            self.seek(cur)
+        self.extents = ranges
+        self.ext_end = size
+        self.sparse  = ranges != [ (0, size) ] and size != 0
+        if self.verbose >= 3 and self.sparse:
+            print('*** TF: {} data extents, size {}'.format(len(ranges), size))
+        return ranges
+
+    def _extent(self, pos):
+        '''index of the extent at or before pos, refresh if past the end'''
+        if self.extents is None or pos >= self.ext_end:
+            self.data_ranges()
+        return bisect_right(self.extents, (pos, sys.maxint)) - 1
+
+    def next_data(self, pos):
+        if not self.sparse and pos < self.ext_end:
+            return pos
+        i = self._extent(pos)
+        if i >= 0 and pos < self.extents[i][1]:
+            return pos
+        if i + 1 < len(self.extents):
+            return self.extents[i + 1][0]
+        return pos if self.tail else None
+
+    def next_hole(self, pos):
+        if not self.sparse:
+            return None
+        i = self._extent(pos)
+        if i >= 0 and pos < self.extents[i][1]:
+            end = self.extents[i][1]
+        else:
+            end = pos
+        return end if end < self.ext_end else None
+
+    def coverage(self):
+        if self.extents is None:
+            self.data_ranges()
+        present = sum([ e - s for s, e in self.extents ])
+        holes   = len(self.extents) - 1 if self.extents else 0
+        if self.extents:
+            holes += (self.extents[0][0] != 0) + \
+                     (self.extents[-1][1] != self.ext_end)
+        elif self.ext_end:
+            holes = 1
+        return present, self.ext_end, holes
@@ -3,8 +3,38 @@ tagdump:  decode and display Tag Data Stream file
 @author: Dan Maltbie/Eric B. Decker
 """
 
-__version__ = '0.4.4.dev1'
+__version__ = '0.4.4.dev16'
 
+# 0.4.4.dev16   --utc: drift fit per reboot, kept with the record index (--cache)
+#
+# 0.4.4.dev15   --utc, correct written times for rtc drift (fit against geoData)
+#
+# 0.4.4.dev14   --ttff FILE, time to first fix per gps cycle and histogram
+#
+# 0.4.4.dev13   --gps_mon FILE, gps monitor state intervals and time in state
+#
+# 0.4.4.dev12   --cno FILE, per satellite C/N0 series from navTrack
+#
+# 0.4.4.dev11   GPS_RAW: embedded sirfbin packets checked, bad ones counted (bad: per mid)
+#
+# 0.4.4.dev10   --sensors FILE, sensor data tables; SENSOR_DATA/SET emitters
+#
+# 0.4.4.dev9    switch decoders on REBOOT core_rev (dt_registry), resync finds other rev REBOOTs
+#
+# 0.4.4.dev8    faster start, lazy decode objects, import sd_image only for --image
+#
+# 0.4.4.dev7    --image, dump the DBLK area of a raw SD image in place
+#
+# 0.4.4.dev6    use the dblk dir, stop at dblk_nxt (--nobound), --sector BLK
+#
+# 0.4.4.dev5    resync by sector, skip erased sectors, no more bailing on zeros
+#
+# 0.4.4.dev4    sparse input, skip holes (don't read them), report coverage
+#
+# 0.4.4.dev3    --cache/--cache_dir, persistent record cache
+#
+# 0.4.4.dev2    --track FILE, gps track table from navData/geoData
+#
 # 0.4.4.dev1    19/5
 #               add initial support for the TagNet data type (25)
 #               support for SYNC_FLUSH
@@ -42,6 +42,8 @@ from   tagcore.dt_defs   import *
 import tagcore.dt_defs   as     dtd
 import tagcore.sirf_defs as     sirf
 from   tagcore.tagfile   import *
+from   tagcore.rec_cache import RecCache, set_hdr, RC_LEN, RC_RECNUM
+from   tagcore.dblk_dir  import DblkDir
 from   tagdumpargs       import parseargs
 
 import tagdump_config                   # populate configuration
@@ -91,12 +93,26 @@ ver_str = '\ntagdump: ' + VERSION + ':  core: ' + str(CORE_REV) + \
 #   -x endpos       set last file position to process
 #                   (args.endpos, integer)
 #
+#   --sector BLK    start at absolute SD sector BLK (uses the dblk dir)
+#                   (args.sector, integer)
+#
+#   --nobound       don't stop at the first erased sector (dblk_nxt),
+#                   keep going to dblk_high.  (args.nobound, boolean)
+#
 #   -n num          limit display to <num> records
 #                   (args.num, integer)
 #
+#                   --rtypes, -r/-l and -n only limit what is displayed,
+#                   --track, --sensors, --cno, --gps_mon, --ttff and --utc
+#                   still see every record.
+#
 #   --net           enable network (tagnet) i/o
 #                   (args.net, boolean)
 #
+#   --image         input is a raw image of a tag's SD.  The DBLK area is
+#                   found using the fs locator and read in place (mmap).
+#                   (args.image, boolean)
+#
 #   -s SYNC_DELTA   search some number of syncs backward
 #                   always implies --net, -s 0 says .last_sync
 #                   -s 1 and -s -1 both say sync one back.
@@ -117,6 +133,55 @@ ver_str = '\ntagdump: ' + VERSION + ':  core: ' + str(CORE_REV) + \
 #                   get new data as it arrives.  (implies --net)
 #                   (args.tail, boolean)
 #
+#   --cache         use the persistent record cache.  Records (and resyncs)
+#                   seen on a previous run of the same file are pulled
+#                   without rechecking.  (args.cache, boolean)
+#
+#   --cache_dir DIR use DIR for the cache (implies --cache)
+#                   (args.cache_dir, string)
+#
+#   --new           with --cache, start where the cached records end, only
+#                   what was appended since the last run gets looked at.
+#                   (args.new, boolean)
+#
+#   --track FILE    collect gps fixes (navData, MID 2 and geoData, MID 41)
+#                   and write the track table to FILE when done.
+#                   FILE ending in .npz is written as numpy columns,
+#                   otherwise csv.  Requires numpy.
+#                   (args.track, string)
+#
+#   --sensors FILE  collect DT_SENSOR_DATA samples and write one table per
+#                   sensor to FILE_<sensor>.<ext> (batt, temp, accel, ...)
+#                   when done.  .npz or csv like --track.  Requires numpy.
+#                   (args.sensors, string)
+#
+#   --cno FILE      collect navTrack (MID 4) channels and write a C/N0
+#                   series per satellite to FILE_sv<NN>.<ext> (time,
+#                   az, el, state, cno0-9, cno_avg).  .npz or csv like
+#                   --track.  Requires numpy.
+#                   (args.cno, string)
+#
+#   --gps_mon FILE  replay GPS_MON_MINOR/MAJOR events into gps monitor
+#                   state intervals (state, start, end, duration,
+#                   trigger), written to FILE, with minor state secs per
+#                   hour and per boot in FILE_hour/FILE_boot.  .npz or
+#                   csv like --track.  Requires numpy.
+#                   (args.gps_mon, string)
+#
+#   --ttff FILE     time to first fix per gps cycle (GPS_TURN_ON to the
+#                   GPS_FIRST_LOCK, other gps milestones, navTrack sats
+#                   at the fix) written to FILE, ttff histogram to
+#                   FILE_hist.  .npz or csv like --track.  Requires numpy.
+#                   (args.ttff, string)
+#
+#   --utc           fit the rtc's drift against GPS time (good geoData
+#                   fixes, utc vs the record's rtctime), a line per
+#                   reboot, and correct the times written by --sensors,
+#                   --cno, --gps_mon, --ttff.  With --cache the model is
+#                   kept with the record index (tagcore/rt_drift.py).
+#                   Requires numpy.
+#                   (args.utc, bool)
+#
 #   -v, --verbose   increase output verbosity
 #                   (args.verbose)
 #
@@ -141,6 +206,9 @@ rec_high                = 0            # inclusive
 rec_last                = 0            # last rec num looked at
 verbose                 = 0            # how chatty to be
 debug                   = 0            # extra debug chatty
+cache                   = None         # RecCache if --cache
+dblk_dir                = None         # DblkDir, if the directory is good
+dblk_end                = 0            # end of written data, 0 unknown
 
 
 # 1st sector of the first is the directory
@@ -148,12 +216,14 @@ DBLK_DIR_SIZE           = 0x200
 RLEN_MAX_SIZE           = 1024
 RESYNC_HDR_OFFSET       = 28            # how to get back to the start
                                         # or how to move past the majik
-MAX_ZERO_SIGS           = 1024          # 1024 quads, 4K bytes of zero
+SECTOR_SIZE             = 512
+SYNC_MAX_SECTORS        = 8             # typed_data.h, SYNC at least this often
 
 
 # global stat counters
 num_resyncs             = 0             # how often we've resync'd
 chksum_errors           = 0             # checksum errors seen
+num_holes               = 0             # holes (sparse input) skipped
 unk_rtypes              = 0             # unknown record types
 total_records           = 0
 total_bytes             = 0
@@ -161,8 +231,9 @@ dt_hdr                  = obj_dt_hdr()
 
 
 def init_globals():
-    global rec_low, rec_high, rec_last, verbose, debug
-    global num_resyncs, chksum_errors, unk_rtypes
+    global rec_low, rec_high, rec_last, verbose, debug, cache
+    global dblk_dir, dblk_end
+    global num_resyncs, chksum_errors, num_holes, unk_rtypes
     global total_records, total_bytes
 
     rec_low             = 0
@@ -170,21 +241,57 @@ def init_globals():
     rec_last            = 0
     verbose             = 0
     debug               = 0
+    cache               = None
+    dblk_dir            = None
+    dblk_end            = 0
 
     num_resyncs         = 0             # how often we've resync'd
     chksum_errors       = 0             # checksum errors seen
+    num_holes           = 0             # holes (sparse input) skipped
     unk_rtypes          = 0             # unknown record types
     total_records       = 0
     total_bytes         = 0
 
 
+# sparse input (tagfuse, partial pulls).  Holes read back as zeros, or
+# worse go remote.  Don't read them, jump to where the data picks up
+# again.  Where we land is most likely the middle of a record so the
+# caller needs to resync from there.
+
+def skip_hole(fd, offset):
+    '''move past the hole at offset, returns next data offset or -1'''
+    global num_holes
+
+    new_offset = fd.next_data(offset)
+    if new_offset is None:
+        print('*** hole @{0} (0x{0:x}) runs to eof'.format(offset))
+        return -1
+    new_offset = ((new_offset + 3) / 4) * 4
+    num_holes += 1
+    print('*** hole @{0} (0x{0:x}) - {1} (0x{1:x}) skipped, {2} bytes'.format(
+        offset, new_offset, new_offset - offset))
+    fd.seek(new_offset)
+    return new_offset
+
+
 # resync the data stream to the next SYNC/REBOOT record
 #
 # search for the next SYNC/REBOOT record by finding the SYNC_MAJIK
 # and then back up an appropriate amount (RESYNC_HDR_OFFSET).
+#
+# SYNCs are laid down at least every SYNC_MAX_SECTORS sectors so we work
+# a sector at a time.  Erased sectors (all 0s or all 1s) are skipped
+# whole.  Otherwise the sector is searched for the majik.  The majik is
+# quad aligned so it never gets split across sectors.
 
 resync0 = '*** resync: unaligned offset: {0} (0x{0:x}) -> {1} (0x{1:x})'
-resync1 = '*** resync: (struct error) [len: {0}] @{1} (0x{1:x})'
+resync1 = '*** resync: skipped {0} erased sectors, @{1} (0x{1:x})'
+resync2 = '*** resync: failed len/rtype @{0} (0x{0:x}): len: {1}, type: {2}, rec: {3}'
+resync3 = '*** resync: no SYNC in {0} sectors, still looking, @{1} (0x{1:x})'
+
+majik_str    = dtd.quad_struct.pack(dtd.dt_sync_majik)
+erased_0s    = '\x00' * SECTOR_SIZE
+erased_1s    = '\xff' * SECTOR_SIZE
 
 def resync(fd, offset):
     '''resync the data stream to the next SYNC/REBOOT record
@@ -211,80 +318,133 @@ def resync(fd, offset):
 
     print()
     print('*** resync started @{0} (0x{0:x})'.format(offset))
+    start = offset
+    if cache is not None:
+        new_offset = cache.get_resync(start)
+        if new_offset is not None:
+            print('*** resync: (cached) -> @{0} (0x{0:x})'.format(new_offset))
+            num_resyncs += 1
+            fd.seek(new_offset)
+            return new_offset
     if (offset & 3 != 0):
         print(resync0.format(offset, (offset/4)*4))
         offset = (offset / 4) * 4
-    fd.seek(offset)
     num_resyncs += 1
-    zero_sigs = 0
     v = dtd.dt_records.get(DT_SYNC,   (0, None, None, None, ''))
     sync_len   = v[DTR_REQ_LEN]
     v = dtd.dt_records.get(DT_REBOOT, (0, None, None, None, ''))
     reboot_len = v[DTR_REQ_LEN]
-    if (reboot_len == 0 or sync_len == 0):
-        print('*** can NOT resync, sync or reboot record not defined.')
+    if (sync_len == 0):
+        print('*** can NOT resync, sync record not defined.')
         return -1
+    hole    = fd.next_hole(offset) if fd.sparse else None
+    data_end= fd.coverage()[1]          # a short read at eof gets tossed
+    erased  = 0                         # current run of erased sectors
+    scanned = 0                         # sectors with data, no SYNC
     while (True):
-        while (True):
-            try:
-                offset = fd.tell()
-                majik_buf = fd.read(dtd.quad_struct.size)
-                sig = dtd.quad_struct.unpack(majik_buf)[0]
-                if sig == dtd.dt_sync_majik:
-                    break
-            except struct.error:
-                print(resync1.format(len(majik_buf), offset))
-                return -1
-            except IOError:
-                print('*** resync: file io error @{}'.format(offset))
-                return -1
-            except EOFError:
-                print('*** resync: end of file @{}'.format(offset))
+        if dblk_end and offset >= dblk_end:
+            if erased:
+                print(resync1.format(erased, offset))
+            print('*** resync: end of written data @{0} (0x{0:x})'.format(offset))
+            return -1
+        if hole is not None and offset >= hole:
+            if erased:
+                print(resync1.format(erased, offset))
+                erased = 0
+            offset = skip_hole(fd, offset)
+            if offset < 0:
                 return -1
-            except:
-                print('*** resync: exception error: {} @{}'.format(
-                    sys.exc_info()[0], offset))
-                raise
-            offset = fd.tell()
-            if (sig == 0):
-                zero_sigs += 1
-                if (zero_sigs > MAX_ZERO_SIGS):
-                    print('*** resync: too many zeros ({} x 4), bailing, @{}'.format(
-                        MAX_ZERO_SIGS, offset))
-                    return -1
-            else:
-                zero_sigs = 0
-
-        # outer loop, found a majik, let's see if its a SYNC/REBOOT
-        fd.seek(-RESYNC_HDR_OFFSET, 1)          # back up to start of attempt
-        offset_try = fd.tell()
-        if (verbose >= 4):
-            print('*** resync: trying @{0} (0x{0:x}), ' \
-                  'found MAJIK @{1} (0x{1:x})'.format(
-                      offset_try, offset))
-        buf = bytearray(fd.read(hdr_len))
-        if len(buf) < hdr_len:                  # oht oh, too small, very strange
-            print('*** resync: read of dt_hdr too small, @{}'.format(offset_try))
+            hole = fd.next_hole(offset)
+
+        # rest of the current sector, but don't read into a hole
+        sec_end = (offset / SECTOR_SIZE + 1) * SECTOR_SIZE
+        if hole is not None and hole < sec_end:
+            sec_end = hole
+        if not fd.tail and offset < data_end < sec_end:
+            sec_end = data_end          # partial last sector
+        try:
+            fd.seek(offset)
+            buf = fd.read(sec_end - offset)
+        except IOError:
+            print('*** resync: file io error @{}'.format(offset))
+            return -1
+        if not buf:
+            print('*** resync: end of file @{}'.format(offset))
             return -1
 
-        # we want rlen and rtype, we leave recsum checking for get_record
-        hdr.set(buf)
-        rlen   = hdr['len'].val
-        rtype  = hdr['type'].val
-        recnum = hdr['recnum'].val
-        if ((rtype == DT_SYNC   and rlen == sync_len) or
-            (rtype == DT_REBOOT and rlen == reboot_len)):
-            fd.seek(offset_try)
-            return offset_try
+        blen = len(buf)
+        if buf == erased_0s[:blen] or buf == erased_1s[:blen]:
+            erased += 1
+            offset += blen
+            continue
+        if erased:
+            if erased > 1 or verbose >= 4:
+                print(resync1.format(erased, offset))
+            erased = 0
+
+        i = buf.find(majik_str)
+        while i >= 0:
+            if (offset + i) & 3 == 0:
+                offset_try = offset + i + dtd.quad_struct.size - RESYNC_HDR_OFFSET
+                if (verbose >= 4):
+                    print('*** resync: trying @{0} (0x{0:x}), ' \
+                          'found MAJIK @{1} (0x{1:x})'.format(
+                              offset_try, offset + i))
+                fd.seek(offset_try)
+                hbuf = bytearray(fd.read(hdr_len))
+                if len(hbuf) < hdr_len:         # oht oh, too small, very strange
+                    print('*** resync: read of dt_hdr too small, @{}'.format(offset_try))
+                    return -1
+
+                # we want rlen and rtype, we leave recsum checking for get_record
+                hdr.set(hbuf)
+                rlen   = hdr['len'].val
+                rtype  = hdr['type'].val
+                recnum = hdr['recnum'].val
+                if ((rtype == DT_SYNC   and rlen == sync_len) or
+                    (rtype == DT_REBOOT and
+                     (rlen == reboot_len or reboot_len == 0 or
+                      other_rev(fd, offset_try)))):
+                    fd.seek(offset_try)
+                    if cache is not None:
+                        cache.add_resync(start, offset_try)
+                    return offset_try
+
+                # not what we expected.  keep looking past this majik
+                if (verbose >= 4):
+                    print(resync2.format(offset_try, rlen, rtype, recnum))
+            i = buf.find(majik_str, i + 1)
+
+        offset += blen
+        scanned += 1
+        if scanned == SYNC_MAX_SECTORS + 1 and verbose >= 1:
+            print(resync3.format(scanned, offset))
+
+
+def other_rev(fd, offset):
+    '''True if the REBOOT at offset was written by a different core_rev'''
+    from tagcore.rev_tables import reboot_rev, REBOOT_REV_OFFSET
+
+    fd.seek(offset)
+    rev = reboot_rev(fd.read(REBOOT_REV_OFFSET + 4))
+    return rev is not None and rev[0] != dtd.dt_rev[0]
 
-        # not what we expected.  continue looking for SYNC_MAJIKs where we left off
-        if (verbose >= 4):
-            resync2 = '*** resync: failed len/rtype @{} (0x{:x}): ' + \
-                      'len: {}, type: {}, rec: {}'
-            print(resync2.format(offset_try, offset_try, rlen, rtype, recnum))
-            print('    moving to: @{0} (0x{0:x})'.format(
-                offset_try + RESYNC_HDR_OFFSET))
-        fd.seek(offset_try + RESYNC_HDR_OFFSET)
+
+def select_rev(offset, rec_buf):
+    '''switch dt_records to the core_rev of the REBOOT record in rec_buf'''
+    from tagcore.rev_tables import reboot_rev, build_table
+
+    rev = reboot_rev(rec_buf)
+    if rev is None or rev == dtd.dt_rev:
+        return
+    minor_only = rev[0] == dtd.dt_rev[0]
+    tbl = dtd.dt_select(rev[0], rev[1], build = build_table)
+    if minor_only:
+        return                          # same layouts, nothing to say
+    print('*** core_rev {}/{} @{}: switching decoders{}'.format(
+        rev[0], rev[1], offset,
+        '' if getattr(tbl, 'schema', True) else
+        ' (no schema for this rev, headers only)'))
 
 
 def get_record(fd):
@@ -344,6 +504,35 @@ def get_record(fd):
                 break
             continue
         last_offset = offset
+
+        if dblk_end and offset >= dblk_end:
+            print('*** end of written data @{0} (0x{0:x})'.format(offset))
+            break
+
+        if fd.sparse and fd.next_data(offset) != offset:
+            offset = skip_hole(fd, offset)
+            if offset < 0:
+                break
+            offset = resync(fd, offset)
+            if (offset < 0):
+                break
+            continue
+
+        # been here before?  The cache only holds records that have
+        # already passed all the checks below, and is thrown away if the
+        # file was rewritten (see RecCache.load), so just read it in.
+        fields = cache.get(offset) if cache is not None else None
+        if fields:
+            rlen  = fields[RC_LEN]
+            extra = (4 - ((offset + rlen) & 3)) & 3
+            rec_buf = bytearray(fd.read(rlen + extra))
+            if len(rec_buf) >= rlen:
+                set_hdr(hdr, fields)
+                if hdr['type'].val == DT_REBOOT:
+                    select_rev(offset, rec_buf)
+                return offset, hdr, rec_buf
+            fd.seek(offset)             # short, do it the hard way
+
         rec_buf = bytearray(fd.read(hdr_len))
         if len(rec_buf) < hdr_len:
             print('*** record header read too short: wanted {}, got {}, @{}'.format(
@@ -388,6 +577,21 @@ def get_record(fd):
                 break
             continue
 
+        # record runs into a hole?  don't pull the hole, what we have of
+        # the record is useless.
+        if fd.sparse:
+            hole = fd.next_hole(offset)
+            if hole is not None and hole < offset + rlen:
+                print('*** record @{0} (0x{0:x}) runs into hole @{1} (0x{1:x})'.format(
+                    offset, hole))
+                offset = skip_hole(fd, hole)
+                if offset < 0:
+                    break
+                offset = resync(fd, offset)
+                if (offset < 0):
+                    break
+                continue
+
         # make sure to read bytes to the next quad alignment.  This helps
         # to keep the tagfuse sparse file implementation happier.
         # extra can NEVER be 0.  It can be 1, 2, 3, or 4.  4 indicates
@@ -413,10 +617,7 @@ def get_record(fd):
         # so we need to remove it before comparing.  Recsum is 16 bits wide so can not
         # simply be added in as part of the checksum computation.
         #
-        chksum = sum(rec_buf[:rlen])
-        chksum -= (recsum & 0xff00) >> 8
-        chksum -= (recsum & 0x00ff)
-        chksum &= 0xffff                # force to 16 bits vs. 16 bit recsum
+        chksum = rec_chksum(rec_buf, rlen, recsum)
         if (chksum != recsum):
             chksum_errors += 1
             chksum1 = '*** checksum failure @{0} (0x{0:x}) ' + \
@@ -429,6 +630,11 @@ def get_record(fd):
             if (offset < 0):
                 break
             continue                    # try again
+
+        # a REBOOT says which core_rev wrote what follows, it (and the
+        # records after it) get that revision's decoders and lengths.
+        if rtype == DT_REBOOT:
+            select_rev(offset, rec_buf)
         v = dtd.dt_records.get(rtype, (0, None, None, None, ''))
         required_len = v[DTR_REQ_LEN]
         if (required_len):
@@ -444,13 +650,38 @@ def get_record(fd):
                 continue            # try again
 
         # life is good.  return actual record.
+        if cache is not None:
+            cache.add(offset, hdr)
         return offset, hdr, rec_buf
 
     # oops.  things blew up.  just return -1 for the offset
     return -1, hdr, ''
 
 
-def process_dir(fd):
+def process_dir(fd, bound = True):
+    '''check the dblk directory and figure out where the data stops
+
+    With a good directory we won't go past dblk_high, and (bound) not
+    past the first erased sector either (dblk_nxt, the high water mark).
+    A growing (--tail) or sparse input doesn't get the dblk_nxt search,
+    erased and not there yet look the same.
+
+    leaves the file positioned at the first data sector.
+    '''
+    global dblk_dir, dblk_end
+
+    ddir = DblkDir()
+    if ddir.read(fd):
+        dblk_dir = ddir
+        dblk_end = ddir.data_limit()
+        if bound and not fd.tail and not fd.sparse:
+            dblk_end = ddir.find_nxt(fd, fd.coverage()[1])
+        if verbose >= 1:
+            print('*** dblk dir: {}'.format(ddir))
+            print('*** dblk data: @{0} (0x{0:x}) - @{1} (0x{1:x}), blk 0x{2:x}'.format(
+                ddir.data_start(), dblk_end, ddir.sector(dblk_end)))
+    else:
+        print('*** dblk dir: {}'.format(ddir))
     fd.seek(DBLK_DIR_SIZE)
 
 
@@ -469,8 +700,9 @@ def dump(args):
     and dt-specific decoder summary
     """
 
-    global rec_low, rec_high, rec_last, verbose, debug
-    global num_resyncs, chksum_errors, unk_rtypes
+    global rec_low, rec_high, rec_last, verbose, debug, cache
+    global dblk_dir, dblk_end
+    global num_resyncs, chksum_errors, num_holes, unk_rtypes
     global total_records, total_bytes
 
     init_globals()
@@ -481,12 +713,13 @@ def dump(args):
 
     if debug or verbose >= 5:
         print(ver_str)
+        v = vers.core_versions()
         print('  base_objs: {:10}  dt_defs: {:10}  sirf_defs: {:10}'.format(
-            vers.base_ver, vers.dt_ver, vers.sd_ver))
+            v['base'], v['dt'], v['sd']))
         print('   core:     {:10}  e: {:10}  h: {:10}  panic:  h: {:10}'.format(
-            vers.core_ver, vers.ce_ver, vers.ch_ver, vers.pi_ver))
+            v['core'], v['ce'], v['ch'], v['pi']))
         print('   sirf:                 e: {:10}  h: {:10}'.format(
-            vers.se_ver, vers.sh_ver))
+            v['se'], v['sh']))
         print()
 
     def count_dt(rtype):
@@ -531,9 +764,77 @@ def dump(args):
         print()
 
 
+    # track table only if asked for, pulls in numpy
+    track = None
+    if args.track:
+        from tagcore.gps_track import TrackTable
+        track = TrackTable()
+
+    sensors = None
+    if args.sensors:
+        from tagcore.sensor_data import SensorTable
+        sensors = SensorTable()
+
+    cno = None
+    if args.cno:
+        from tagcore.gps_cno import CnoTable
+        cno = CnoTable()
+
+    if args.gps_mon or args.ttff:
+        from tagcore.event_index  import hdr_secs
+
+    gps_mon = None
+    if args.gps_mon:
+        from tagcore.gps_timeline import GpsTimeline
+        from tagcore.core_headers import GPS_MON_MINOR, GPS_MON_MAJOR
+        gps_mon = GpsTimeline()
+
+    ttff = None
+    if args.ttff:
+        from tagcore.gps_ttff     import TtffTable, navtrk_sats, stats_str
+        ttff = TtffTable()
+
+    clock = None
+    if args.utc:
+        from tagcore.rt_time import GpsClock
+        clock = GpsClock()
+
+    # analyzers see every record, not just the ones displayed.  need_obj,
+    # rtypes they need decoded even when not displayed.
+    analyzing = any([ a is not None for a in
+                      (track, sensors, cno, gps_mon, ttff, clock) ])
+    need_obj  = set()
+    if track is not None or cno is not None or clock is not None:
+        need_obj.add(DT_GPS_RAW_SIRFBIN)
+    if gps_mon is not None or ttff is not None:
+        need_obj.add(DT_EVENT)
+
     # create file object that handles both buffered and direct io
-    infile  = TagFile(args.input, net_io = args.net, tail = args.tail,
-                      verbose = verbose, timeout = args.timeout)
+    # or, for a raw SD image, a view of just the DBLK area.
+    if args.image:
+        from tagcore.sd_image import SdImage, FS_LOC_DBLK
+        sd = SdImage(args.input)
+        print('*** sd image: {}'.format(sd))
+        if not sd.valid:
+            print('*** {}: no good fs locator, not a tag SD image?'.format(sd.name))
+            return
+        infile = sd.area(FS_LOC_DBLK)
+    else:
+        infile = TagFile(args.input, net_io = args.net, tail = args.tail,
+                         verbose = verbose, timeout = args.timeout)
+
+    # sparse input?  say how much of it is actually there
+    infile.data_ranges()
+    if infile.sparse or verbose >= 1:
+        present, size, holes = infile.coverage()
+        print('*** coverage: {} of {} bytes present ({:.1f}%), {} holes'.format(
+            present, size, (100.0 * present / size) if size else 0.0, holes))
+
+    if args.cache or args.cache_dir:
+        cache = RecCache(infile.name, cache_dir = args.cache_dir,
+                         verbose = verbose)
+        if debug or verbose >= 1:
+            print('*** cache: {} records, {}'.format(len(cache), cache.path))
 
     if (args.start_rec):
         rec_low  = args.start_rec
@@ -541,9 +842,34 @@ def dump(args):
         rec_high = args.last_rec
 
     # process the directory, this will leave us pointing at the first header
-    process_dir(infile)
-
-    if (args.jump):
+    process_dir(infile, bound = not args.nobound)
+
+    if args.sector is not None:
+        if not dblk_dir:
+            print('*** --sector needs a good dblk directory')
+            return
+        if args.sector <= dblk_dir.low or args.sector > dblk_dir.high:
+            print('*** --sector 0x{:x} outside of dblk 0x{:x} - 0x{:x}'.format(
+                args.sector, dblk_dir.low + 1, dblk_dir.high))
+            return
+        infile.seek(dblk_dir.offset(args.sector))
+    elif args.new:
+        if cache is None or not len(cache):
+            print('*** --new: no record cache (--cache), starting at the top')
+        else:
+            # pick up the core_rev the last cached REBOOT said, and the
+            # record number to check for gaps from
+            reboot = cache.last_reboot()
+            if reboot is not None:
+                infile.seek(reboot)
+                select_rev(reboot, bytearray(infile.read(
+                    cache.recs[reboot][RC_LEN])))
+            rec_last = cache.recs[max(cache.recs)][RC_RECNUM]
+            start = (cache.high + 3) & ~3
+            print('*** --new: {} records cached, starting @{} (0x{:x})'.format(
+                len(cache), start, start))
+            infile.seek(start)
+    elif (args.jump):
         if (args.jump == -1):
             infile.seek(0, how = TF_SEEK_END)
         elif (args.jump < 0):
@@ -574,54 +900,115 @@ def dump(args):
                     recnum - rec_last, rec_offset))
             rec_last = recnum
 
-            # apply any filters (inclusion)
+            # apply any filters (inclusion).  These only say what gets
+            # displayed, the analyzers (--track, --utc, ...) see every
+            # record, so with any of them on we keep going past -l/-n.
+            show = True
             if (args.rtypes):
                 # either the number rtype must be in the search list
                 # or the name of the rtype must be in the search list
                 if ((str(rtype)       not in args.rtypes) and
                       (dt_name(rtype) not in args.rtypes)):
-                    continue                   # not an rtype of interest
+                    show = False               # not an rtype of interest
 
             # look to see if record number bounds
             if (rec_low and recnum < rec_low):
-                continue
+                show = False
             if (rec_high and recnum > rec_high):
-                break                       # all done
+                if not analyzing:
+                    break                   # all done
+                show = False
+            if (args.num and total_records >= args.num):
+                show = False                # only get here if analyzing
 
             # look to see if past file position bound
             if (args.endpos and rec_offset > args.endpos):
                 break                       # all done
 
-            count_dt(rtype)
             v = dtd.dt_records.get(rtype, (0, None, None, None, ''))
             decoder  = v[DTR_DECODER]           # dt function
             emitters = v[DTR_EMITTERS]          # emitter list
             obj      = v[DTR_OBJ]               # dt object
-            if (decoder):
+            decoded  = False
+            if (decoder and (show or rtype in need_obj)):
+                if not show:            # mids only count what is shown
+                    counts = [ dict(sirf.mid_count), dict(sirf.mid_bad) ]
                 try:
                     decoder(verbose, rec_offset, rec_buf, obj)
-                    if emitters and len(emitters):
+                    decoded = True
+                except struct.error:
+                    if show:
+                        print('*** decoder/emitter error: (len: {}, '
+                              'rtype: {} {}, expected: {}), @{}'.format(
+                                  rlen, rtype, dt_name(rtype),
+                                  len(obj) if obj else 0, rec_offset))
+                if not show:
+                    for d, saved in zip((sirf.mid_count, sirf.mid_bad), counts):
+                        d.clear()
+                        d.update(saved)
+
+            # feed the analyzers, anything that needs obj only gets a
+            # record that decoded
+            if rtype == DT_GPS_RAW_SIRFBIN and decoded:
+                if track is not None:
+                    track.add_gps_raw(rec_offset, obj)
+                if cno is not None:
+                    cno.add_gps_raw(rec_offset, rec_buf, obj)
+                if clock is not None:
+                    clock.add_gps_raw(rec_offset, rec_buf, obj)
+            if clock is not None and rtype == DT_REBOOT:
+                clock.reboot(rec_offset)
+            if sensors is not None and rtype == DT_SENSOR_DATA:
+                sensors.add_record(rec_offset, rec_buf)
+            if gps_mon is not None or ttff is not None:
+                secs = hdr_secs(hdr)
+            if gps_mon is not None:
+                if rtype == DT_REBOOT:
+                    gps_mon.reboot(secs, rec_offset, recnum)
+                elif rtype == DT_EVENT and decoded and \
+                     obj['event'].val in (GPS_MON_MINOR, GPS_MON_MAJOR):
+                    gps_mon.event(secs, obj['event'].val,
+                                  obj['arg0'].val, obj['arg1'].val,
+                                  obj['arg2'].val, rec_offset, recnum)
+                else:
+                    gps_mon.note(secs)
+            if ttff is not None:
+                if rtype == DT_EVENT and decoded:
+                    ttff.event(secs, obj['event'].val, obj['arg0'].val,
+                               rec_offset, recnum)
+                elif rtype == DT_REBOOT:
+                    ttff.reboot(secs)
+                elif rtype == DT_GPS_RAW_SIRFBIN:
+                    ttff.nav_sats(secs, navtrk_sats(rec_buf))
+                else:
+                    ttff.note(secs)
+
+            if show:
+                count_dt(rtype)
+                if decoded and emitters:
+                    try:
                         for e in emitters:
                             e(verbose, rec_offset, rec_buf, obj)
-                except struct.error:
-                    print('*** decoder/emitter error: (len: {}, '
-                          'rtype: {} {}, expected: {}), @{}'.format(
-                              rlen, rtype, dt_name(rtype),
-                              len(obj) if obj else 0, rec_offset))
-            else:
-                if debug or verbose >= 5:
-                    print('*** no decoder installed for rtype {}, @{}'.format(
-                        rtype, rec_offset))
-            if (verbose >= 3):
-                print()
-                dump_hdr(rec_offset, rec_buf, '    ')
-                dump_buf(rec_buf, '    ')
-            if (verbose >= 1):
-                print()
-            total_records += 1
-            total_bytes   += rlen
-            if (args.num and total_records >= args.num):
-                break
+                    except struct.error:
+                        print('*** decoder/emitter error: (len: {}, '
+                              'rtype: {} {}, expected: {}), @{}'.format(
+                                  rlen, rtype, dt_name(rtype),
+                                  len(obj) if obj else 0, rec_offset))
+                elif not decoder:
+                    if debug or verbose >= 5:
+                        print('*** no decoder installed for rtype {}, @{}'.format(
+                            rtype, rec_offset))
+                if (verbose >= 3):
+                    print()
+                    dump_hdr(rec_offset, rec_buf, '    ')
+                    dump_buf(rec_buf, '    ')
+                if (verbose >= 1):
+                    print()
+                total_records += 1
+                total_bytes   += rlen
+                if (args.num and total_records >= args.num and
+                        not analyzing):
+                    break
             #
             # if we have a SYNC_FLUSH then advance to the next sector
             # boundary.  System_Flush and we should have a reboot record
@@ -646,9 +1033,74 @@ def dump(args):
         infile.tell(), infile.tell(), total_records, total_bytes))
     print('*** reboots: {}, resyncs: {}, chksum_errs: {}, unk_rtypes: {}'.format(
         dtd.dt_count.get(DT_REBOOT, 0), num_resyncs, chksum_errors, unk_rtypes))
+    if num_holes:
+        print('*** holes skipped: {}'.format(num_holes))
     print()
     print('rtypes: {}'.format(dtd.dt_count))
     print('mids:   {}'.format(sirf.mid_count))
+    if sirf.mid_bad:
+        print('bad:    {}'.format(sirf.mid_bad))
+
+    if cache is not None:
+        cache.save()
+        print('*** cache: hits: {}, added: {}, total: {}'.format(
+            cache.hits, cache.added, len(cache)))
+
+    if clock is not None:
+        print()
+        # with --cache the model is kept with the record index.  Not for
+        # an --image, the index's offsets are into the DBLK area, not
+        # the file it names.  No index (None), use this pass's fixes.
+        model = None
+        if cache is not None and not args.image:
+            from tagcore.rt_drift import load_model
+            model = load_model(infile.name, cache)
+        if model is None:
+            model = clock.fit()
+        if not model.fixes:
+            print('*** utc: no good geoData fixes, times not corrected')
+        else:
+            print('*** utc: {}'.format(model))
+            for start, drift in zip(model.starts, model.drifts):
+                if drift:
+                    print('***   @{:<8d} {}'.format(start, drift))
+            for acc in (sensors, cno, gps_mon, ttff):
+                if acc is not None:
+                    acc.clock = model
+
+    if track is not None:
+        print()
+        print('*** track: {} fixes -> {}'.format(
+            track.write(args.track), args.track))
+        if track.bad:
+            print('*** track: {} gps records skipped, bad packets'.format(
+                track.bad))
+
+    if sensors is not None:
+        print()
+        counts = sensors.write(args.sensors)
+        print('*** sensors: {}'.format(', '.join([ '{}: {}'.format(n, counts[n])
+                                                    for n in sorted(counts) ])))
+
+    if cno is not None:
+        print()
+        counts = cno.write(args.cno)
+        print('*** cno: {} navTracks, {} SVs ({} rows)'.format(
+            len(cno), len(counts), sum(counts.values())))
+
+    if gps_mon is not None:
+        print()
+        table = gps_mon.write(args.gps_mon)
+        print('*** gps_mon: {} intervals, {} boots -> {}'.format(
+            len(table), gps_mon.boot, args.gps_mon))
+        if gps_mon.mismatches:
+            print('*** gps_mon: {} state changes from an unexpected state'.format(
+                gps_mon.mismatches))
+
+    if ttff is not None:
+        print()
+        print('*** ttff: {} -> {}'.format(stats_str(ttff.write(args.ttff)),
+                                          args.ttff))
 
 if __name__ == "__main__":
     dump(parseargs())
@@ -70,10 +70,23 @@ def parseargs():
                         type=auto_int,
                         help='set ending file position to process')
 
+    parser.add_argument('--sector',
+                        type=auto_int,
+                        metavar='BLK',
+                        help='start at absolute SD sector BLK (dblk dir)')
+
+    parser.add_argument('--nobound',
+                        action='store_true',
+                        help='don\'t stop at the first erased sector')
+
     parser.add_argument('-n', '--num',
                         type=int,
                         help='limit display to <num> records')
 
+    parser.add_argument('--image',
+                        action='store_true',
+                        help='input is a raw SD image, use its DBLK area')
+
     parser.add_argument('--net',
                         action='store_true',
                         help='use tag net io, (unbuffered io)')
@@ -109,6 +122,49 @@ def parseargs():
                         action='store_true',
                         help='continue reading data at EOF')
 
+    parser.add_argument('--cache',
+                        action='store_true',
+                        help='use the persistent record cache')
+
+    parser.add_argument('--new',
+                        action='store_true',
+                        help='with --cache, only what was appended since')
+
+    parser.add_argument('--cache_dir',
+                        metavar='DIR',
+                        help='record cache directory (implies --cache)')
+
+    parser.add_argument('--track',
+                        metavar='FILE',
+                        help='write gps track table (navData/geoData) to FILE'
+                             ' (.npz or csv)')
+
+    parser.add_argument('--sensors',
+                        metavar='FILE',
+                        help='write sensor data tables, one per sensor, to'
+                             ' FILE_<sensor> (.npz or csv)')
+
+    parser.add_argument('--cno',
+                        metavar='FILE',
+                        help='write per satellite C/N0 series (navTrack), one'
+                             ' per SV, to FILE_svNN (.npz or csv)')
+
+    parser.add_argument('--gps_mon',
+                        metavar='FILE',
+                        help='write gps monitor state intervals to FILE,'
+                             ' time in state per hour/boot to FILE_hour,'
+                             ' FILE_boot (.npz or csv)')
+
+    parser.add_argument('--ttff',
+                        metavar='FILE',
+                        help='write time to first fix per gps cycle to FILE,'
+                             ' ttff histogram to FILE_hist (.npz or csv)')
+
+    parser.add_argument('--utc',
+                        action='store_true',
+                        help='correct written times for rtc drift, fitted'
+                             ' against gps time (geoData)')
+
     # see tagdump.py for verbosity levels
     parser.add_argument('-v', '--verbose',
                         action='count',